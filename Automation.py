@@ -1,102 +1,263 @@
 """
 Automation functions for well analysis
 """
-import pandas as pd
 import time
-from Button_Repository2 import Button_Repository, Cerbers_functions, save_performance_log
+from Button_Repository2 import Button_Repository, Cerbers_functions, save_performance_log, begin_row, end_row
+from result_assembly import ResultAssembler
+from result_sinks import MemorySink, ReorderingSink
+from sweep_planner import plan_sweep
+from result_cache import well_fingerprint
+from cancellation import Cancelled
+from tracing import tracer
+from Sensitivity_Repository import Sensitivity_Repository, Sensitivity_functions, SENSITIVITY_PARAMETERS, SENSITIVITY_OUTPUTS
 
 
-def run_automation_for_inputs(input_rows, gui=None):
+def run_automation_for_inputs(input_rows, gui=None, backend=None, sink=None, checkpoint=None, plan=True,
+                              result_cache=None, model_revision="", cancel_token=None):
     """
     Run automation for multiple input rows.
     
     Args:
         input_rows: List of dicts with keys: Density_value, RIH_wob_value, POOH_wob_value, WHP_value
         gui: Optional GUI reference to check for stop flag and update runtime
+        backend: Optional UI backend (defaults to the live Orpheus UIA backend)
+        sink: Optional ResultSink that receives each row's results as soon as
+            they are extracted (defaults to a MemorySink). It is closed when
+            the run ends, stops or fails.
+        checkpoint: Optional CheckpointJournal - rows already in it are replayed
+            from the journal instead of rerun, and new rows are added to it
+        plan: Run rows grouped by density (fewest New_Fluid_Density calls);
+            results still come out in the original row order
+        result_cache: Optional ResultCache - rows computed before for the same
+            well (window title + model_revision) are served from it, and new
+            results are added to it
+        model_revision: User label for the well model state, part of the cache key
+        cancel_token: Optional CancellationToken - cancelling it stops the run
+            inside the current step; finished rows are kept as with ESC
     
     Returns:
-        Combined DataFrame with all results
+        Combined DataFrame with all results (None for sinks that don't keep
+        results in memory)
     """
     # Start timer for entire automation
     automation_start = time.perf_counter()
     
-    # Initialize automation objects once - share the same Button_Repository instance
-    br = Button_Repository()
-    cf = Cerbers_functions(br)  # Pass br to Cerbers_functions instead of creating new one
+    # Automation objects are created once, on the first row that needs Orpheus
+    br = None
+    cf = None
     
-    all_results = []
-    previous_density = None  # Track previous density to skip if unchanged
+    # Each row is typed into reused float64 buffers, then streamed to the sink
+    if sink is None:
+        sink = MemorySink()
+    results = ResultAssembler()
+    
+    # Cache entries belong to the open well - connect now to read its title
+    well = None
+    if result_cache is not None:
+        br = Button_Repository(backend, cancel_token=cancel_token)
+        cf = Cerbers_functions(br)
+        well = well_fingerprint(br.backend.window_title(), model_revision)
+    
+    def known(row):
+        # Rows that need no UI work: journaled or cached
+        return ((checkpoint is not None and checkpoint.completed(row)) or
+                (result_cache is not None and result_cache.contains(well, row)))
+    
+    # Track previous density to skip if unchanged. Orpheus may have been restarted or its
+    # fluid changed since any earlier run, so the first row run here always applies its density
+    previous_density = None
     
     total_rows = len(input_rows)
     
-    # Process each row
-    for idx, row in enumerate(input_rows, 1):
-        # Check if user pressed ESC to stop
-        if gui and gui.stop_automation:
-            break
+    # Group rows by density so each density is applied once
+    if plan:
+        # No density has been applied in this process yet, so none is assumed to be on
+        sweep_plan = plan_sweep(input_rows, current_density=None, skip=known)
+        order = sweep_plan.order
+        if sweep_plan.density_changes < sweep_plan.original_density_changes:
+            print(sweep_plan.describe())
+    else:
+        order = list(range(total_rows))
+    # Rows reach the sink in the original input order
+    output = ReorderingSink(sink, order)
+    
+    try:
+        # Process each row
+        for idx, position in enumerate(order, 1):
+            row = input_rows[position]
+
+            # Check if user pressed ESC to stop
+            if (gui and gui.stop_automation) or (cancel_token is not None and cancel_token.cancelled):
+                break
         
-        # Update progress and runtime in GUI
-        if gui:
-            gui.update_progress(idx, total_rows)
-            gui.update_runtime()
+            # Update progress and runtime in GUI
+            if gui:
+                gui.update_progress(idx, total_rows)
+                gui.update_runtime()
         
-        # Only change density if it's different from previous row
-        current_density = row['Density_value']
-        if current_density != previous_density:
-            cf.New_Fluid_Density(current_density)
-            previous_density = current_density
+            # Completed in an earlier run - replay the journaled results
+            if checkpoint is not None and checkpoint.completed(row):
+                frame = checkpoint.result(row)
+                output.write_row(position, frame)
+                if gui and hasattr(gui, 'show_partial_results'):
+                    gui.show_partial_results(frame)
+                continue
         
-        br.Input_WOB_RIH_POOH_WHP(row['RIH_wob_value'], row['POOH_wob_value'], row['WHP_value'])
+            # Computed in an earlier sweep of this well - serve it from the cache
+            if result_cache is not None:
+                frame = result_cache.get(well, row)
+                if frame is not None:
+                    output.write_row(position, frame)
+                    if checkpoint is not None:
+                        checkpoint.record(row, frame)
+                    if gui and hasattr(gui, 'show_partial_results'):
+                        gui.show_partial_results(frame)
+                    continue
         
-        br.Trip_in_Out_Buttons()  
-        br.Drop_Down_Streatcher()
-        br.Modeled_Data_Button()
+            if br is None:
+                # Share the same Button_Repository instance
+                br = Button_Repository(backend, cancel_token=cancel_token)
+                cf = Cerbers_functions(br)  # Pass br to Cerbers_functions instead of creating new one
         
-        # Get results
-        df = br.Modeled_Data_df()
+            # Everything from here to the OK buttons is this row's span on the trace
+            row_start = time.perf_counter_ns()
+            begin_row(position)
+
+            # Only change density if it's different from previous row
+            current_density = row['Density_value']
+            if current_density != previous_density:
+                cf.New_Fluid_Density(current_density)
+                previous_density = current_density
         
-        if df is not None:
-            # Add input parameters to the result dataframe
-            df.insert(0, 'FOE-Pipe Fluid Density', row['Density_value'])
-            df.insert(1, 'FOE-RIH', row['RIH_wob_value'])
-            df.insert(2, 'FOE-POOH', row['POOH_wob_value'])
-            
-            # Reorder columns to match desired output
-            # Expected columns from Modeled_Data_df: Tubing Depth, RIH Stretch, POOH Stretch (or similar)
-            # Rename columns to match FOE- naming convention
-            column_mapping = {}
-            for col in df.columns:
-                if 'Depth' in col or 'depth' in col.lower():
-                    column_mapping[col] = 'FOE-Depth'
-                elif 'RIH' in col and ('Stretch' in col or 'stretch' in col.lower()):
-                    column_mapping[col] = 'FOE-RIH_Streatch'
-                elif 'POOH' in col and ('Stretch' in col or 'stretch' in col.lower()):
-                    column_mapping[col] = 'FOE-POOH_Streatch'
-            
-            df.rename(columns=column_mapping, inplace=True)
-            
-            # Reorder columns: FOE-Depth, FOE-Pipe Fluid Density, FOE-RIH, FOE-POOH, FOE-RIH_Streatch, FOE-POOH_Streatch
-            desired_order = ['FOE-Depth', 'FOE-Pipe Fluid Density', 'FOE-RIH', 'FOE-POOH', 'FOE-RIH_Streatch', 'FOE-POOH_Streatch']
-            # Only include columns that exist
-            df = df[[col for col in desired_order if col in df.columns]]
-            
-            all_results.append(df)
+            br.Input_WOB_RIH_POOH_WHP(row['RIH_wob_value'], row['POOH_wob_value'], row['WHP_value'])
         
-        # Click OK buttons
-        br.OK_Button()
-        br.OK_Button()
+            br.Trip_in_Out_Buttons()  
+            br.Drop_Down_Streatcher()
+            br.Modeled_Data_Button()
         
-        # Update runtime in GUI
-        if gui:
-            gui.update_runtime()
-    
-    # Save performance log after completing all rows
-    save_performance_log()
+            # Get results
+            df = br.Modeled_Data_df()
+        
+            # Typed FOE columns for this row, handed to the sink right away
+            frame = results.last_frame() if results.append(row, df) else None
+            output.write_row(position, frame)
+            if frame is not None:
+                if checkpoint is not None:
+                    checkpoint.record(row, frame)
+                if result_cache is not None:
+                    result_cache.put(well, row, frame)
+                if gui and hasattr(gui, 'show_partial_results'):
+                    gui.show_partial_results(frame)
+            results.clear()
+        
+            # Click OK buttons
+            br.OK_Button()
+            br.OK_Button()
+            end_row(row_start)
+        
+            # Update runtime in GUI
+            if gui:
+                gui.update_runtime()
+    except Cancelled as e:
+        print(f"Automation stopped: {e}")
+    finally:
+        # Keep whatever finished, even on ESC stop or an error
+        output.close()
+        if br is not None:
+            br.close()
+        if checkpoint is not None:
+            checkpoint.close()
+        if result_cache is not None:
+            print(result_cache.describe())
+            result_cache.close()
+        # Save performance log after completing all rows
+        save_performance_log()
+        tracer.flush()
     
-    if all_results:
-        return pd.concat(all_results, ignore_index=True)
-    else:
-        return None
+    return sink.result()
+
+
+def run_sensitivity_for_inputs(input_rows, gui=None, backend=None, sink=None, depths=None, cancel_token=None):
+    """
+    Run every input row in one Sensitivity Analysis Wizard calculation.
+
+    Each parameter is given the distinct values of its input column, so
+    Orpheus calculates the complete combination of them in one run (a
+    table that is not a full grid computes some extra cases). Cases are
+    matched back to the input rows and streamed to the sink in input order,
+    with the same FOE columns as run_automation_for_inputs.
+
+    Args:
+        input_rows: List of dicts with keys: Density_value, RIH_wob_value, POOH_wob_value, WHP_value
+        gui: Optional GUI reference for progress and partial results
+        backend: Optional UI backend (defaults to the live Orpheus UIA backend)
+        sink: Optional ResultSink (defaults to a MemorySink)
+        depths: BHA depths to report stretch at (defaults to the Tubing Depth
+            column of one regular Trip In and Out run of the first row)
+        cancel_token: Optional CancellationToken that stops the run
+
+    Returns:
+        Combined DataFrame with all results (None for sinks that don't keep
+        results in memory)
+    """
+    if sink is None:
+        sink = MemorySink()
+    if depths is None:
+        seed = run_automation_for_inputs(input_rows[:1], backend=backend, plan=False, cancel_token=cancel_token)
+        if cancel_token is not None and cancel_token.cancelled:
+            return sink.result()
+        if seed is None or seed.empty:
+            raise Exception("No Modeled Data depths from the first input row - cannot set BHA Depth")
+        depths = seed['FOE-Depth'].tolist()
+
+    repository = Sensitivity_Repository(backend, cancel_token=cancel_token)
+    sf = Sensitivity_functions(repository)
+    parameter_values = {}
+    for title, key in SENSITIVITY_PARAMETERS:
+        values = depths if key is None else [row[key] for row in input_rows]
+        parameter_values[title] = sorted({float(value) for value in values})
+
+    output = ReorderingSink(sink, range(len(input_rows)))
+    results = ResultAssembler()
+    try:
+        if gui:
+            gui.update_progress(0, len(input_rows))
+        cases = sf.Run_Matrix(parameter_values).astype('float64')
+
+        # Cases per input row, keyed on the (rounded) input values
+        titles = [title for title, _ in SENSITIVITY_PARAMETERS]
+        keys = [key for _, key in SENSITIVITY_PARAMETERS if key is not None]
+        groups = cases.round(6).groupby(titles[1:], sort=False).groups
+        matched = 0
+        for position, row in enumerate(input_rows):
+            index = groups.get(tuple(round(float(row[key]), 6) for key in keys))
+            if index is None:
+                print(f"Warning: no sensitivity cases for input row {position + 1}")
+                output.write_row(position, None)
+                continue
+            block = cases.loc[index].sort_values(titles[0])
+            matched += len(block)
+            # BHA Depth / RIH Stretch / POOH Stretch map to the FOE columns like grdData headers
+            df = block[[titles[0]] + [column for _, column in SENSITIVITY_OUTPUTS]]
+            frame = results.last_frame() if results.append(row, df) else None
+            output.write_row(position, frame)
+            results.clear()
+            if gui:
+                gui.update_progress(position + 1, len(input_rows))
+                if frame is not None and hasattr(gui, 'show_partial_results'):
+                    gui.show_partial_results(frame)
+        if len(cases) > matched:
+            print(f"Sensitivity: {len(cases) - matched} of {len(cases)} cases were not requested "
+                  f"(input table is not a complete grid)")
+    except Cancelled as e:
+        print(f"Sensitivity analysis stopped: {e}")
+    finally:
+        output.close()
+        repository.close()
+        save_performance_log()
+        tracer.flush()
+
+    return sink.result()
 
 
 # Example usage
@@ -1,173 +1,256 @@
-from pywinauto import Application, timings
-from pywinauto.findwindows import ElementNotFoundError
-from pywinauto.controls.uiawrapper import UIAWrapper
-from pywinauto.uia_element_info import UIAElementInfo
-from pywinauto.uia_defines import IUIA
-from pywinauto.uia_defines import get_elem_interface
 import time
-import comtypes.client
-from comtypes.gen.UIAutomationClient import IUIAutomation, TreeScope_Descendants
-from datetime import datetime
-import csv
-from pathlib import Path
-
-
-# Performance logging
-_performance_log = []
+import functools
+from ui_backend import UIABackend
+from element_cache import ElementCache
+from window_waits import WindowWaiter
+from wait_scheduler import WaitScheduler, TRANSITION_PREFIX
+from grid_capture import parse_grid_clipboard
+from tracing import tracer, TracedBackend
+from search_counters import search_counters
+from perf_store import default_store
+from perf_writer import log_writer
+
+
+# Timings and search counts go to the perf_log store through the background log writer
+# Input row being run (-1 outside the row loop)
+_log_row = -1
 
 def timer(func):
-    """Decorator to time function execution and log to file"""
+    """Decorator: trace the call as a step span and log its duration"""
+    name = func.__name__
+
+    @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        start = time.perf_counter()
-        result = func(*args, **kwargs)
-        end = time.perf_counter()
-        elapsed = end - start
-        
-        # Print to console
-        print(f"{func.__name__}: {elapsed:.3f}s")
-        
-        # Log to memory
-        _performance_log.append({
-            'timestamp': datetime.now().isoformat(),
-            'function': func.__name__,
-            'elapsed': f"{elapsed:.3f}"
-        })
-        
+        # Searches made inside are counted against this step
+        previous = search_counters.enter_step(name)
+        start = time.perf_counter_ns()
+        try:
+            result = func(*args, **kwargs)
+        except BaseException:
+            # Failed steps show on the trace but don't skew the logged timings
+            tracer.record(name, start, time.perf_counter_ns())
+            raise
+        finally:
+            search_counters.exit_step(previous)
+        log_step(name, start)
         return result
     return wrapper
 
-def save_performance_log(filename="performance_log.csv"):
-    """Save performance log to CSV file"""
-    if not _performance_log:
+def log_step(function_name, start_ns):
+    """Record a step that started at start_ns (perf_counter_ns) as a span and a log entry"""
+    end = time.perf_counter_ns()
+    tracer.record(function_name, start_ns, end)
+    log_writer.log('timings', (time.time(), _log_row, function_name, (end - start_ns) / 1e9))
+
+def log_performance(function_name, elapsed):
+    """Queue one timing record for the performance log"""
+    log_writer.log('timings', (time.time(), _log_row, function_name, elapsed))
+
+def begin_row(position):
+    """Attribute the timings and searches that follow to input row position"""
+    global _log_row
+    _log_row = position
+    search_counters.begin_row(position)
+
+def end_row(start_ns):
+    """Log the row that started at start_ns as a 'row' span and timing, with its search counts"""
+    global _log_row
+    end = time.perf_counter_ns()
+    tracer.record("row", start_ns, end, 'row', _log_row)
+    log_performance("row", (end - start_ns) / 1e9)
+    log_search_counts()
+    _log_row = -1
+
+def log_search_counts():
+    """Queue the UIA search counts recorded since the last call"""
+    counts = search_counters.take()
+    if not counts:
         return
+    now = time.time()
+    for (row, step, call, condition, scope), (calls, elements, elapsed_ns) in counts.items():
+        log_writer.log('searches', (now, row, step, call, condition, scope, calls, elements, elapsed_ns / 1e9))
+    # Search time per row next to the step timings, so it can be set against the row time
+    for row, (_, _, elapsed_ns) in search_counters.totals(counts, by='row').items():
+        log_writer.log('timings', (now, row, "uia_search", elapsed_ns / 1e9))
+
+def save_performance_log():
+    """Write out everything logged so far (end of a sweep, including a stopped one)"""
+    log_search_counts()
+    if not log_writer.flush():
+        print("Warning: the performance log writer is behind; remaining records are written in the background")
+    dropped = log_writer.take_dropped()
+    if dropped:
+        print(f"Warning: {dropped} performance log records dropped (log queue full)")
+    if log_writer.store is not None:
+        print(f"\nPerformance log saved to: {log_writer.store.root}")
+
+
+_wait_scheduler = None
+
+def get_wait_scheduler():
+    """Shared WaitScheduler, seeded from the transition timings in the perf_log store"""
+    global _wait_scheduler
+    if _wait_scheduler is None:
+        _wait_scheduler = WaitScheduler(
+            on_record=lambda name, elapsed: log_performance(TRANSITION_PREFIX + name, elapsed))
+        _wait_scheduler.load_history(default_store())
+    return _wait_scheduler
+
+
+def grid_rows_to_df(rows):
+    """Turn grdData rows (lists of cell strings) into a DataFrame without the row-number column"""
+    import pandas as pd
+
+    data = []
+    headers = []
     
-    log_path = Path(__file__).parent / filename
+    for row_data in rows:
+        # Check if this row looks like a header (contains text like "Tubing Depth" or has \r in it)
+        is_header = any('Tubing Depth' in str(cell) or 'Stretch' in str(cell) or '\r(' in str(cell) for cell in row_data)
+        
+        if is_header:
+            headers = row_data  # This is a header row
+            # Don't add it to data
+        else:
+            # Only add non-header rows to data
+            if headers:  # Only add data if we've found headers
+                data.append(row_data)
     
-    # Check if file exists to determine if we need headers
-    file_exists = log_path.exists()
+    # If no headers detected, use first row as headers
+    if not headers and data:
+        headers = data[0]
+        data = data[1:]
     
-    with open(log_path, 'a', newline='') as f:
-        fieldnames = ['timestamp', 'function', 'elapsed']
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        
-        if not file_exists:
-            writer.writeheader()
-        
-        writer.writerows(_performance_log)
-    
-    print(f"\nPerformance log saved to: {log_path}")
-    _performance_log.clear()
-
-
-def find_element_fast(root_element, automation_id, found_index=0):
-    """
-    Fast element search using direct UIA API
-    10x faster than pywinauto's window() search
-    """
-    uia = comtypes.client.GetModule('UIAutomationCore.dll')
-    iuia = comtypes.client.CreateObject('{ff48dba4-60ef-4201-aa87-54103eef594e}', interface=IUIAutomation)
-    
-    condition = iuia.CreatePropertyCondition(30011, automation_id)  # AutomationId
-    
-    if found_index == 0:
-        # Just find first
-        element = root_element.FindFirst(TreeScope_Descendants, condition)
-        return UIAWrapper(UIAElementInfo(element)) if element else None
-    else:
-        # Find all and return specific index
-        elements_array = root_element.FindAll(TreeScope_Descendants, condition)
-        if found_index < elements_array.Length:
-            element = elements_array.GetElement(found_index)
-            return UIAWrapper(UIAElementInfo(element))
-        return None
-
-def find_element_by_title(root_element, title):
-    """Fast search by title/name"""
-    uia = comtypes.client.GetModule('UIAutomationCore.dll')
-    iuia = comtypes.client.CreateObject('{ff48dba4-60ef-4201-aa87-54103eef594e}', interface=IUIAutomation)
-    
-    condition = iuia.CreatePropertyCondition(30005, title)  # Name property
-    element = root_element.FindFirst(TreeScope_Descendants, condition)
-    return UIAWrapper(UIAElementInfo(element)) if element else None
+    # Build column-wise from the snapshot, skipping the first (row number) column
+    columns = {}
+    for i in range(1, len(headers)):
+        columns[i] = [row[i] if i < len(row) else None for row in data]
+    df = pd.DataFrame(columns)
+    df.columns = list(headers[1:])
+    return df
+
+
+# Controls re-used across rows (or across a row's steps): key, automation_id, parent key
+CACHED_CONTROLS = [
+    ("btnFluids0", None, None),
+    ("btnTripInAndOut", None, None),
+    ("txtAxialForceOnEndRIH", None, None),
+    ("txtAxialForceOnEndPOOH", None, None),
+    ("txtWellheadPressureRIH", None, None),
+    ("txtWellheadPressurePOOH", None, None),
+    ("WOB_RIH", "txtData", "txtAxialForceOnEndRIH"),
+    ("WOB_POOH", "txtData", "txtAxialForceOnEndPOOH"),
+    ("WHP_RIH", "txtData", "txtWellheadPressureRIH"),
+    ("WHP_POOH", "txtData", "txtWellheadPressurePOOH"),
+    ("frmOrpheusGraph", None, None),
+    ("cmbGraphType", None, "frmOrpheusGraph"),
+    ("menuOrpheusGraph", None, "frmOrpheusGraph"),
+]
 
 class Button_Repository:
     
-    def __init__(self):
+    def __init__(self, backend=None, scheduler=None, grid_mode="bulk", cancel_token=None):
+        # UI driver - live Orpheus through UIA unless a backend is supplied
+        self.backend = backend if backend is not None else UIABackend()
+        if tracer.enabled:
+            # Every backend call becomes a 'uia' span under the current step
+            self.backend = TracedBackend(self.backend, tracer)
+        # How Modeled_Data_df reads grdData: "bulk" (one cache request),
+        # "clipboard" (select all + copy) or "cells"
+        self.grid_mode = grid_mode
         # Connect once and reuse the app connection
-        self.app = Application(backend="uia").connect(auto_id="frmOrpheus")
         # Get root element for fast searches
-        self.root = self.app.top_window().element_info.element
+        self.root = self.backend.connect()
+
+        # Resolved handles for stable controls, validated before reuse
+        self.cache = ElementCache(self.backend)
+        for key, automation_id, parent in CACHED_CONTROLS:
+            self.cache.register(key, automation_id=automation_id, parent=parent)
+
+        # Window waits wake on UI events (learned polling if the backend has none)
+        self.scheduler = scheduler if scheduler is not None else get_wait_scheduler()
+        # A cancelled token interrupts any wait (see cancellation.py)
+        self.waiter = WindowWaiter(self.backend, scheduler=self.scheduler, cancel_token=cancel_token)
+
+    def close(self):
+        """Stop the waiter's event subscription and cancel callback (end of a sweep)"""
+        self.waiter.close()
+
+    def cached(self, key):
+        """Return a cached control handle, re-searching only if it went stale"""
+        return self.cache.resolve(self.root, key)
+
+    def wait_for_control(self, key, max_wait, transition):
+        """Wait until a cached control exists, refreshing root on each check"""
+        def check():
+            self.root = self.backend.top_window()
+            return self.cached(key)
+        return self.waiter.wait_until(check, max_wait, transition=transition)
 
     @timer
     def Window_Orpheus_Main(self):
         # Use FAST direct UIA search
-        Fluids_Expand = find_element_fast(self.root, "btnFluids0")
+        Fluids_Expand = self.cached("btnFluids0")
         self.Fluids_Expand = Fluids_Expand
         
-        self.Fluids_Expand_click = lambda: (Fluids_Expand.set_focus(), Fluids_Expand.click_input())
+        self.Fluids_Expand_click = lambda: self.backend.click_input(Fluids_Expand)
 
     @timer
     def Window_Fluids_Distribution(self):
         # Fast UIA searches
-        StringFluidEditor_RIH = find_element_fast(self.root, "cmdStringFluidEditor")
+        StringFluidEditor_RIH = self.backend.find_by_automation_id(self.root, "cmdStringFluidEditor")
         self.StringFluidEditor_RIH = StringFluidEditor_RIH
 
-        self.StringFluidEditor_RIH_click = lambda: (StringFluidEditor_RIH.set_focus(), StringFluidEditor_RIH.click_input())
+        self.StringFluidEditor_RIH_click = lambda: self.backend.click_input(StringFluidEditor_RIH)
 
         # Find frmFluids window first (fast), then search within it
-        frmFluids = find_element_fast(self.root, "frmFluids", found_index=0)
-        frmFluids_element = frmFluids.element_info.element
+        frmFluids = self.backend.find_by_automation_id(self.root, "frmFluids", index=0)
         
         # Search for TabControl within frmFluids
-        TabControl = find_element_fast(frmFluids_element, "TabControl1")
-        TabControl_element = TabControl.element_info.element
+        TabControl = self.backend.find_by_automation_id(frmFluids, "TabControl1")
         
         # Search for POOH tab within TabControl
-        POOH_Tab = find_element_by_title(TabControl_element, "POOH")
+        POOH_Tab = self.backend.find_by_name(TabControl, "POOH")
         self.POOH_Tab = POOH_Tab
-        self.POOH_Tab_click = lambda: (POOH_Tab.set_focus(), POOH_Tab.click_input())
+        self.POOH_Tab_click = lambda: self.backend.click_input(POOH_Tab)
 
         # Search for OK button within frmFluids
-        Fluids_OK = find_element_by_title(frmFluids_element, "OK")
+        Fluids_OK = self.backend.find_by_name(frmFluids, "OK")
         self.Fluids_OK = Fluids_OK
-        self.Fluids_OK_click = Fluids_OK.click
+        self.Fluids_OK_click = lambda: self.backend.click(Fluids_OK)
 
     @timer
     def StringFluidEditor_POOH(self):
         # Fast UIA search
-        StringFluidEditor_POOH_element = find_element_fast(self.root, "cmdStringFluidEditor2")
+        StringFluidEditor_POOH_element = self.backend.find_by_automation_id(self.root, "cmdStringFluidEditor2")
         self.StringFluidEditor_POOH_element = StringFluidEditor_POOH_element  # Renamed to avoid shadowing method
-        self.StringFluidEditor_POOH_click = lambda: (StringFluidEditor_POOH_element.set_focus(), StringFluidEditor_POOH_element.click_input())
+        self.StringFluidEditor_POOH_click = lambda: self.backend.click_input(StringFluidEditor_POOH_element)
 
     @timer
     def Window_Fluid_Editor(self, force_refresh=False):
         # Fast UIA searches
-        Edit_Density = find_element_fast(self.root, "txtDensity")
+        Edit_Density = self.backend.find_by_automation_id(self.root, "txtDensity")
         
         # Find the second frmFluids window (editor window)
-        frmFluids_editor = find_element_fast(self.root, "frmFluids", found_index=1)
+        frmFluids_editor = self.backend.find_by_automation_id(self.root, "frmFluids", index=1)
         
         if frmFluids_editor is None:
             raise Exception("Could not find fluid editor window (frmFluids index 1)")
         
-        frmFluids_editor_element = frmFluids_editor.element_info.element
-        
         # Find toolbar within the editor window - try automation_id first
-        ToolStrip = find_element_fast(frmFluids_editor_element, "ToolStrip1")
+        ToolStrip = self.backend.find_by_automation_id(frmFluids_editor, "ToolStrip1")
         
         if ToolStrip is None:
             raise Exception("Could not find ToolStrip1")
         
-        ToolStrip_element = ToolStrip.element_info.element
-        
         # Try to find Save/Exit by automation_id first (faster), fallback to title
-        Save_fluid = find_element_fast(ToolStrip_element, "tsbSave")
+        Save_fluid = self.backend.find_by_automation_id(ToolStrip, "tsbSave")
         if Save_fluid is None:
-            Save_fluid = find_element_by_title(ToolStrip_element, "Save")
+            Save_fluid = self.backend.find_by_name(ToolStrip, "Save")
         
-        Exit_fluid = find_element_fast(ToolStrip_element, "tsbExit") 
+        Exit_fluid = self.backend.find_by_automation_id(ToolStrip, "tsbExit") 
         if Exit_fluid is None:
-            Exit_fluid = find_element_by_title(ToolStrip_element, "Exit")
+            Exit_fluid = self.backend.find_by_name(ToolStrip, "Exit")
 
         # Store the UI elements in self (without executing actions)
         self.Edit_Density = Edit_Density
@@ -175,104 +258,88 @@ class Button_Repository:
         self.Exit_fluid_element = Exit_fluid
         
         # Store callable methods with the action already bound
-        self.Edit_Density_set_text = Edit_Density.set_text
-        self.Save_fluid = Save_fluid.click  # Now repo.Save_fluid() will call .click()
-        self.Exit_fluid = Exit_fluid.click  # Now repo.Exit_fluid() will call .click()
+        self.Edit_Density_set_text = lambda value: self.backend.set_text(Edit_Density, value)
+        self.Save_fluid = lambda: self.backend.click(Save_fluid)  # Now repo.Save_fluid() will click Save
+        self.Exit_fluid = lambda: self.backend.click(Exit_fluid)  # Now repo.Exit_fluid() will click Exit
 
+    @timer
     def Input_WOB_RIH_POOH_WHP(self, RIH_wob_value, POOH_wob_value, WHP_value):
         """Set WOB and ROP values in the ROH tab"""
-        # Fast UIA searches - find the panes first
-        WOB_RIH_Pane = find_element_fast(self.root, "txtAxialForceOnEndRIH")
-        WOB_POOH_Pane = find_element_fast(self.root, "txtAxialForceOnEndPOOH")
-        WHP_POOH = find_element_fast(self.root, "txtWellheadPressurePOOH")
-        WHP_RIH = find_element_fast(self.root, "txtWellheadPressureRIH")
-        
-        # Then find txtData within each pane
-        WOB_RIH = find_element_fast(WOB_RIH_Pane.element_info.element, "txtData")
-        WOB_POOH = find_element_fast(WOB_POOH_Pane.element_info.element, "txtData")
-        WHP_POOH = find_element_fast(WHP_POOH.element_info.element, "txtData")
-        WHP_RIH = find_element_fast(WHP_RIH.element_info.element, "txtData")
+        # txtData edits inside each pane - cached, so only the first row searches
+        WOB_RIH = self.cached("WOB_RIH")
+        WOB_POOH = self.cached("WOB_POOH")
+        WHP_POOH = self.cached("WHP_POOH")
+        WHP_RIH = self.cached("WHP_RIH")
 
         # Set values
-        WOB_RIH.set_text(str(RIH_wob_value))
-        WOB_POOH.set_text(str(POOH_wob_value))
-        WHP_POOH.set_text(str(WHP_value))
-        WHP_RIH.set_text(str(WHP_value))
+        self.backend.set_text(WOB_RIH, str(RIH_wob_value))
+        self.backend.set_text(WOB_POOH, str(POOH_wob_value))
+        self.backend.set_text(WHP_POOH, str(WHP_value))
+        self.backend.set_text(WHP_RIH, str(WHP_value))
 
     @timer
     def Trip_in_Out_Buttons(self):
         """Find and return Trip In and Trip Out button"""
         # Refresh root in case UI state changed
-        self.root = self.app.top_window().element_info.element
+        self.root = self.backend.top_window()
 
         
 
         
-        Trip_In_Out = find_element_fast(self.root, "btnTripInAndOut")
+        Trip_In_Out = self.cached("btnTripInAndOut")
         if Trip_In_Out is None:
             raise Exception("Could not find btnTripInAndOut - UI may not be in correct state")
         
         self.Trip_In_Out = Trip_In_Out
 
-        Trip_In_Out.set_focus()
-        Trip_In_Out.click_input()
+        self.backend.click_input(Trip_In_Out)
 
-        # Wait for frmOrpheusGraph window to appear - optimized polling
-        max_wait = 10  # Maximum seconds to wait
-        start_time = time.time()
-        poll_interval = 0.05  # Check every 50ms instead of 200ms
-        
-        while time.time() - start_time < max_wait:
+        # Wait for frmOrpheusGraph window to appear - woken by window events
+        max_wait = 10  # Until learned; then each wait uses the transition's p99
+        max_errors = 3  # Hydraulic error boxes to dismiss before giving up
+        transition = "trip_in_out"
+
+        def graph_or_error():
             # Refresh root to catch new windows
-            self.root = self.app.top_window().element_info.element
+            self.root = self.backend.top_window()
             
             # Check for error window first (higher priority)
-            Error_Window = find_element_fast(self.root, "CTESMessageBox")
-            if Error_Window is not None:
-                self.Bypass_Hydraulic_Error()
-                continue  # Keep waiting for graph window after handling error
+            if self.backend.find_by_automation_id(self.root, "CTESMessageBox") is not None:
+                return "error"
             
             # Check for graph window
-            graph_window = find_element_fast(self.root, "frmOrpheusGraph")
-            if graph_window is not None:
-                break
-            
-            time.sleep(poll_interval)
+            if self.cached("frmOrpheusGraph") is not None:
+                return "graph"
+            return None
+        
+        for attempt in range(max_errors + 1):
+            state = self.waiter.wait_until(graph_or_error, max_wait, transition=transition)
+            if state == "error" and attempt < max_errors:
+                self.Bypass_Hydraulic_Error()
+                transition = "hydraulic_error_to_graph"
+                continue  # Keep waiting for graph window after handling error
+            break
 
     @timer
     def Drop_Down_Streatcher(self):
         """Find and click the Drop Down Stretcher button"""
         # Graph window should already exist from Trip_in_Out_Buttons
         # Try direct search first before polling
-        Drop_Down_Stretcher = find_element_fast(self.root, "cmbGraphType")
+        Drop_Down_Stretcher = self.cached("cmbGraphType")
         
-        # If not found immediately, poll with short timeout
+        # If not found immediately, wait with short timeout
         if Drop_Down_Stretcher is None:
             max_wait = 2  # Very short timeout since window should exist
-            start_time = time.time()
-            poll_interval = 0.05
-            
-            while time.time() - start_time < max_wait:
-                self.root = self.app.top_window().element_info.element
-                graph_window = find_element_fast(self.root, "frmOrpheusGraph")
-                if graph_window is not None:
-                    Drop_Down_Stretcher = find_element_fast(self.root, "cmbGraphType")
-                    if Drop_Down_Stretcher is not None:
-                        break
-                time.sleep(poll_interval)
+            Drop_Down_Stretcher = self.wait_for_control("cmbGraphType", max_wait, "graph_type_ready")
         
         if Drop_Down_Stretcher is None:
             raise Exception("Could not find cmbGraphType dropdown - UI may not be in correct state")
         
-        Drop_Down_Stretcher = find_element_fast(self.root, "cmbGraphType")
-        if Drop_Down_Stretcher is None:
-            raise Exception("Could not find cmbGraphType dropdown - UI may not be in correct state")
-        
         self.Drop_Down_Stretcher = Drop_Down_Stretcher
         
         # Try select, but catch errors if it works visually but throws exception
         try:
-            Drop_Down_Stretcher.select(2)
+            self.backend.select(Drop_Down_Stretcher, 2)
         except Exception as e:
             # If select worked but threw an error, just warn and continue
             print(f"Warning: Dropdown select had issue but may have succeeded: {e}")
@@ -283,119 +350,109 @@ class Button_Repository:
         # Don't refresh root unnecessarily - reuse cached root
         # self.root is already current from previous methods
         
-        menu = find_element_fast(self.root, "menuOrpheusGraph")
-        
-        menu_element = menu.element_info.element
+        menu = self.cached("menuOrpheusGraph")
 
         # Try to find by automation_id first (faster), fallback to title
 
-        data = find_element_by_title(self.root, "Data")
+        data = self.backend.find_by_name(self.root, "Data")
         
 
-        Modeled_Data = find_element_by_title(menu_element, "Modeled Data...")
+        Modeled_Data = self.backend.find_by_name(menu, "Modeled Data...")
 
         self.data = data
         self.Modeled_Data = Modeled_Data
 
-        data.set_focus()
-        data.expand()
-        Modeled_Data.click_input() 
+        self.backend.expand(data)
+        self.backend.click_input(Modeled_Data, focus=False)
 
     def Modeled_Data_df(self):
         """Extract grid data and return as pandas DataFrame"""
-        import pandas as pd
-        
-        # Refresh root to ensure we have current window
-        self.root = self.app.top_window().element_info.element
-        
-        # Find the grid element
-        menu = find_element_fast(self.root, "frmOrpheusGraph")
-        menu_element = menu.element_info.element
-        grid = find_element_fast(menu_element, "grdData")
-        self.grid = grid
-        
-        # Get all text from the grid
-        grid_text = grid.texts()
-        
-        # Try to get rows - grid might have children that are rows
-
-        # Access grid's children (rows)
-        rows = grid.children()
-        data = []
-        headers = []
-        
-        for i, row in enumerate(rows):
-            row_data = []
-            cells = row.children()  # Get cells in the row
-            for cell in cells:
-                # Try to get actual value instead of title
+        start = time.perf_counter_ns()
+        with search_counters.step("Modeled_Data_df"):
+            # Refresh root to ensure we have current window
+            self.root = self.backend.top_window()
+        
+            # Find the grid element
+            menu = self.cached("frmOrpheusGraph")
+            grid = self.backend.find_by_automation_id(menu, "grdData")
+            self.grid = grid
+        
+            df = None
+            if self.grid_mode == "clipboard":
                 try:
-                    # Try Value pattern first
-                    if hasattr(cell, 'iface_value') and cell.iface_value:
-                        cell_text = cell.get_value()
-                    else:
-                        # Fall back to legacy value
-                        cell_text = cell.legacy_properties().get('Value', cell.window_text())
-                except:
-                    # Last resort - use window text
-                    cell_text = cell.window_text()
-                row_data.append(cell_text)
-            
-            # Check if this row looks like a header (contains text like "Tubing Depth" or has \r in it)
-            is_header = any('Tubing Depth' in str(cell) or 'Stretch' in str(cell) or '\r(' in str(cell) for cell in row_data)
-            
-            if is_header:
-                headers = row_data  # This is a header row
-                # Don't add it to data
-            else:
-                # Only add non-header rows to data
-                if headers:  # Only add data if we've found headers
-                    data.append(row_data)
-        
-        # If no headers detected, use first row as headers
-        if not headers and data:
-            headers = data[0]
-            data = data[1:]
-        
-        # Create DataFrame and drop first column (the first column after dropping the row number)
-        df = pd.DataFrame(data, columns=headers)
-        df = df.iloc[:, 1:]  # Drop first column
+                    df = self.read_grid_clipboard(grid)
+                    if df is None:
+                        print("Warning: clipboard copy had no header row, reading through UIA")
+                except Exception as e:
+                    print(f"Warning: clipboard grid capture failed, reading through UIA: {e}")
+            if df is None:
+                # Read every row of the grid (rows of cell strings)
+                rows = self.read_grid_rows(grid)
+                df = grid_rows_to_df(rows)
+
+        # Timed per mode so clipboard and UIA capture can be compared in the log
+        log_step(f"Modeled_Data_df[{self.grid_mode}]", start)
         return df
+
+    def read_grid_clipboard(self, grid, max_wait=2):
+        """Copy the whole grid to the clipboard and parse it; the user's clipboard text is restored"""
+        clipboard = self.backend.clipboard()
+        if clipboard is None:
+            raise Exception("Backend has no clipboard for grid capture")
+
+        saved = clipboard.get_text()
+        sequence = clipboard.sequence()
+        self.backend.copy_grid(grid)
+        try:
+            copied = self.waiter.wait_until(lambda: clipboard.sequence() != sequence, max_wait, poll_interval=0.01)
+            if not copied:
+                raise Exception("Grid copy did not reach the clipboard")
+            return parse_grid_clipboard(clipboard.get_text())
+        finally:
+            if saved:
+                clipboard.set_text(saved)
+
+    def read_grid_rows(self, grid):
+        """Read the grid in one bulk request, falling back to per-cell reads"""
+        if self.grid_mode in ("bulk", "clipboard"):
+            try:
+                rows = self.backend.read_grid_bulk(grid)
+                if rows is not None:
+                    return rows
+            except Exception as e:
+                print(f"Warning: bulk grid read failed, reading cell by cell: {e}")
+        return self.backend.read_grid(grid)
         
     @timer
     def OK_Button(self):
         """Find and click the OK button"""
         # Wait for frmOrpheusGraph to be ready
         max_wait = 5  # Reduced from 10
-        start_time = time.time()
-        poll_interval = 0.05  # Check every 50ms
-        graph_window = None
-        
-        while time.time() - start_time < max_wait:
-            self.root = self.app.top_window().element_info.element
-            graph_window = find_element_fast(self.root, "frmOrpheusGraph")
-            if graph_window is not None:
-                break
-            time.sleep(poll_interval)
+        graph_window = self.wait_for_control("frmOrpheusGraph", max_wait, "ok_button_ready")
         
         if graph_window is None:
             raise Exception("frmOrpheusGraph window not ready for OK button")
         
-        OK_Button_element = find_element_fast(self.root, "btnOK")
+        OK_Button_element = self.backend.find_by_automation_id(self.root, "btnOK")
         self.OK_Button_element = OK_Button_element  # Renamed to avoid shadowing the method
-        OK_Button_element.click()
+        self.backend.click(OK_Button_element)
         
+    @timer
     def Bypass_Hydraulic_Error(self):
         """Find and click the No button"""
         # Refresh root in case UI state changed
-        self.root = self.app.top_window().element_info.element
-        No_button_element = find_element_fast(self.root, "btnNo")
+        self.root = self.backend.top_window()
+        No_button_element = self.backend.find_by_automation_id(self.root, "btnNo")
         self.No_button_element = No_button_element  
-        No_button_element.click()
-        time.sleep(0.2)  # Wait a moment for OK button to appear
-        Ok_button_element = find_element_fast(self.root, "btnOK")
+        self.backend.click(No_button_element)
+        # Wait for the OK button to appear (wakes on the message box opening)
+        Ok_button_element = self.waiter.wait_until(
+            lambda: self.backend.find_by_automation_id(self.backend.top_window(), "btnOK"), 2,
+            transition="hydraulic_error_ok")
+        if Ok_button_element is None:
+            raise Exception("Could not find btnOK after dismissing hydraulic error")
         self.OK_Button_element = Ok_button_element  
-        Ok_button_element.click()
+        self.backend.click(Ok_button_element)
 
 class Cerbers_functions:
     """High-level automation workflows using Button_Repository"""
@@ -404,6 +461,7 @@ class Cerbers_functions:
         # Use provided Button_Repository or create new one
         self.repo = button_repo if button_repo is not None else Button_Repository()
     
+    @timer
     def New_Fluid_Density(self, value):
         """Complete workflow to set new fluid density for both RIH and POOH"""
         self.repo.Window_Orpheus_Main()
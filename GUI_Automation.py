@@ -1,11 +1,17 @@
 import tkinter as tk
-from tkinter import ttk, messagebox, scrolledtext
+from tkinter import ttk, messagebox
 import pandas as pd
 import time
-import threading
-import ctypes
 from Automation import run_automation_for_inputs
+from result_sinks import MemorySink
+from checkpoint import CheckpointJournal, journal_path_for
+from result_cache import ResultCache
 from version import VERSION
+from automation_worker import AutomationWorker, FRAME_INTERVAL_MS
+from cancellation import CancellationService, KeyboardHookTrigger
+from results_view import ResultsView
+from input_parser import parse_input_text, parse_input_file
+from perf_store import start_run
 
 class AutomationGUI:
     def __init__(self, root):
@@ -16,46 +22,25 @@ class AutomationGUI:
         # Data storage
         self.input_rows = []
         self.output_df = None
-        self.stop_automation = False
+        self.result_sink = None  # Receives rows while automation runs
+        self.journal = None
+        self.run_rows = 0
+        self.rows_shown = 0
+        self.stopping = False
         self.automation_start_time = None
-        self.keyboard_listener_active = False
+        # Sweeps run on the worker thread; the GUI only drains its messages
+        self.worker = AutomationWorker()
+        # ESC anywhere stops a run (hook armed only while running); the Stop button cancels the same token
+        self.cancellation = CancellationService([KeyboardHookTrigger()], token=self.worker.token)
         
         # Bind ESC key to stop automation
         self.root.bind('<Escape>', self.stop_automation_handler)
         
-        # Start keyboard monitoring thread
-        self.start_keyboard_monitor()
-        
         # Create main frames
         self.create_input_frame()
         self.create_control_frame()
         self.create_output_frame()
     
-    def start_keyboard_monitor(self):
-        """Start a background thread to monitor ESC key using Windows API"""
-        def monitor_keyboard():
-            # Windows Virtual Key code for ESC
-            VK_ESCAPE = 0x1B
-            
-            while True:
-                if self.keyboard_listener_active:
-                    try:
-                        # GetAsyncKeyState returns the state of a key
-                        # High bit (0x8000) indicates key is currently pressed
-                        if ctypes.windll.user32.GetAsyncKeyState(VK_ESCAPE) & 0x8000:
-                            if not self.stop_automation:  # Only trigger once
-                                self.stop_automation = True
-                                self.root.after(0, lambda: self.status_label.configure(
-                                    text="Stopping automation...", foreground="red"))
-                            time.sleep(0.5)  # Debounce to avoid multiple triggers
-                    except:
-                        pass
-                time.sleep(0.1)
-        
-        # Start the monitoring thread as daemon so it exits when app closes
-        monitor_thread = threading.Thread(target=monitor_keyboard, daemon=True)
-        monitor_thread.start()
-        
     def create_input_frame(self):
         """Create the input data entry frame"""
         input_frame = ttk.LabelFrame(self.root, text="Input Parameters", padding=10)
@@ -84,6 +69,7 @@ class AutomationGUI:
         ttk.Button(button_frame, text="Remove Selected", command=self.remove_row).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="Clear All", command=self.clear_all).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="Paste from Clipboard", command=self.paste_from_clipboard).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Load File...", command=self.load_input_file).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="Load Sample Data", command=self.load_sample_data).pack(side=tk.LEFT, padx=5)
         
     def create_control_frame(self):
@@ -106,6 +92,13 @@ class AutomationGUI:
         self.runtime_label = ttk.Label(control_frame, text="Runtime: 0:00", foreground="blue")
         self.runtime_label.pack(side=tk.LEFT, padx=10)
         
+        # Serve rows computed in earlier sweeps of the same well (and model revision)
+        self.use_cache = tk.BooleanVar(value=False)
+        ttk.Checkbutton(control_frame, text="Reuse cached results", variable=self.use_cache).pack(side=tk.LEFT, padx=5)
+        ttk.Label(control_frame, text="Model rev:").pack(side=tk.LEFT)
+        self.model_revision = tk.StringVar(value="")
+        ttk.Entry(control_frame, textvariable=self.model_revision, width=8).pack(side=tk.LEFT, padx=5)
+        
         ttk.Button(control_frame, text="Copy Results to Clipboard", command=self.copy_results).pack(side=tk.RIGHT, padx=5)
         ttk.Button(control_frame, text="Export to CSV", command=self.export_csv).pack(side=tk.RIGHT, padx=5)
         
@@ -114,14 +107,9 @@ class AutomationGUI:
         output_frame = ttk.LabelFrame(self.root, text="Output Results", padding=10)
         output_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
         
-        # Text widget for displaying results
-        self.output_text = scrolledtext.ScrolledText(output_frame, wrap=tk.NONE, height=15)
-        self.output_text.pack(fill=tk.BOTH, expand=True)
-        
-        # Horizontal scrollbar
-        h_scroll = ttk.Scrollbar(output_frame, orient=tk.HORIZONTAL, command=self.output_text.xview)
-        self.output_text.configure(xscrollcommand=h_scroll.set)
-        h_scroll.pack(fill=tk.X)
+        # Table that only draws the visible rows - sortable by column heading, filterable
+        self.results_view = ResultsView(output_frame)
+        self.results_view.pack(fill=tk.BOTH, expand=True)
     
     def remove_row(self):
         """Remove selected row from input table"""
@@ -137,53 +125,40 @@ class AutomationGUI:
             self.input_tree.delete(item)
     
     def paste_from_clipboard(self):
-        """Paste tab-delimited data from clipboard"""
+        """Paste rows copied from Excel (or any delimited text) into the input table"""
         try:
-            # Get clipboard content
             clipboard_data = self.root.clipboard_get()
-            
-            # Split by lines
-            lines = clipboard_data.strip().split('\n')
-            
-            rows_added = 0
-            for line in lines:
-                # Skip empty lines
-                if not line.strip():
-                    continue
-                
-                # Split by tab or multiple spaces
-                parts = line.split('\t') if '\t' in line else line.split()
-                
-                # Skip header row if it contains text
-                if any(not part.replace('-', '').replace('.', '').replace(',', '').isdigit() for part in parts[:4]):
-                    continue
-                
-                # Parse the values
-                if len(parts) >= 4:
-                    try:
-                        density = float(parts[0].replace(',', ''))
-                        rih_wob = float(parts[1].replace(',', ''))
-                        pooh_wob = float(parts[2].replace(',', ''))
-                        whp = float(parts[3].replace(',', ''))
-                        
-                        self.input_tree.insert("", tk.END, values=(density, rih_wob, pooh_wob, whp))
-                        rows_added += 1
-                    except ValueError:
-                        continue
-            
-            # Silently succeed or show warning only if no data found
-            if rows_added == 0:
-                messagebox.showwarning("No Data", "No valid rows found in clipboard data.")
-                
         except tk.TclError:
             messagebox.showerror("Error", "Clipboard is empty or contains invalid data.")
+            return
+        try:
+            self.load_parsed_input(parse_input_text(clipboard_data))
         except Exception as e:
             messagebox.showerror("Error", f"Failed to paste data:\n{str(e)}")
-                
-        except tk.TclError:
-            messagebox.showerror("Error", "Clipboard is empty or contains invalid data.")
+    
+    def load_input_file(self):
+        """Append the rows of a CSV/TSV/text or Parquet file to the input table"""
+        from tkinter import filedialog
+        filename = filedialog.askopenfilename(
+            filetypes=[("Input tables", "*.csv *.tsv *.txt *.parquet"), ("All files", "*.*")]
+        )
+        if not filename:
+            return
+        try:
+            self.load_parsed_input(parse_input_file(filename))
         except Exception as e:
-            messagebox.showerror("Error", f"Failed to paste data:\n{str(e)}")
+            messagebox.showerror("Error", f"Failed to load {filename}:\n{str(e)}")
+    
+    def load_parsed_input(self, parsed):
+        """Add parsed rows to the input table and report rejected lines"""
+        if len(parsed) == 0 and not parsed.rejected:
+            messagebox.showwarning("No Data", "No valid rows found in clipboard data.")
+            return
+        # One pass of inserts, no redraw until the table is back in the event loop
+        for values in parsed.frame.itertuples(index=False):
+            self.input_tree.insert("", tk.END, values=tuple(values))
+        if parsed.rejected:
+            messagebox.showwarning("Rows Skipped", parsed.describe())
     
     def load_sample_data(self):
         """Load sample data into the table"""
@@ -198,7 +173,10 @@ class AutomationGUI:
     
     def stop_automation_handler(self, event=None):
         """Handle ESC key press to stop automation"""
-        self.stop_automation = True
+        if not self.worker.running:
+            return
+        self.worker.stop()
+        self.stopping = True
         self.status_label.configure(text="Stopping automation...", foreground="red")
     
     def update_runtime(self):
@@ -208,12 +186,19 @@ class AutomationGUI:
             minutes = int(elapsed // 60)
             seconds = int(elapsed % 60)
             self.runtime_label.configure(text=f"Runtime: {minutes}:{seconds:02d}")
-            self.root.update()
     
     def update_progress(self, current, total):
         """Update the progress label"""
         self.progress_label.configure(text=f"Row: {current}/{total}")
-        self.root.update()
+    
+    def show_partial_results(self, frames):
+        """Append the results of rows extracted since the last frame"""
+        if self.rows_shown == 0:
+            self.results_view.clear()
+        for frame in frames:
+            self.results_view.append(frame)
+            self.rows_shown += 1
+        self.results_view.refresh()
     
     def run_automation(self):
         """Run the automation for all input rows"""
@@ -232,10 +217,19 @@ class AutomationGUI:
             messagebox.showwarning("No Data", "Please add at least one row of input data.")
             return
         
-        # Reset stop flag and start timer
-        self.stop_automation = False
+        # Offer to resume if this table was interrupted before
+        journal = CheckpointJournal(journal_path_for(rows))
+        if len(journal) > 0:
+            done = sum(1 for row in rows if journal.completed(row))
+            if not messagebox.askyesno("Resume Sweep",
+                                       f"{done} of {len(rows)} rows of this table were completed in an earlier run.\n"
+                                       "Resume from the first incomplete row?\n\n(No starts over.)"):
+                journal.discard()
+        
+        # Start timer
         self.automation_start_time = time.time()
-        self.keyboard_listener_active = True  # Enable keyboard monitoring
+        start_run()
+        self.cancellation.arm()
         
         # Disable run button, enable stop button
         self.run_button.configure(state=tk.DISABLED)
@@ -244,38 +238,79 @@ class AutomationGUI:
         self.progress_label.configure(text="")
         self.update_runtime()
         
+        # Run on the worker thread - rows stream into the sink, progress comes back as messages
+        self.result_sink = MemorySink()
+        self.journal = journal
+        self.run_rows = len(rows)
+        self.rows_shown = 0
+        self.stopping = False
+        result_cache = ResultCache() if self.use_cache.get() else None
+        self.worker.start(run_automation_for_inputs, rows, sink=self.result_sink, checkpoint=journal,
+                          result_cache=result_cache, model_revision=self.model_revision.get(),
+                          cancel_token=self.worker.token)
+        self.root.after(FRAME_INTERVAL_MS, self.poll_worker)
+    
+    def poll_worker(self):
+        """Apply the worker's messages to the window, once per frame"""
+        frames = []
+        outcome = None
+        for message in self.worker.drain():
+            if message[0] == 'progress':
+                self.update_progress(message[1], message[2])
+            elif message[0] == 'rows':
+                frames.append(message[1])
+            else:
+                outcome = message
+        if frames:
+            self.show_partial_results(frames)
+        self.update_runtime()
+        if outcome is None and self.worker.token.cancelled and not self.stopping:
+            # Cancelled off the GUI thread (e.g. the ESC hook)
+            self.stopping = True
+            self.status_label.configure(text="Stopping automation...", foreground="red")
+        
+        if outcome is None:
+            self.root.after(FRAME_INTERVAL_MS, self.poll_worker)
+        elif outcome[0] == 'done':
+            self.finish_automation(outcome[1])
+        else:
+            self.finish_automation(None, outcome[1])
+    
+    def finish_automation(self, output_df, error=None):
+        """Show the outcome of a finished (or stopped, or failed) run"""
         try:
-            # Call the automation function from Autoamtion.py
-            self.output_df = run_automation_for_inputs(rows, self)
-            
-            # Final runtime update
-            self.update_runtime()
-            
-            if self.stop_automation:
+            if error is not None:
+                # Rows finished before the error are still available to copy/export
+                self.output_df = self.result_sink.result() if self.result_sink else None
+                messagebox.showerror("Automation Error", f"An error occurred:\n{error}")
+                self.status_label.configure(text="Failed - See error", foreground="red")
+            elif self.worker.token.cancelled:
+                self.output_df = output_df
                 self.status_label.configure(text="Automation stopped by user", foreground="red")
-            elif self.output_df is not None:
-                # Display results
-                self.output_text.delete(1.0, tk.END)
-                self.output_text.insert(tk.END, self.output_df.to_string(index=False))
+            elif output_df is not None:
+                self.output_df = output_df
+                # Whole table done - nothing left to resume
+                self.journal.discard()
+                
+                # Every row was streamed into the view - only reload if something was missed
+                if len(self.results_view.results) != len(self.output_df):
+                    self.results_view.load(self.output_df)
                 
                 elapsed = time.time() - self.automation_start_time
                 minutes = int(elapsed // 60)
                 seconds = int(elapsed % 60)
-                self.status_label.configure(text=f"Completed! Processed {len(rows)} rows in {minutes}:{seconds:02d}", foreground="green")
+                self.status_label.configure(text=f"Completed! Processed {self.run_rows} rows in {minutes}:{seconds:02d}", foreground="green")
             else:
                 messagebox.showerror("Error", "No results were generated.")
                 self.status_label.configure(text="Failed - No results", foreground="red")
-                
-        except Exception as e:
-            messagebox.showerror("Automation Error", f"An error occurred:\n{str(e)}")
-            self.status_label.configure(text="Failed - See error", foreground="red")
-        
         finally:
             # Re-enable run button, disable stop button, reset timer
-            self.keyboard_listener_active = False  # Disable keyboard monitoring
+            self.cancellation.disarm()
             self.run_button.configure(state=tk.NORMAL)
             self.stop_button.configure(state=tk.DISABLED)
             self.automation_start_time = None
+            self.result_sink = None
+            self.journal = None
     
     def copy_results(self):
         """Copy results to clipboard in tab-delimited format (Excel-ready)"""
@@ -0,0 +1,187 @@
+"""
+Driver for Orpheus' Sensitivity Analysis Wizard
+
+Instead of one Trip In and Out run per input row, the wizard's Parameter
+Matrix Wizard is given every value of each parameter at once, Orpheus
+calculates the complete combination in a single run, and all cases are read
+back from grdSensitivityData in one grid read.
+
+The sensitivity setting must list the parameters in SENSITIVITY_PARAMETERS
+(save it as a template once). Stretch at the tool is reported for each BHA
+depth, so BHA Depth takes the tubing depths of the Modeled Data grid.
+"""
+import time
+import numpy as np
+from Button_Repository2 import Button_Repository, timer, log_step, grid_rows_to_df
+from search_counters import search_counters
+
+
+# Parameter columns of the matrix wizard, and the input-row key each one comes from
+SENSITIVITY_PARAMETERS = [
+    ('BHA Depth\n(ft)', None),
+    ('Pipe Fluid Density\n(lb/gal)', 'Density_value'),
+    ('Force on End - RIH\n(lbf)', 'RIH_wob_value'),
+    ('Force on End - POOH\n(lbf)', 'POOH_wob_value'),
+    ('Wellhead Pressure\n(psi)', 'WHP_value'),
+]
+# Output check boxes on the Outputs tab, and the result column each one adds.
+# Placeholders, not yet checked against the live wizard (the simulator mirrors
+# them) - confirm the names and compare a run with the Modeled Data table first.
+SENSITIVITY_OUTPUTS = [
+    ('Stretch at end during RIH', 'RIH Stretch\n(in)'),
+    ('Stretch at end during POOH', 'POOH Stretch\n(in)'),
+]
+
+
+def format_value(value):
+    """Parameter value as typed into the value editor"""
+    return f"{float(value):.10g}"
+
+
+def series_step(values):
+    """Step of an evenly spaced list of 3+ values, or None"""
+    if len(values) < 3:
+        return None
+    steps = np.diff(values)
+    if np.allclose(steps, steps[0], rtol=1e-9, atol=1e-9) and steps[0] > 0:
+        return float(steps[0])
+    return None
+
+
+class Sensitivity_Repository(Button_Repository):
+    """Sensitivity Analysis Wizard controls, on the same backend/cache/waits as Button_Repository"""
+
+    def find_window(self, automation_id):
+        return self.backend.find_by_automation_id(self.backend.top_window(), automation_id)
+
+    def wait_for_window(self, automation_id, max_wait, transition):
+        window = self.waiter.wait_until(lambda: self.find_window(automation_id), max_wait, transition=transition)
+        if window is None:
+            raise Exception(f"{automation_id} did not open")
+        return window
+
+    def wait_for_close(self, automation_id, max_wait=5):
+        if not self.waiter.wait_until(lambda: self.find_window(automation_id) is None, max_wait):
+            raise Exception(f"{automation_id} did not close")
+
+    @timer
+    def Open_Sensitivity_Wizard(self):
+        """Tools > Sensitivity Analysis... in the main window"""
+        self.root = self.backend.top_window()
+        menu = self.backend.find_by_automation_id(self.root, "MenuStrip1")
+        tools = self.backend.find_by_name(menu, "Tools")
+        self.backend.expand(tools)
+        Sensitivity_Analysis = self.backend.find_by_name(menu, "Sensitivity Analysis...")
+        if Sensitivity_Analysis is None:
+            raise Exception("Could not find Tools > Sensitivity Analysis...")
+        self.backend.click_input(Sensitivity_Analysis, focus=False)
+        self.wizard = self.wait_for_window("frmOrphSensitivity", 10, "sensitivity_wizard_open")
+
+    @timer
+    def Select_Stretch_Outputs(self):
+        """Tick the stretch outputs on the Outputs tab"""
+        outputs_tab = self.backend.find_by_name(self.backend.find_by_automation_id(self.wizard, "tabSettings"), "Outputs")
+        if outputs_tab is not None:
+            self.backend.click_input(outputs_tab)
+        for text, _ in SENSITIVITY_OUTPUTS:
+            check_box = self.backend.find_by_name(self.wizard, text)
+            if check_box is None:
+                raise Exception(f"Could not find the '{text}' output - check SENSITIVITY_OUTPUTS")
+            self.backend.set_checked(check_box, True)
+
+    @timer
+    def Open_Matrix_Wizard(self):
+        """Parameter Matrix Wizard... button"""
+        Matrix = self.backend.find_by_automation_id(self.wizard, "cmdMatrix")
+        self.backend.click(Matrix)
+        self.matrix = self.wait_for_window("frmSensitivityMatrix", 5, "matrix_wizard_open")
+
+    @timer
+    def Set_Parameter_Values(self, title, values):
+        """Replace the value list of one parameter column"""
+        grid = self.backend.find_by_automation_id(self.matrix, "grdVal")
+        column = self.backend.find_by_name(grid, title)
+        if column is None:
+            raise Exception(f"Parameter '{title}' is not in the sensitivity setting")
+        self.backend.click_input(column)
+        editor = self.wait_for_window("frmParameterValueEditor", 5, "value_editor_open")
+
+        value_list = self.backend.find_by_automation_id(editor, "lstValues")
+        delete = self.backend.find_by_automation_id(editor, "cmdDelete")
+        for item in self.backend.children(value_list):
+            self.backend.click_input(item)
+            self.backend.click(delete)
+
+        step = series_step(values)
+        if step is not None:
+            # Evenly spaced - one "add a series" instead of one add per value
+            for automation_id, value in (("txtMin", values[0]), ("txtMax", values[-1]), ("txtStep", step)):
+                self.backend.set_text(self.backend.find_by_automation_id(editor, automation_id), format_value(value))
+            self.backend.click(self.backend.find_by_automation_id(editor, "cmdAdds"))
+        else:
+            value_box = self.backend.find_by_automation_id(editor, "txtVal")
+            add = self.backend.find_by_automation_id(editor, "cmdAdd")
+            for value in values:
+                self.backend.set_text(value_box, format_value(value))
+                self.backend.click(add)
+
+        self.backend.click(self.backend.find_by_automation_id(editor, "cmdOK"))
+        self.wait_for_close("frmParameterValueEditor")
+
+    @timer
+    def Apply_Matrix(self):
+        """OK in the matrix wizard - fills the analysis grid with every combination"""
+        self.backend.click(self.backend.find_by_automation_id(self.matrix, "cmdOK"))
+        self.wait_for_close("frmSensitivityMatrix")
+
+    @timer
+    def Calculate(self, max_wait=300):
+        """Calculate button; waits for the result columns to appear"""
+        self.backend.click(self.backend.find_by_automation_id(self.wizard, "cmdCalc"))
+        result_column = SENSITIVITY_OUTPUTS[0][1]
+
+        def calculated():
+            grid = self.backend.find_by_automation_id(self.wizard, "grdSensitivityData")
+            return self.backend.find_by_name(grid, result_column)
+
+        if self.waiter.wait_until(calculated, max_wait, transition="sensitivity_calculate") is None:
+            raise Exception("Sensitivity calculation did not finish")
+
+    def Sensitivity_Data_df(self):
+        """Every case of grdSensitivityData as a DataFrame (without the # column)"""
+        start = time.perf_counter_ns()
+        with search_counters.step("Sensitivity_Data_df"):
+            grid = self.backend.find_by_automation_id(self.wizard, "grdSensitivityData")
+            df = grid_rows_to_df(self.read_grid_rows(grid))
+        log_step(f"Sensitivity_Data_df[{self.grid_mode}]", start)
+        return df
+
+    @timer
+    def Close_Wizard(self):
+        self.backend.click(self.backend.find_by_automation_id(self.wizard, "cmdExit"))
+        self.wait_for_close("frmOrphSensitivity")
+
+
+class Sensitivity_functions:
+    """High-level Sensitivity Analysis Wizard workflow"""
+
+    def __init__(self, sensitivity_repo=None):
+        self.repo = sensitivity_repo if sensitivity_repo is not None else Sensitivity_Repository()
+
+    def Run_Matrix(self, parameter_values):
+        """
+        Set each parameter's value list, calculate the complete combination
+        and return all cases as a DataFrame. parameter_values maps
+        SENSITIVITY_PARAMETERS titles to sorted value lists.
+        """
+        self.repo.Open_Sensitivity_Wizard()
+        try:
+            self.repo.Select_Stretch_Outputs()
+            self.repo.Open_Matrix_Wizard()
+            for title, values in parameter_values.items():
+                self.repo.Set_Parameter_Values(title, values)
+            self.repo.Apply_Matrix()
+            self.repo.Calculate()
+            return self.repo.Sensitivity_Data_df()
+        finally:
+            self.repo.Close_Wizard()
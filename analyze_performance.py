@@ -1,126 +1,288 @@
 """
-Analyze performance log to track automation speed improvements
+Analyze the perf_log store to track automation speed across versions
+
+Timings are folded into log-spaced latency histograms per (version,
+function) - 40 bins per decade from 0.1 ms to 1000 s, so percentiles are
+within about 3% - which are cached in the store with the list of parts
+already counted. Each analysis only reads the parts written since the last
+one. Runs are the explicit run ids the sweeps logged under.
+
+    python analyze_performance.py                      summary of the latest version
+    python analyze_performance.py --version V          summary of version V
+    python analyze_performance.py --compare BASE NEW   p50/p95 regressions from BASE to NEW
+    python analyze_performance.py --versions           versions in the store
 """
+import argparse
+import numpy as np
 import pandas as pd
-from pathlib import Path
 from datetime import datetime
+from perf_store import default_store
+from wait_scheduler import TRANSITION_PREFIX
+
+
+BIN_EDGES = np.logspace(-4, 3, 7 * 40 + 1)
+CACHE_NAME = "_analysis.npz"
+PERCENTILES = (50, 95, 99)
+
+
+def histogram_percentile(counts, q, minimum=0.0, maximum=np.inf):
+    """q-th percentile of a histogram over BIN_EDGES (bin 0 below, last bin above the edges)"""
+    total = counts.sum()
+    if total == 0:
+        return np.nan
+    cumulative = np.cumsum(counts)
+    target = q / 100.0 * total
+    i = int(np.searchsorted(cumulative, target))
+    lower = BIN_EDGES[i - 1] if i > 0 else minimum
+    upper = BIN_EDGES[i] if i < len(BIN_EDGES) else maximum
+    before = cumulative[i - 1] if i > 0 else 0
+    fraction = (target - before) / counts[i]
+    # Geometric within a log-spaced bin
+    if lower > 0 and np.isfinite(upper):
+        value = lower * (upper / lower) ** fraction
+    else:
+        value = lower + (upper - lower) * fraction
+    return float(min(max(value, minimum), maximum))
+
+
+class LatencyHistograms:
+    """Per (version, function) latency histograms and per-run totals, updated from new store parts"""
+
+    def __init__(self, store):
+        self.store = store
+        self.keys = []            # (version, function)
+        self._index = {}
+        self.counts = np.zeros((0, len(BIN_EDGES) + 1), dtype=np.int64)
+        self.sums = np.zeros(0)
+        self.minimum = np.zeros(0)
+        self.maximum = np.zeros(0)
+        self.parts = set()        # Parts already counted (relative to the store)
+        self.runs = {}            # (version, run_id) -> [first, last, rows, row seconds]
+        self.path = store.root / CACHE_NAME
+        self._load()
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                if not np.array_equal(data['edges'], BIN_EDGES):
+                    return  # Bins changed - rebuild from the parts
+                self.keys = list(zip(data['key_version'].tolist(), data['key_function'].tolist()))
+                self.counts = data['counts']
+                self.sums, self.minimum, self.maximum = data['sums'], data['minimum'], data['maximum']
+                self.parts = set(data['parts'].tolist())
+                self.runs = {(version, run): list(values) for version, run, values in
+                             zip(data['run_version'].tolist(), data['run_id'].tolist(), data['run_values'].tolist())}
+        except (OSError, KeyError, ValueError) as e:
+            print(f"Warning: rebuilding the analysis cache ({e})")
+            self.keys, self.parts, self.runs = [], set(), {}
+            self.counts = np.zeros((0, len(BIN_EDGES) + 1), dtype=np.int64)
+            self.sums, self.minimum, self.maximum = np.zeros(0), np.zeros(0), np.zeros(0)
+        self._index = {key: i for i, key in enumerate(self.keys)}
+
+    def save(self):
+        runs = list(self.runs.items())
+        np.savez(self.path, edges=BIN_EDGES,
+                 key_version=np.array([version for version, _ in self.keys], dtype=str),
+                 key_function=np.array([function for _, function in self.keys], dtype=str),
+                 counts=self.counts, sums=self.sums, minimum=self.minimum, maximum=self.maximum,
+                 parts=np.array(sorted(self.parts), dtype=str),
+                 run_version=np.array([key[0] for key, _ in runs], dtype=str),
+                 run_id=np.array([key[1] for key, _ in runs], dtype=str),
+                 run_values=np.array([values for _, values in runs], dtype='float64').reshape(len(runs), 4))
+
+    def _key_positions(self, version, functions):
+        positions = np.empty(len(functions), dtype=np.int64)
+        for i, function in enumerate(functions):
+            key = (version, function)
+            position = self._index.get(key)
+            if position is None:
+                position = self._index[key] = len(self.keys)
+                self.keys.append(key)
+            positions[i] = position
+        grow = len(self.keys) - len(self.counts)
+        if grow > 0:
+            self.counts = np.vstack([self.counts, np.zeros((grow, self.counts.shape[1]), dtype=np.int64)])
+            self.sums = np.concatenate([self.sums, np.zeros(grow)])
+            self.minimum = np.concatenate([self.minimum, np.full(grow, np.inf)])
+            self.maximum = np.concatenate([self.maximum, np.zeros(grow)])
+        return positions
+
+    def add_part(self, path):
+        frame = self.store.read_part(path, ['timestamp', 'row', 'function', 'elapsed'])
+        if frame.empty:
+            return
+        version, run_id = frame['version'].iat[0], frame['run_id'].iat[0]
+        codes, functions = pd.factorize(frame['function'])
+        keys = self._key_positions(version, list(functions))[codes]
+        elapsed = frame['elapsed'].to_numpy('float64')
+        np.add.at(self.counts, (keys, np.searchsorted(BIN_EDGES, elapsed, side='right')), 1)
+        np.add.at(self.sums, keys, elapsed)
+        np.minimum.at(self.minimum, keys, elapsed)
+        np.maximum.at(self.maximum, keys, elapsed)
+
+        rows = frame['function'] == 'row'
+        run = self.runs.setdefault((version, run_id), [np.inf, 0.0, 0, 0.0])
+        run[0] = min(run[0], float(frame['timestamp'].min()))
+        run[1] = max(run[1], float(frame['timestamp'].max()))
+        run[2] += int(rows.sum())
+        run[3] += float(elapsed[rows.to_numpy()].sum())
+
+    def update(self):
+        """Count the parts written since the last update; returns how many were new"""
+        new = []
+        for path in self.store.parts('timings'):
+            name = path.relative_to(self.store.root).as_posix()
+            if name not in self.parts:
+                new.append((name, path))
+        for name, path in new:
+            self.add_part(path)
+            self.parts.add(name)
+        if new:
+            self.save()
+        return len(new)
+
+    def versions(self):
+        """Versions, most recently run last"""
+        last = {}
+        for (version, _), values in self.runs.items():
+            last[version] = max(last.get(version, 0.0), values[1])
+        return sorted(last, key=last.get)
+
+    def table(self, version):
+        """count / mean / p50 / p95 / p99 / max per function of one version"""
+        records = []
+        for (key_version, function), i in self._index.items():
+            if key_version != version:
+                continue
+            count = int(self.counts[i].sum())
+            record = {'function': function, 'count': count, 'mean': self.sums[i] / count if count else np.nan}
+            for q in PERCENTILES:
+                record[f'p{q}'] = histogram_percentile(self.counts[i], q, self.minimum[i], self.maximum[i])
+            record['max'] = self.maximum[i]
+            records.append(record)
+        columns = ['function', 'count', 'mean'] + [f'p{q}' for q in PERCENTILES] + ['max']
+        return pd.DataFrame(records, columns=columns).set_index('function')
+
+    def run_table(self, version):
+        records = [{'run': run, 'start': datetime.fromtimestamp(first).strftime('%Y-%m-%d %H:%M:%S'),
+                    'rows': int(rows), 's/row': row_seconds / rows if rows else np.nan}
+                   for (key_version, run), (first, _, rows, row_seconds) in self.runs.items()
+                   if key_version == version]
+        return pd.DataFrame(records, columns=['run', 'start', 'rows', 's/row']).sort_values('start')
+
+
+def load_histograms(store=None):
+    histograms = LatencyHistograms(store if store is not None else default_store())
+    new = histograms.update()
+    if new:
+        print(f"({new} new log parts read)")
+    return histograms
 
 
-def analyze_performance_log(log_file="performance_log.csv"):
-    """Analyze and display performance statistics"""
-    log_path = Path(__file__).parent / log_file
-    
-    if not log_path.exists():
-        print(f"No performance log found at: {log_path}")
+def analyze_performance_log(version=None, store=None):
+    """Print percentile statistics for one version (default: the most recently run)"""
+    store = store if store is not None else default_store()
+    histograms = load_histograms(store)
+    versions = histograms.versions()
+    if not versions:
+        print(f"No performance log found at: {store.root}")
         return
-    
-    # Read the log
-    df = pd.read_csv(log_path)
-    df['elapsed'] = df['elapsed'].astype(float)
-    df['timestamp'] = pd.to_datetime(df['timestamp'])
-    
-    print("=" * 80)
-    print("PERFORMANCE ANALYSIS")
-    print("=" * 80)
-    
-    # Overall statistics
-    print(f"\nTotal logged calls: {len(df)}")
-    print(f"Date range: {df['timestamp'].min()} to {df['timestamp'].max()}")
-    print(f"Functions tracked: {df['function'].nunique()}")
-    
-    # Statistics by function
-    print("\n" + "=" * 80)
-    print("STATISTICS BY FUNCTION")
+    version = version or versions[-1]
+    table = histograms.table(version)
+    if table.empty:
+        print(f"No timings for version {version} (have: {', '.join(versions)})")
+        return
+
     print("=" * 80)
-    
-    stats = df.groupby('function')['elapsed'].agg(['count', 'mean', 'min', 'max', 'std'])
-    stats = stats.sort_values('mean', ascending=False)
-    stats['mean'] = stats['mean'].round(3)
-    stats['min'] = stats['min'].round(3)
-    stats['max'] = stats['max'].round(3)
-    stats['std'] = stats['std'].round(3)
-    
-    print(stats.to_string())
-    
-    # Recent performance (last 10 automation runs)
-    print("\n" + "=" * 80)
-    print("RECENT PERFORMANCE TRENDS")
+    print(f"PERFORMANCE ANALYSIS - version {version}")
     print("=" * 80)
-    
-    # Group by timestamp to identify separate runs
-    df['run_id'] = (df['timestamp'].diff() > pd.Timedelta(seconds=5)).cumsum()
-    
-    recent_runs = df.groupby('run_id').tail(50)  # Last 50 entries
-    recent_stats = recent_runs.groupby('function')['elapsed'].agg(['mean', 'count'])
-    recent_stats = recent_stats.sort_values('mean', ascending=False)
-    recent_stats['mean'] = recent_stats['mean'].round(3)
-    
-    print("\nRecent Average Times (last 50 entries):")
-    print(recent_stats.to_string())
-    
-    # Total time per automation run
+    print(f"\nTotal logged calls: {int(table['count'].sum())}")
+    print(f"Functions tracked: {len(table)}")
+
+    transitions = table.index.str.startswith(TRANSITION_PREFIX)
     print("\n" + "=" * 80)
-    print("TOTAL TIME PER AUTOMATION RUN")
+    print("STATISTICS BY FUNCTION (seconds)")
     print("=" * 80)
-    
-    run_totals = df.groupby('run_id').agg({
-        'elapsed': 'sum',
-        'timestamp': 'min'
-    }).tail(10)  # Last 10 runs
-    
-    run_totals['elapsed'] = run_totals['elapsed'].round(2)
-    run_totals.columns = ['Total Time (s)', 'Run Start']
-    
-    print("\nLast 10 automation runs:")
-    print(run_totals.to_string())
-    
-    # Identify slowest operations
+    print(table[~transitions].sort_values('p50', ascending=False).round(3).to_string())
+
+    if transitions.any():
+        print("\n" + "=" * 80)
+        print("STATISTICS BY TRANSITION (seconds)")
+        print("=" * 80)
+        steps = table[transitions].rename(index=lambda name: name[len(TRANSITION_PREFIX):])
+        print(steps.sort_values('p50', ascending=False).round(3).to_string())
+
+    runs = histograms.run_table(version)
     print("\n" + "=" * 80)
-    print("SLOWEST INDIVIDUAL CALLS (Top 20)")
+    print("LAST 10 RUNS")
     print("=" * 80)
-    
-    slowest = df.nlargest(20, 'elapsed')[['timestamp', 'function', 'elapsed']]
-    slowest['elapsed'] = slowest['elapsed'].round(3)
-    print(slowest.to_string(index=False))
-    
+    print(runs.tail(10).round(3).to_string(index=False))
+
+    # Search counts of the latest run, per step
+    if len(runs):
+        searches = store.read('searches', columns=['step', 'call', 'calls', 'elements', 'elapsed'],
+                              version=version, run=runs['run'].iat[-1])
+        if not searches.empty:
+            print("\n" + "=" * 80)
+            print(f"UIA SEARCHES BY STEP (run {runs['run'].iat[-1]})")
+            print("=" * 80)
+            by_step = searches.groupby(['step', 'call'])[['calls', 'elements', 'elapsed']].sum()
+            print(by_step.sort_values('elapsed', ascending=False).round(3).to_string())
+
     print("\n" + "=" * 80)
 
 
-def compare_before_after(before_date):
-    """Compare performance before and after a specific date"""
-    log_path = Path(__file__).parent / "performance_log.csv"
-    
-    if not log_path.exists():
-        print("No performance log found")
-        return
-    
-    df = pd.read_csv(log_path)
-    df['elapsed'] = df['elapsed'].astype(float)
-    df['timestamp'] = pd.to_datetime(df['timestamp'])
-    
-    before = df[df['timestamp'] < pd.to_datetime(before_date)]
-    after = df[df['timestamp'] >= pd.to_datetime(before_date)]
-    
+def compare_versions(base, new, store=None, threshold=0.10, min_count=5):
+    """
+    p50/p95 per function of version new against version base. Functions
+    slower by more than threshold (fraction) in p50 or p95, with at least
+    min_count calls in both, are flagged. Returns the comparison DataFrame.
+    """
+    histograms = load_histograms(store)
+    before, after = histograms.table(base), histograms.table(new)
+    if before.empty or after.empty:
+        missing = base if before.empty else new
+        print(f"No timings for version {missing} (have: {', '.join(histograms.versions())})")
+        return None
+
+    comparison = pd.DataFrame({
+        'count': after['count'],
+        'p50 before': before['p50'], 'p50 after': after['p50'],
+        'p95 before': before['p95'], 'p95 after': after['p95'],
+    }).dropna()
+    comparison['p50 change (%)'] = (comparison['p50 after'] / comparison['p50 before'] - 1) * 100
+    comparison['p95 change (%)'] = (comparison['p95 after'] / comparison['p95 before'] - 1) * 100
+    enough = (before['count'].reindex(comparison.index) >= min_count) & (comparison['count'] >= min_count)
+    slower = (comparison[['p50 change (%)', 'p95 change (%)']] > threshold * 100).any(axis=1)
+    comparison['regression'] = np.where(enough & slower, 'REGRESSION', '')
+    comparison = comparison.sort_values('p50 change (%)', ascending=False)
+
     print("=" * 80)
-    print(f"PERFORMANCE COMPARISON (Before vs After {before_date})")
+    print(f"PERFORMANCE COMPARISON ({base} -> {new})")
     print("=" * 80)
-    
-    comparison = pd.DataFrame({
-        'Before Mean': before.groupby('function')['elapsed'].mean(),
-        'After Mean': after.groupby('function')['elapsed'].mean(),
-    })
-    
-    comparison['Improvement (s)'] = comparison['Before Mean'] - comparison['After Mean']
-    comparison['Improvement (%)'] = ((comparison['Before Mean'] - comparison['After Mean']) / comparison['Before Mean'] * 100).round(1)
-    comparison = comparison.round(3)
-    comparison = comparison.sort_values('Improvement (s)', ascending=False)
-    
-    print(comparison.to_string())
-    print("\n" + "=" * 80)
+    print(comparison.round(3).to_string())
+    regressions = int((comparison['regression'] != '').sum())
+    print(f"\n{regressions} regression(s) over {threshold:.0%}")
+    print("=" * 80)
+    return comparison
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Analyze the automation performance log")
+    parser.add_argument('--version', help="version to summarize (default: the most recently run)")
+    parser.add_argument('--compare', nargs=2, metavar=('BASE', 'NEW'), help="compare two versions")
+    parser.add_argument('--threshold', type=float, default=0.10, help="regression threshold (fraction)")
+    parser.add_argument('--versions', action='store_true', help="list the versions in the log")
+    return parser
 
 
 if __name__ == "__main__":
-    analyze_performance_log()
-    
-    # Uncomment to compare before/after optimization
-    # compare_before_after("2025-11-12 12:00:00")
+    args = build_parser().parse_args()
+    if args.versions:
+        print("\n".join(load_histograms().versions()))
+    elif args.compare:
+        compare_versions(*args.compare, threshold=args.threshold)
+    else:
+        analyze_performance_log(args.version)
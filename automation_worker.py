@@ -0,0 +1,89 @@
+"""
+Background worker for GUI sweeps
+
+The sweep runs on one long-lived worker thread so the Tk main loop never
+blocks on Orpheus. The worker is passed to the runner in place of the GUI:
+progress, partial results and the outcome are published as messages on a
+queue, which the GUI drains with root.after every FRAME_INTERVAL_MS. Stopping
+cancels the worker's CancellationToken; pass it to the runner as
+cancel_token so the stop interrupts the current step.
+
+All runs share the same thread, so the UIA client and COM apartment created
+for the first run stay valid for the next.
+"""
+import queue
+import threading
+import traceback
+from cancellation import CancellationToken
+
+
+FRAME_INTERVAL_MS = 50  # GUI redraw interval while a sweep runs
+
+
+class AutomationWorker:
+    """Runs one sweep at a time off the GUI thread and reports back through messages"""
+
+    def __init__(self, token=None):
+        self.messages = queue.Queue()
+        self.token = token if token is not None else CancellationToken()
+        self._jobs = queue.Queue()
+        self._thread = None
+        self.running = False
+
+    def start(self, func, *args, **kwargs):
+        """Run func(*args, gui=self, **kwargs) on the worker thread"""
+        if self.running:
+            raise Exception("A sweep is already running")
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="AutomationWorker", daemon=True)
+            self._thread.start()
+        self.token.reset()
+        self.running = True
+        self._jobs.put((func, args, kwargs))
+
+    def stop(self, reason="Stopped by user"):
+        """Ask the running sweep to stop"""
+        self.token.cancel(reason)
+
+    @property
+    def stop_automation(self):
+        # Runner-side stop check (same name as the GUI flag it replaces)
+        return self.token.cancelled
+
+    # Runner-side reporting, called on the worker thread
+    def update_progress(self, current, total):
+        self.messages.put(('progress', current, total))
+
+    def update_runtime(self):
+        pass  # The GUI times the run itself on every frame
+
+    def show_partial_results(self, frame):
+        # The runner reuses frame buffers - send a copy
+        self.messages.put(('rows', frame.copy()))
+
+    def drain(self):
+        """All messages published since the last call (GUI thread)"""
+        messages = []
+        while True:
+            try:
+                messages.append(self.messages.get_nowait())
+            except queue.Empty:
+                return messages
+
+    def _run(self):
+        try:
+            # UIA from a non-main thread needs COM initialised on it (Windows only)
+            import comtypes
+            comtypes.CoInitializeEx(comtypes.COINIT_MULTITHREADED)
+        except (ImportError, AttributeError, OSError):
+            pass
+        while True:
+            func, args, kwargs = self._jobs.get()
+            try:
+                message = ('done', func(*args, gui=self, **kwargs))
+            except Exception as e:
+                traceback.print_exc()
+                message = ('error', str(e))
+            # Idle before the GUI hears about it, so it can start the next run
+            self.running = False
+            self.messages.put(message)
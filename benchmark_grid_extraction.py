@@ -0,0 +1,62 @@
+"""
+Benchmark Modeled_Data_df grid extraction on the simulated backend
+Compares cells/second for per-cell reads against the bulk cache-request path
+and the clipboard (select all + copy) capture.
+"""
+import contextlib
+import io
+import time
+from simulated_backend import SimulatedOrpheus
+from Button_Repository2 import Button_Repository
+from wait_scheduler import WaitScheduler
+from perf_writer import log_writer
+
+
+# Roughly one cross-process round trip per cell vs one request per grid
+LATENCIES = {'read_cell': 0.0005, 'cache_request': 0.01, 'copy': 0.01}
+
+
+def open_modeled_data(repo):
+    """Drive the simulated UI up to an open Modeled Data grid"""
+    repo.Input_WOB_RIH_POOH_WHP(-1500, 1350, 0)
+    repo.Trip_in_Out_Buttons()
+    repo.Drop_Down_Streatcher()
+    repo.Modeled_Data_Button()
+
+
+def time_extraction(grid_mode, depth_rows, repeats=3):
+    """Return (cells, seconds per extraction) for one grid mode"""
+    backend = SimulatedOrpheus(latencies=LATENCIES, depth_rows=depth_rows)
+    with contextlib.redirect_stdout(io.StringIO()):
+        repo = Button_Repository(backend, scheduler=WaitScheduler(), grid_mode=grid_mode)
+        open_modeled_data(repo)
+
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        df = repo.Modeled_Data_df()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    # Header row and row-number column are read too
+    cells = (len(df) + 1) * (len(df.columns) + 1)
+    return cells, best
+
+
+def run_benchmark(sizes=(50, 200, 1000)):
+    print(f"{'rows':>6} {'cells':>7} {'per-cell cells/s':>17} {'bulk cells/s':>13} {'clipboard cells/s':>18} {'speedup':>8}")
+    # Keep simulated timings out of the real performance log
+    log_writer.enabled = False
+    try:
+        for depth_rows in sizes:
+            cells, per_cell = time_extraction("cells", depth_rows)
+            _, bulk = time_extraction("bulk", depth_rows)
+            _, clipboard = time_extraction("clipboard", depth_rows)
+            print(f"{depth_rows:>6} {cells:>7} {cells / per_cell:>17,.0f} {cells / bulk:>13,.0f} "
+                  f"{cells / clipboard:>18,.0f} {per_cell / min(bulk, clipboard):>7.1f}x")
+    finally:
+        log_writer.enabled = True
+
+
+if __name__ == "__main__":
+    run_benchmark()
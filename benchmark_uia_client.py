@@ -0,0 +1,113 @@
+"""
+Benchmark the shared UIA client layer against a fake IUIAutomation client
+Runs anywhere (no Windows/COM needed) and compares creating a client per
+search - the old find_element_fast behaviour - with the shared client.
+"""
+import time
+from uia_client import AutomationClient, UIA_AutomationIdPropertyId
+
+
+class FakeElementArray:
+    """Stand-in for IUIAutomationElementArray"""
+
+    def __init__(self, elements):
+        self._elements = elements
+        self.Length = len(elements)
+
+    def GetElement(self, index):
+        return self._elements[index]
+
+
+class FakeElement:
+    """Minimal element supporting FindFirst/FindAll over a property dict"""
+
+    def __init__(self, properties, children=()):
+        self.properties = properties
+        self.children = list(children)
+
+    def _descendants(self):
+        for child in self.children:
+            yield child
+            yield from child._descendants()
+
+    def FindFirst(self, scope, condition):
+        property_id, value = condition
+        for element in self._descendants():
+            if element.properties.get(property_id) == value:
+                return element
+        return None
+
+    def FindAll(self, scope, condition):
+        property_id, value = condition
+        return FakeElementArray([e for e in self._descendants() if e.properties.get(property_id) == value])
+
+
+class FakeUIAutomation:
+    """Fake IUIAutomation; conditions are plain (property id, value) tuples"""
+
+    def __init__(self, condition_cost):
+        self.condition_cost = condition_cost
+
+    def CreatePropertyCondition(self, property_id, value):
+        time.sleep(self.condition_cost)
+        return (property_id, value)
+
+
+class FakeClientBackend:
+    """Client backend that charges a configurable cost to create the client"""
+
+    def __init__(self, create_cost=0.005, condition_cost=0.0002):
+        self.create_cost = create_cost
+        self.condition_cost = condition_cost
+
+    def create_client(self):
+        time.sleep(self.create_cost)
+        return FakeUIAutomation(self.condition_cost)
+
+
+def build_fake_tree():
+    """A small tree shaped like the Orpheus RIH/POOH input panes"""
+    panes = []
+    for pane_id in ("txtAxialForceOnEndRIH", "txtAxialForceOnEndPOOH",
+                    "txtWellheadPressurePOOH", "txtWellheadPressureRIH"):
+        edit = FakeElement({UIA_AutomationIdPropertyId: "txtData"})
+        panes.append(FakeElement({UIA_AutomationIdPropertyId: pane_id}, [edit]))
+    filler = [FakeElement({UIA_AutomationIdPropertyId: f"ctl{i}"}) for i in range(200)]
+    return FakeElement({UIA_AutomationIdPropertyId: "frmOrpheus"}, filler + panes)
+
+
+def input_row_searches(client, root):
+    """The eight searches Input_WOB_RIH_POOH_WHP makes per row"""
+    for pane_id in ("txtAxialForceOnEndRIH", "txtAxialForceOnEndPOOH",
+                    "txtWellheadPressurePOOH", "txtWellheadPressureRIH"):
+        pane = client.find_first(root, UIA_AutomationIdPropertyId, pane_id)
+        client.find_first(pane, UIA_AutomationIdPropertyId, "txtData")
+
+
+def run_benchmark(rows=50):
+    root = build_fake_tree()
+    backend = FakeClientBackend()
+
+    # Old behaviour: a brand-new client for every search
+    start = time.perf_counter()
+    for _ in range(rows):
+        for _ in range(8):
+            AutomationClient(backend).find_first(root, UIA_AutomationIdPropertyId, "txtData")
+    per_call = time.perf_counter() - start
+
+    # Shared client with interned conditions
+    shared = AutomationClient(backend)
+    start = time.perf_counter()
+    for _ in range(rows):
+        input_row_searches(shared, root)
+    cached = time.perf_counter() - start
+
+    print(f"Rows: {rows} (8 searches per row)")
+    print(f"Client per search: {per_call:.3f}s ({per_call / rows * 1000:.2f} ms/row)")
+    print(f"Shared client:     {cached:.3f}s ({cached / rows * 1000:.2f} ms/row)")
+    print(f"Speedup:           {per_call / cached:.1f}x")
+    print(f"Cache stats:       {shared.stats()}")
+
+
+if __name__ == "__main__":
+    run_benchmark()
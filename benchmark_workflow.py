@@ -0,0 +1,218 @@
+"""
+Replay benchmark of the full per-row workflow
+
+Runs New_Fluid_Density, Input_WOB_RIH_POOH_WHP, Trip In and Out, the
+Stretcher dropdown, Modeled Data and both OK buttons for a fixed input
+table on the simulated backend with a fixed latency profile. Every run
+replays the same UI latencies, with a fresh wait scheduler and nothing
+written to the performance log, so differences between runs come from the
+automation code. Step and row times are taken from the tracer's spans and
+reported as p50/p95; throughput is the median over the repeats.
+
+    python benchmark_workflow.py                    run and print the report
+    python benchmark_workflow.py --save-baseline    store the result as the JSON baseline
+    python benchmark_workflow.py --check            compare with the baseline, exit 1 on a regression
+    python benchmark_workflow.py --record-profile benchmark_profile.json
+                                                    latency profile from the perf_log store
+
+--profile PATH replays a recorded profile instead of LATENCY_PROFILE; a
+baseline is only compared with runs of the same profile.
+"""
+import argparse
+import json
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+import numpy as np
+from simulated_backend import SimulatedOrpheus
+from Button_Repository2 import Button_Repository, Cerbers_functions, begin_row, end_row
+from wait_scheduler import WaitScheduler, TRANSITION_PREFIX
+from perf_writer import log_writer
+from perf_store import default_store, code_version
+from tracing import tracer
+
+
+BASELINE_PATH = Path(__file__).parent / "benchmark_workflow_baseline.json"
+
+# Seconds per simulated operation, in the proportions of a live session
+LATENCY_PROFILE = {
+    'find': 0.002,
+    'click': 0.005,
+    'set_text': 0.003,
+    'select': 0.005,
+    'expand': 0.005,
+    'cache_request': 0.01,
+    'probe': 0.0005,
+    'open_window': 0.02,
+    'calculate': 0.1,
+}
+
+# Four rows per density, so density changes are timed as well as rows
+DENSITIES = [8.0, 9.5, 10.2]
+ROWS_PER_DENSITY = 4
+
+
+def benchmark_inputs():
+    rows = []
+    for density in DENSITIES:
+        for i in range(ROWS_PER_DENSITY):
+            rows.append({'Density_value': density, 'RIH_wob_value': -1500 - 500 * i,
+                         'POOH_wob_value': 1350 + 250 * i, 'WHP_value': 100 * i})
+    return rows
+
+
+def record_profile(store=None):
+    """LATENCY_PROFILE with find and calculate replaced by their logged medians"""
+    store = store if store is not None else default_store()
+    profile = dict(LATENCY_PROFILE)
+    searches = store.read('searches', columns=['call', 'calls', 'elapsed'])
+    first = searches[searches['call'] == 'FindFirst'] if len(searches) else searches
+    if len(first) and first['calls'].sum():
+        profile['find'] = float(first['elapsed'].sum() / first['calls'].sum())
+    timings = store.read('timings', columns=['function', 'elapsed'])
+    trips = timings[timings['function'] == TRANSITION_PREFIX + 'trip_in_out']['elapsed']
+    if len(trips):
+        profile['calculate'] = float(trips.median())
+    return profile
+
+
+def run_once(profile, rows):
+    """One pass over rows; returns (seconds, step durations by name, row durations)"""
+    backend = SimulatedOrpheus(latencies=profile)
+    repo = Button_Repository(backend, scheduler=WaitScheduler())
+    functions = Cerbers_functions(repo)
+    tracer.clear()
+    start = time.perf_counter()
+    previous_density = None
+    for position, row in enumerate(rows):
+        row_start = time.perf_counter_ns()
+        begin_row(position)
+        if row['Density_value'] != previous_density:
+            functions.New_Fluid_Density(row['Density_value'])
+            previous_density = row['Density_value']
+        repo.Input_WOB_RIH_POOH_WHP(row['RIH_wob_value'], row['POOH_wob_value'], row['WHP_value'])
+        repo.Trip_in_Out_Buttons()
+        repo.Drop_Down_Streatcher()
+        repo.Modeled_Data_Button()
+        repo.Modeled_Data_df()
+        repo.OK_Button()
+        repo.OK_Button()
+        end_row(row_start)
+    seconds = time.perf_counter() - start
+
+    events = tracer.events()
+    names = np.array(tracer.names)
+    durations = (events['end'] - events['start']) / 1e9
+    categories = names[events['category']]
+    steps = {}
+    for name, duration in zip(names[events['name'][categories == 'step']], durations[categories == 'step']):
+        steps.setdefault(str(name), []).append(float(duration))
+    return seconds, steps, durations[categories == 'row'].tolist()
+
+
+def percentiles(values):
+    return {'count': len(values), 'p50': float(np.percentile(values, 50)), 'p95': float(np.percentile(values, 95))}
+
+
+def run_benchmark(profile=None, repeats=3):
+    """Run the workflow repeats times; returns the result dict stored as a baseline"""
+    profile = profile or LATENCY_PROFILE
+    rows = benchmark_inputs()
+    # Keep simulated runs out of the real performance log
+    log_writer.enabled = False
+    tracer.enable(capacity=1 << 18)
+    try:
+        throughputs, steps, row_times = [], {}, []
+        for _ in range(repeats):
+            seconds, run_steps, run_rows = run_once(profile, rows)
+            throughputs.append(len(rows) / seconds)
+            for name, values in run_steps.items():
+                steps.setdefault(name, []).extend(values)
+            row_times.extend(run_rows)
+    finally:
+        tracer.disable()
+        log_writer.enabled = True
+    return {
+        'version': code_version(),
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'profile': profile,
+        'rows': len(rows),
+        'repeats': repeats,
+        'rows_per_second': float(np.median(throughputs)),
+        'row': percentiles(row_times),
+        'steps': {name: percentiles(values) for name, values in sorted(steps.items())},
+    }
+
+
+def print_report(result, baseline=None):
+    print(f"{result['rows']} rows x {result['repeats']}: {result['rows_per_second']:.2f} rows/s, "
+          f"row p50 {result['row']['p50'] * 1000:.1f} ms, p95 {result['row']['p95'] * 1000:.1f} ms")
+    header = f"{'step':<28} {'count':>6} {'p50 ms':>9} {'p95 ms':>9}"
+    if baseline is not None:
+        header += f" {'base p50':>9} {'change':>8}"
+    print(header)
+    for name, stats in sorted(result['steps'].items(), key=lambda item: -item[1]['p50']):
+        line = f"{name:<28} {stats['count']:>6} {stats['p50'] * 1000:>9.1f} {stats['p95'] * 1000:>9.1f}"
+        base = baseline['steps'].get(name) if baseline is not None else None
+        if base is not None:
+            line += f" {base['p50'] * 1000:>9.1f} {(stats['p50'] / base['p50'] - 1) * 100 if base['p50'] else 0:>7.1f}%"
+        print(line)
+
+
+def check_against_baseline(result, baseline, threshold=0.10):
+    """True if throughput is within threshold (fraction) of the baseline"""
+    base, now = baseline['rows_per_second'], result['rows_per_second']
+    change = now / base - 1
+    print(f"\nThroughput {now:.2f} rows/s vs baseline {base:.2f} rows/s ({change:+.1%}, "
+          f"baseline {baseline['version']} from {baseline['created']})")
+    if change < -threshold:
+        print(f"REGRESSION: throughput dropped more than {threshold:.0%}")
+        return False
+    return True
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Replay benchmark of the per-row workflow on the simulator")
+    parser.add_argument('--repeats', type=int, default=3, help="passes over the input table")
+    parser.add_argument('--profile', help="JSON latency profile to replay (default: LATENCY_PROFILE)")
+    parser.add_argument('--record-profile', metavar='PATH', help="write a latency profile from the perf_log store")
+    parser.add_argument('--baseline', default=str(BASELINE_PATH), help="baseline JSON file")
+    parser.add_argument('--save-baseline', action='store_true', help="store this run as the baseline")
+    parser.add_argument('--check', action='store_true', help="exit 1 if throughput regressed past --threshold")
+    parser.add_argument('--threshold', type=float, default=0.10, help="allowed throughput drop (fraction)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.record_profile:
+        profile = record_profile()
+        Path(args.record_profile).write_text(json.dumps(profile, indent=2))
+        print(f"Latency profile written to {args.record_profile}: {profile}")
+        return 0
+
+    profile = json.loads(Path(args.profile).read_text()) if args.profile else LATENCY_PROFILE
+    baseline_path = Path(args.baseline)
+    baseline = json.loads(baseline_path.read_text()) if baseline_path.exists() else None
+    if baseline is not None and baseline.get('profile') != profile:
+        print(f"Baseline {baseline_path} was recorded with a different latency profile - not comparing")
+        baseline = None
+
+    result = run_benchmark(profile, args.repeats)
+    print_report(result, baseline)
+
+    if args.save_baseline:
+        baseline_path.write_text(json.dumps(result, indent=2))
+        print(f"\nBaseline saved to {baseline_path}")
+        return 0
+    if args.check:
+        if baseline is None:
+            print(f"\nNo comparable baseline at {baseline_path} - run with --save-baseline first")
+            return 2
+        return 0 if check_against_baseline(result, baseline, args.threshold) else 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,281 @@
+"""
+Cancellation of running sweeps
+
+A CancellationToken is shared by everything that can stop a run and
+everything that has to notice it. WindowWaiter waits wake up on it, so a
+stop takes effect inside the current step (raising Cancelled) instead of
+after the row. Triggers are armed only while a run is in progress and cost
+nothing when idle:
+
+    KeyboardHookTrigger  ESC through a low-level keyboard hook (Windows)
+    SignalTrigger        Ctrl+C / SIGTERM for the CLI (a second Ctrl+C interrupts)
+    FileSentinelTrigger  a stop file appearing, for scheduled batches
+    EventTrigger         an Event set by another process (parallel workers)
+
+A GUI Stop button simply calls token.cancel().
+"""
+import os
+import signal
+import sys
+import threading
+from pathlib import Path
+
+
+class Cancelled(Exception):
+    """Raised inside a step when its run was cancelled"""
+
+
+class CancellationToken:
+    """Thread-safe stop request with wake-up callbacks"""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._callbacks = []
+        self._lock = threading.Lock()
+        self.reason = None
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def cancel(self, reason="Stopped by user"):
+        """Request a stop (only the first reason is kept)"""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.reason = reason
+            self._event.set()
+            callbacks = list(self._callbacks)
+        for callback in callbacks:
+            callback()
+
+    def reset(self):
+        with self._lock:
+            self._event.clear()
+            self.reason = None
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise Cancelled(self.reason)
+
+    def wait(self, timeout=None):
+        """Block until cancelled or timeout; True if cancelled"""
+        return self._event.wait(timeout)
+
+    def add_callback(self, callback):
+        """Call callback() (on the cancelling thread) when the token is cancelled"""
+        with self._lock:
+            self._callbacks.append(callback)
+
+    def remove_callback(self, callback):
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+
+class CancelTrigger:
+    """Something that cancels the token while armed"""
+
+    def arm(self, token):
+        raise NotImplementedError
+
+    def disarm(self):
+        raise NotImplementedError
+
+
+class KeyboardHookTrigger(CancelTrigger):
+    """
+    ESC (or another virtual key) pressed anywhere, through a WH_KEYBOARD_LL
+    hook. The hook thread sleeps in GetMessage and only exists while armed;
+    does nothing off Windows.
+    """
+
+    WH_KEYBOARD_LL = 13
+    WM_KEYDOWN = 0x0100
+    WM_SYSKEYDOWN = 0x0104
+    WM_QUIT = 0x0012
+
+    def __init__(self, virtual_key=0x1B, on_cancel=None):
+        self.virtual_key = virtual_key
+        self.on_cancel = on_cancel  # e.g. update a status label
+        self._thread = None
+        self._thread_id = None
+        self._ready = threading.Event()
+
+    def arm(self, token):
+        if sys.platform != "win32" or self._thread is not None:
+            return
+        self._ready.clear()
+        self._thread = threading.Thread(target=self._hook_loop, args=(token,), name="KeyboardHook", daemon=True)
+        self._thread.start()
+        self._ready.wait(2)
+
+    def disarm(self):
+        if self._thread is None:
+            return
+        import ctypes
+        if self._thread_id is not None:
+            ctypes.windll.user32.PostThreadMessageW(self._thread_id, self.WM_QUIT, 0, 0)
+        self._thread.join(2)
+        self._thread = None
+        self._thread_id = None
+
+    def _hook_loop(self, token):
+        import ctypes
+        from ctypes import wintypes
+
+        user32 = ctypes.windll.user32
+        kernel32 = ctypes.windll.kernel32
+        LRESULT = ctypes.c_ssize_t
+        HOOKPROC = ctypes.WINFUNCTYPE(LRESULT, ctypes.c_int, wintypes.WPARAM, wintypes.LPARAM)
+        user32.SetWindowsHookExW.argtypes = [ctypes.c_int, HOOKPROC, wintypes.HINSTANCE, wintypes.DWORD]
+        user32.SetWindowsHookExW.restype = wintypes.HHOOK
+        user32.CallNextHookEx.argtypes = [wintypes.HHOOK, ctypes.c_int, wintypes.WPARAM, wintypes.LPARAM]
+        user32.CallNextHookEx.restype = LRESULT
+
+        class KBDLLHOOKSTRUCT(ctypes.Structure):
+            _fields_ = [('vkCode', wintypes.DWORD), ('scanCode', wintypes.DWORD), ('flags', wintypes.DWORD),
+                        ('time', wintypes.DWORD), ('dwExtraInfo', ctypes.c_size_t)]
+
+        def on_key(code, message, data):
+            if code == 0 and message in (self.WM_KEYDOWN, self.WM_SYSKEYDOWN):
+                key = ctypes.cast(data, ctypes.POINTER(KBDLLHOOKSTRUCT)).contents
+                if key.vkCode == self.virtual_key and not token.cancelled:
+                    token.cancel("ESC pressed")
+                    if self.on_cancel is not None:
+                        self.on_cancel()
+            return user32.CallNextHookEx(None, code, message, data)
+
+        callback = HOOKPROC(on_key)  # Keep a reference for the life of the hook
+        msg = wintypes.MSG()
+        # Create this thread's message queue before anyone posts WM_QUIT to it
+        user32.PeekMessageW(ctypes.byref(msg), None, 0, 0, 0)
+        self._thread_id = kernel32.GetCurrentThreadId()
+        hook = user32.SetWindowsHookExW(self.WH_KEYBOARD_LL, callback, kernel32.GetModuleHandleW(None), 0)
+        self._ready.set()
+        if not hook:
+            print("Warning: could not install the ESC keyboard hook")
+            return
+        try:
+            while user32.GetMessageW(ctypes.byref(msg), None, 0, 0) > 0:
+                user32.TranslateMessage(ctypes.byref(msg))
+                user32.DispatchMessageW(ctypes.byref(msg))
+        finally:
+            user32.UnhookWindowsHookEx(hook)
+
+
+class SignalTrigger(CancelTrigger):
+    """Ctrl+C / SIGTERM cancel the run; a second Ctrl+C raises KeyboardInterrupt (main thread only)"""
+
+    def __init__(self, signals=None):
+        if signals is None:
+            signals = [signal.SIGINT] + ([signal.SIGTERM] if hasattr(signal, 'SIGTERM') else [])
+        self.signals = signals
+        self._previous = {}
+
+    def arm(self, token):
+        def handler(signum, frame):
+            if token.cancelled and signum == signal.SIGINT:
+                raise KeyboardInterrupt
+            print("\nStopping after the current step (Ctrl+C again to abort)...", flush=True)
+            token.cancel(f"{signal.Signals(signum).name} received")
+
+        for signum in self.signals:
+            self._previous[signum] = signal.signal(signum, handler)
+
+    def disarm(self):
+        for signum, previous in self._previous.items():
+            signal.signal(signum, previous)
+        self._previous = {}
+
+
+class FileSentinelTrigger(CancelTrigger):
+    """Cancels when a stop file appears; a stale one is removed when arming"""
+
+    def __init__(self, path, interval=0.5):
+        self.path = Path(path)
+        self.interval = interval
+        self._disarmed = threading.Event()
+        self._thread = None
+
+    def arm(self, token):
+        if self.path.exists():
+            os.remove(self.path)
+        self._disarmed.clear()
+        self._thread = threading.Thread(target=self._watch, args=(token,), name="StopFile", daemon=True)
+        self._thread.start()
+
+    def _watch(self, token):
+        # Returns as soon as the trigger is disarmed
+        while not self._disarmed.wait(self.interval):
+            if self.path.exists():
+                token.cancel(f"Stop file {self.path} found")
+                return
+
+    def disarm(self):
+        self._disarmed.set()
+        if self._thread is not None:
+            self._thread.join(2)
+            self._thread = None
+
+
+class EventTrigger(CancelTrigger):
+    """Cancels when an event is set - e.g. a multiprocessing.Event the parent of a worker sets"""
+
+    def __init__(self, event, reason="Stop requested", interval=0.5):
+        self.event = event
+        self.reason = reason
+        self.interval = interval
+        self._disarmed = threading.Event()
+        self._thread = None
+
+    def arm(self, token):
+        self._disarmed.clear()
+        self._thread = threading.Thread(target=self._watch, args=(token,), name="StopEvent", daemon=True)
+        self._thread.start()
+
+    def _watch(self, token):
+        # Wakes as soon as the event is set; checks for disarm every interval
+        while not self._disarmed.is_set():
+            if self.event.wait(self.interval):
+                token.cancel(self.reason)
+                return
+
+    def disarm(self):
+        self._disarmed.set()
+        if self._thread is not None:
+            self._thread.join(2)
+            self._thread = None
+
+
+class CancellationService:
+    """A token plus the triggers that may cancel it, armed for the duration of a run"""
+
+    def __init__(self, triggers=None, token=None):
+        self.token = token if token is not None else CancellationToken()
+        self.triggers = list(triggers or [])
+        self.armed = False
+
+    def add_trigger(self, trigger):
+        self.triggers.append(trigger)
+        if self.armed:
+            trigger.arm(self.token)
+
+    def arm(self):
+        """Clear the token and start listening for stop requests"""
+        self.token.reset()
+        for trigger in self.triggers:
+            trigger.arm(self.token)
+        self.armed = True
+        return self.token
+
+    def disarm(self):
+        for trigger in self.triggers:
+            trigger.disarm()
+        self.armed = False
+
+    def __enter__(self):
+        return self.arm()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.disarm()
@@ -0,0 +1,100 @@
+"""
+Checkpoint journal for resumable sweeps
+
+Every completed input row is appended to a JSON-lines journal under a hash
+of its density, RIH WOB, POOH WOB and WHP, together with its extracted
+results. Rerunning the same input table replays journaled rows without
+touching Orpheus and continues from the first incomplete one. The density
+Orpheus is on is not journaled - it can change between runs - so a resumed
+run applies the density of its first row again.
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+
+
+CHECKPOINT_DIR = Path(__file__).parent / "checkpoints"
+INPUT_KEYS = ('Density_value', 'RIH_wob_value', 'POOH_wob_value', 'WHP_value')
+
+
+def row_key(row):
+    """Stable hash of one input row's parameters"""
+    values = ",".join(repr(float(row[key])) for key in INPUT_KEYS)
+    return hashlib.sha1(values.encode()).hexdigest()[:16]
+
+
+def journal_path_for(input_rows, directory=CHECKPOINT_DIR):
+    """Journal file for an input table - the same table always maps to the same file"""
+    digest = hashlib.sha1("|".join(row_key(row) for row in input_rows).encode()).hexdigest()[:12]
+    return Path(directory) / f"sweep_{digest}.jsonl"
+
+
+class CheckpointJournal:
+    """Append-only journal of completed rows"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._results = {}
+        self._file = None
+        self._load()
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Half-written last line from an interrupted run
+                    continue
+                # Older journals also hold 'density' entries, which are not trusted
+                if entry.get('type') == 'row':
+                    self._results[entry['key']] = entry['result']
+
+    def _append(self, entry):
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, 'a')
+        self._file.write(json.dumps(entry) + "\n")
+        # Durable before the next row starts
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def __len__(self):
+        return len(self._results)
+
+    def completed(self, row):
+        """True if this input row's results are already journaled"""
+        return row_key(row) in self._results
+
+    def result(self, row):
+        """Journaled results of an input row as a DataFrame, or None"""
+        import pandas as pd
+
+        columns = self._results.get(row_key(row))
+        if columns is None:
+            return None
+        return pd.DataFrame({column: pd.Series(values, dtype='float64') for column, values in columns.items()})
+
+    def record(self, row, frame):
+        """Journal a completed row with its results"""
+        columns = {column: frame[column].tolist() for column in frame.columns}
+        key = row_key(row)
+        self._append({'type': 'row', 'key': key,
+                      'inputs': {name: float(row[name]) for name in INPUT_KEYS},
+                      'result': columns})
+        self._results[key] = columns
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def discard(self):
+        """Delete the journal (e.g. once the whole sweep has completed)"""
+        self.close()
+        self._results.clear()
+        if self.path.exists():
+            self.path.unlink()
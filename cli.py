@@ -0,0 +1,173 @@
+"""
+Headless sweep runner
+
+Reads an input table (CSV or Parquet), runs the sweep against Orpheus and
+streams results to an output file, printing progress and throughput. Never
+imports tkinter and skips the updater, so scheduled batches start fast:
+
+    python cli.py inputs.csv -o results.parquet --resume --cache
+
+Input files are read by input_parser: columns are matched by header name
+(Density_value, RIH_wob_value, ... or the GUI's headings), otherwise the
+first four columns are density, RIH WOB, POOH WOB and WHP. Ctrl+C, SIGTERM or the --stop-file appearing stop the run
+inside the current step; finished rows stay in the output. --trace writes a
+Chrome trace of every row, step and UIA call (one file per worker process in
+parallel mode).
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+from input_parser import parse_input_file
+from cancellation import CancellationService, SignalTrigger, FileSentinelTrigger, Cancelled
+from tracing import tracer
+from perf_store import start_run
+from version import VERSION
+
+
+def read_input_rows(path):
+    """Input rows from a CSV/TSV/text or Parquet file; unusable lines are reported and skipped"""
+    parsed = parse_input_file(path)
+    if parsed.rejected:
+        print(f"Warning: {parsed.describe()}")
+    return parsed.rows
+
+
+class ConsoleProgress:
+    """Stands in for the GUI in run_automation_for_inputs: progress lines and a stop flag"""
+
+    def __init__(self, token, every=1):
+        self.token = token
+        self.every = every
+        self.start = time.perf_counter()
+        self.rows_done = 0
+        self.total_rows = 0
+
+    def update_progress(self, current, total):
+        self.total_rows = total
+        self.rows_done = current
+        if current == total or current % self.every == 0:
+            elapsed = time.perf_counter() - self.start
+            print(f"Row {current}/{total} ({elapsed:.0f}s elapsed)", flush=True)
+
+    def update_runtime(self):
+        pass
+
+    @property
+    def stop_automation(self):
+        return self.token.cancelled
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Run a stretch sensitivity sweep without the GUI")
+    parser.add_argument('input', help="input table (.csv or .parquet)")
+    parser.add_argument('-o', '--output', help="output file (.csv or .parquet); default: <input>_results.csv")
+    parser.add_argument('--flush-every', type=int, help="rows per output flush")
+    # No sensitivity mode until SENSITIVITY_OUTPUTS are confirmed against the live wizard
+    parser.add_argument('--mode', choices=('rows', 'parallel', 'surrogate'), default='rows',
+                        help="one Trip In and Out run per row (default), rows across every running Orpheus, "
+                             "or interpolated from sparse runs")
+    parser.add_argument('--tolerance', type=float, default=0.01, help="surrogate error tolerance (in)")
+    parser.add_argument('--no-plan', action='store_true', help="run rows in input order")
+    parser.add_argument('--resume', action='store_true', help="journal rows and resume an interrupted run")
+    parser.add_argument('--cache', action='store_true', help="reuse results cached for the open well")
+    parser.add_argument('--model-revision', default="", help="model revision label for the result cache")
+    parser.add_argument('--simulate', action='store_true', help="drive the simulated Orpheus instead")
+    parser.add_argument('--stop-file', help="stop the run when this file appears")
+    parser.add_argument('--progress-every', type=int, default=10, help="print progress every N rows")
+    parser.add_argument('--trace', help="write a Chrome trace (chrome://tracing, Perfetto) to this .json file")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    print(f"Well Automation v{VERSION} (headless)")
+
+    from Automation import run_automation_for_inputs
+    from result_sinks import open_sink
+
+    input_rows = read_input_rows(args.input)
+    if not input_rows:
+        print("No input rows")
+        return 1
+    output_path = Path(args.output) if args.output else Path(args.input).with_name(Path(args.input).stem + "_results.csv")
+    sink = open_sink(output_path, args.flush_every)
+    cancellation = CancellationService([SignalTrigger()])
+    if args.stop_file:
+        cancellation.add_trigger(FileSentinelTrigger(args.stop_file))
+    token = cancellation.token
+    progress = ConsoleProgress(token, args.progress_every)
+
+    if args.trace:
+        tracer.enable(args.trace)
+        if args.mode == 'parallel':
+            # Spawned workers enable their own tracer from the environment, one file each
+            trace = Path(args.trace)
+            os.environ['STRETCH_TRACE'] = str(trace.with_name(trace.stem + ".{pid}" + (trace.suffix or ".json")))
+
+    backend = None
+    if args.simulate:
+        from simulated_backend import SimulatedOrpheus
+        backend = SimulatedOrpheus()
+
+    print(f"{len(input_rows)} input rows from {args.input} -> {output_path}")
+    start = time.perf_counter()
+    journal = None
+    unrun = []
+    start_run()
+    cancellation.arm()
+    try:
+        if args.mode == 'parallel':
+            from parallel_runner import run_parallel_for_inputs
+            kwargs = {}
+            if args.simulate:
+                from simulated_backend import simulated_instance
+                kwargs = {'targets': [1, 2], 'backend_factory': simulated_instance}
+            _, stats = run_parallel_for_inputs(input_rows, sink=sink, gui=progress, **kwargs)
+            unrun = sorted(position for worker_stats in stats for position in worker_stats.unrun)
+        elif args.mode == 'surrogate':
+            from surrogate import run_surrogate_sweep
+            run_surrogate_sweep(input_rows, tolerance=args.tolerance, sink=sink, backend=backend,
+                                plan=not args.no_plan, cancel_token=token)
+        else:
+            from checkpoint import CheckpointJournal, journal_path_for
+            from result_cache import ResultCache
+            if args.resume:
+                journal = CheckpointJournal(journal_path_for(input_rows))
+                if len(journal) > 0:
+                    print(f"Resuming: {sum(1 for row in input_rows if journal.completed(row))} rows already done")
+            run_automation_for_inputs(input_rows, gui=progress, backend=backend, sink=sink, checkpoint=journal,
+                                      plan=not args.no_plan,
+                                      result_cache=ResultCache() if args.cache else None,
+                                      model_revision=args.model_revision, cancel_token=token)
+    except (KeyboardInterrupt, Cancelled):
+        print("\nStopped - finished rows are in the output file")
+        return 130
+    except Exception as e:
+        print(f"Error: {e}")
+        return 1
+    finally:
+        cancellation.disarm()
+        sink.close()
+
+    if token.cancelled:
+        print(f"\nStopped ({token.reason}) - finished rows are in {output_path}")
+        return 130
+
+    elapsed = time.perf_counter() - start
+    if journal is not None:
+        journal.discard()
+    written = sink.rows_written
+    print(f"\n{written} rows in {elapsed:.1f}s ({written / elapsed if elapsed else 0:.2f} rows/s, "
+          f"{elapsed / max(written, 1):.2f}s/row) -> {output_path}")
+    if unrun:
+        # 1-based positions among the input rows
+        print(f"Incomplete: {len(unrun)} input rows not run (failed workers): "
+              f"{', '.join(str(position + 1) for position in unrun[:20])}{' ...' if len(unrun) > 20 else ''}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""
+Keyed cache of resolved UI element handles
+
+Stable controls (the Trip In and Out button, the RIH/POOH txtData edits, the
+graph window's combo box and menu) are looked up once and then validated with
+a cheap runtime-id / bounding-rect probe before each reuse. A full search only
+happens when a handle is missing or has gone stale, and it is scoped to the
+control's cached parent rather than the whole main window.
+"""
+
+
+class ElementCache:
+    """Resolves registered element keys through a UIBackend, caching the handles"""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._locators = {}
+        self._entries = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def register(self, key, automation_id=None, name=None, parent=None, index=0):
+        """
+        Describe how to find key: by AutomationId (defaults to key) or by Name,
+        below the element registered as parent (or the root when None).
+        """
+        if automation_id is None and name is None:
+            automation_id = key
+        self._locators[key] = (automation_id, name, parent, index)
+
+    def resolve(self, root, key):
+        """Return the handle for key, searching only if it is missing or stale"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            handle, fingerprint = entry
+            if self.backend.is_alive(handle, fingerprint):
+                self.hits += 1
+                return handle
+            self.invalidations += 1
+            del self._entries[key]
+
+        self.misses += 1
+        automation_id, name, parent, index = self._locators[key]
+        scope = self.resolve(root, parent) if parent is not None else root
+        if scope is None:
+            return None
+
+        if automation_id is not None:
+            handle = self.backend.find_by_automation_id(scope, automation_id, index)
+        else:
+            handle = self.backend.find_by_name(scope, name)
+
+        if handle is not None:
+            self._entries[key] = (handle, self.backend.fingerprint(handle))
+        return handle
+
+    def invalidate(self, key=None):
+        """Forget one cached handle, or all of them when key is None"""
+        if key is None:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+        elif self._entries.pop(key, None) is not None:
+            self.invalidations += 1
+
+    def stats(self):
+        """Hit/miss/invalidation counters as a dict"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'invalidations': self.invalidations,
+            'cached': len(self._entries),
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+    def reset_stats(self):
+        """Zero the counters (cached handles are kept)"""
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
@@ -0,0 +1,120 @@
+"""
+Clipboard-based capture of the Modeled Data grid
+
+Selecting all cells of grdData and copying them hands the whole table over in
+one tab-delimited string, so capture time no longer grows with one UIA call
+per cell. Clipboard access goes through a small interface: Win32Clipboard on
+Windows, MemoryClipboard as a local stand-in (used by the simulated backend).
+"""
+import time
+
+
+# Markers Modeled_Data_df uses to recognise grid header rows
+HEADER_MARKERS = ('Tubing Depth', 'Stretch', '\r(')
+
+
+class Win32Clipboard:
+    """System clipboard through pywin32"""
+
+    def _open(self, retries=10):
+        import win32clipboard
+        # Another process may briefly hold the clipboard open
+        for attempt in range(retries):
+            try:
+                win32clipboard.OpenClipboard()
+                return win32clipboard
+            except Exception:
+                if attempt == retries - 1:
+                    raise
+                time.sleep(0.01)
+
+    def get_text(self):
+        import win32con
+        clipboard = self._open()
+        try:
+            if clipboard.IsClipboardFormatAvailable(win32con.CF_UNICODETEXT):
+                return clipboard.GetClipboardData(win32con.CF_UNICODETEXT)
+            return ''
+        finally:
+            clipboard.CloseClipboard()
+
+    def set_text(self, text):
+        import win32con
+        clipboard = self._open()
+        try:
+            clipboard.EmptyClipboard()
+            clipboard.SetClipboardData(win32con.CF_UNICODETEXT, text)
+        finally:
+            clipboard.CloseClipboard()
+
+    def sequence(self):
+        """Changes every time the clipboard contents change"""
+        import win32clipboard
+        return win32clipboard.GetClipboardSequenceNumber()
+
+
+class MemoryClipboard:
+    """In-process clipboard with the same interface as Win32Clipboard"""
+
+    def __init__(self, text=''):
+        self._text = text
+        self._sequence = 0
+
+    def get_text(self):
+        return self._text
+
+    def set_text(self, text):
+        self._text = text
+        self._sequence += 1
+
+    def sequence(self):
+        return self._sequence
+
+
+def grid_to_text(rows):
+    """Format grid rows the way a DataGridView copy does (tabs and CRLF)"""
+    return '\r\n'.join('\t'.join(str(cell) for cell in row) for row in rows)
+
+
+def _is_header(cells):
+    return any(marker in cell for cell in cells for marker in HEADER_MARKERS)
+
+
+def parse_grid_clipboard(text):
+    """
+    Parse a tab-delimited grid copy into a numeric DataFrame.
+
+    Rows are split on CRLF only, so header cells with a bare '\\r' such as
+    'Tubing Depth\\r(ft)' stay intact. The last header row before the data
+    names the columns; a leading row-number column is dropped. Returns None
+    when the copy has no recognisable header row.
+    """
+    import pandas as pd
+
+    text = text.strip('\r\n')
+    if not text:
+        return None
+    lines = text.split('\r\n') if '\r\n' in text else text.split('\n')
+    rows = [line.split('\t') for line in lines if line.strip()]
+
+    headers = []
+    data = []
+    for cells in rows:
+        if _is_header(cells):
+            headers = cells
+        elif headers:
+            data.append(cells)
+
+    # A copy without header text can't be mapped to columns reliably
+    if not headers:
+        return None
+
+    # Drop the row-number column unless the copy left it out
+    first = 1 if headers and not _is_header(headers[:1]) else 0
+    columns = {}
+    for i in range(first, len(headers)):
+        values = [cells[i] if i < len(cells) else None for cells in data]
+        columns[i] = pd.to_numeric(pd.Series(values, dtype=object).str.replace(',', ''), errors='coerce')
+    df = pd.DataFrame(columns)
+    df.columns = headers[first:]
+    return df
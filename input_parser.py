@@ -0,0 +1,191 @@
+"""
+Input table parsing for pasted text and input files
+
+The text goes through one pandas read_csv call (C parser) and column-wise
+to_numeric, so thousands of pasted Excel rows parse in milliseconds. The
+delimiter (tab, comma, semicolon, pipe or whitespace) and a header line are
+detected from the text; a header lets columns be matched by name, otherwise
+the first four columns are taken in the GUI's order (density, RIH WOB,
+POOH WOB, WHP). In semicolon-separated text a comma is the decimal
+separator; anywhere else a comma is only read as thousands grouping
+(1,350) and any other comma is rejected rather than guessed at. Lines that
+cannot be used are reported with a reason instead of being dropped silently.
+"""
+import io
+import re
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from checkpoint import INPUT_KEYS
+
+
+DELIMITERS = ['\t', ',', ';', '|']
+
+# A number with Excel thousands grouping, e.g. -10,000 or 1,350.5
+THOUSANDS = r'-?\d{1,3}(?:,\d{3})+(?:\.\d+)?'
+
+# Header words identifying each input column
+HEADER_WORDS = {
+    'Density_value': ('density', 'ppg', 'fluid'),
+    'RIH_wob_value': ('rih',),
+    'POOH_wob_value': ('pooh',),
+    'WHP_value': ('whp', 'wellhead', 'pressure'),
+}
+
+
+class ParsedInput:
+    """Parsed input rows plus the lines that were rejected"""
+
+    def __init__(self, frame, rejected, delimiter, header):
+        self.frame = frame          # float64 DataFrame with INPUT_KEYS columns
+        self.rejected = rejected    # (line number, line text, reason)
+        self.delimiter = delimiter
+        self.header = header        # Header fields, or None
+
+    @property
+    def rows(self):
+        """Input rows as dicts, as the runners take them"""
+        return [dict(zip(INPUT_KEYS, values)) for values in self.frame.itertuples(index=False)]
+
+    def __len__(self):
+        return len(self.frame)
+
+    def describe(self, limit=10):
+        lines = [f"{len(self.frame)} rows read, {len(self.rejected)} lines rejected"]
+        for number, text, reason in self.rejected[:limit]:
+            lines.append(f"  line {number}: {reason} - {text.strip()[:60]!r}")
+        if len(self.rejected) > limit:
+            lines.append(f"  ... and {len(self.rejected) - limit} more")
+        return "\n".join(lines)
+
+
+def detect_delimiter(lines):
+    """Delimiter giving 4+ fields on the most sample lines (None = whitespace)"""
+    sample = pd.Series([line for line in lines[:50] if line.strip()])
+    if sample.empty:
+        return '\t'
+    best, best_score = None, 0
+    for delimiter in DELIMITERS:
+        fields = sample.str.count(re.escape(delimiter)) + 1
+        score = int((fields >= len(INPUT_KEYS)).sum())
+        if score > best_score:
+            best, best_score = delimiter, score
+    return best
+
+
+def parse_numbers(raw, delimiter):
+    """
+    Stripped cell strings to float64 and a mask of cells rejected as ambiguous.
+    In semicolon tables a comma is the decimal separator (9,5 is 9.5);
+    elsewhere only Excel thousands grouping (-10,000 or 1,350.5) is accepted
+    and any other comma is ambiguous.
+    """
+    commas = raw.str.count(',')
+    if delimiter == ';':
+        ambiguous = (commas > 1) | ((commas > 0) & raw.str.contains('.', regex=False))
+        raw = raw.str.replace(',', '.', regex=False)
+    else:
+        thousands = raw.str.fullmatch(THOUSANDS).fillna(False).astype(bool)
+        ambiguous = (commas > 0) & ~thousands
+        raw = raw.mask(thousands, raw.str.replace(',', '', regex=False))
+    return pd.to_numeric(raw, errors='coerce').mask(ambiguous), ambiguous
+
+
+def _any_numeric(fields, delimiter):
+    values, _ = parse_numbers(pd.Series(fields, dtype=object).astype(str).str.strip(), delimiter)
+    return bool(values.notna().any())
+
+
+def match_header(header):
+    """Column position per input key from header words, or None if they are ambiguous"""
+    positions = {}
+    for key, words in HEADER_WORDS.items():
+        matches = [i for i, name in enumerate(header) if key.lower() == str(name).strip().lower()
+                   or any(word in str(name).lower() for word in words)]
+        if not matches:
+            return None
+        positions[key] = matches[0]
+    if len(set(positions.values())) != len(positions):
+        return None
+    return positions
+
+
+def parse_input_text(text):
+    """Parse pasted or file text into a ParsedInput"""
+    lines = text.splitlines()
+    delimiter = detect_delimiter(lines)
+    if not lines:
+        return ParsedInput(pd.DataFrame(columns=list(INPUT_KEYS), dtype='float64'), [], delimiter, None)
+    # Widest line, so no line has more fields than the table has columns
+    text_lines = pd.Series(lines)
+    if delimiter:
+        fields = text_lines.str.count(re.escape(delimiter)) + 1
+    else:
+        fields = text_lines.str.strip().str.count(r'\s+') + 1
+    width = max(len(INPUT_KEYS), int(fields.max()))
+    table = pd.read_csv(io.StringIO("\n".join(lines)), sep=delimiter if delimiter else r'\s+', header=None,
+                        names=range(width), dtype=str, skip_blank_lines=False, keep_default_na=False)
+    # One row per text line (read_csv keeps blank lines with skip_blank_lines=False)
+    table.index = np.arange(1, len(table) + 1)
+
+    filled = table.apply(lambda column: column.str.strip() != '')
+    blank = ~filled.any(axis=1)
+
+    # Header: the first non-blank line if it names the columns or has no numbers at all -
+    # anything else is a data line and is checked (and rejected) like the rest
+    header = None
+    positions = {key: i for i, key in enumerate(INPUT_KEYS)}
+    first = blank.idxmin() if (~blank).any() else None
+    if first is not None:
+        fields = table.loc[first].tolist()
+        matched = match_header(fields)
+        if matched is not None or not _any_numeric([field for field in fields if field.strip()], delimiter):
+            header = [field.strip() for field in fields if field.strip()]
+            positions = matched or positions
+            blank.loc[first] = True
+
+    columns, ambiguous = {}, {}
+    for key, position in positions.items():
+        columns[key], ambiguous[key] = parse_numbers(table[position].str.strip(), delimiter)
+    values = pd.DataFrame(columns, index=table.index)
+    ambiguous = pd.DataFrame(ambiguous, index=table.index)
+
+    invalid = values.isna().any(axis=1) & ~blank
+    rejected = []
+    for number in table.index[invalid]:
+        present = int(filled.loc[number].sum())
+        if present < len(INPUT_KEYS):
+            reason = f"expected {len(INPUT_KEYS)} values, found {present}"
+        else:
+            bad = [key for key in INPUT_KEYS if np.isnan(values.at[number, key])]
+            unclear = [key for key in bad if ambiguous.at[number, key]]
+            if unclear:
+                cells = ", ".join(f"{key}={table.at[number, positions[key]].strip()!r}" for key in unclear)
+                reason = f"ambiguous comma (thousands or decimal separator?): {cells}"
+            else:
+                cells = ", ".join(f"{key}={table.at[number, positions[key]].strip()!r}" for key in bad)
+                reason = f"not a number: {cells}"
+        rejected.append((int(number), lines[number - 1], reason))
+
+    frame = values[~invalid & ~blank].astype('float64').reset_index(drop=True)
+    return ParsedInput(frame, rejected, delimiter, header)
+
+
+def parse_input_file(path):
+    """Parse a CSV/TSV/text or Parquet input file into a ParsedInput"""
+    path = Path(path)
+    if path.suffix.lower() not in ('.parquet', '.pq'):
+        return parse_input_text(path.read_text(encoding='utf-8-sig'))
+
+    table = pd.read_parquet(path)
+    positions = match_header(list(table.columns))
+    if positions is None:
+        if table.shape[1] < len(INPUT_KEYS):
+            raise Exception(f"{path} needs the columns {', '.join(INPUT_KEYS)}")
+        positions = {key: i for i, key in enumerate(INPUT_KEYS)}
+    values = pd.DataFrame({key: pd.to_numeric(table.iloc[:, position], errors='coerce')
+                           for key, position in positions.items()})
+    invalid = values.isna().any(axis=1)
+    rejected = [(int(i) + 1, "", "missing or non-numeric value") for i in np.flatnonzero(invalid.to_numpy())]
+    return ParsedInput(values[~invalid].astype('float64').reset_index(drop=True), rejected, None,
+                       [str(column) for column in table.columns])
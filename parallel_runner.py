@@ -0,0 +1,247 @@
+"""
+Parallel sweeps across several Orpheus instances
+
+Every running Orpheus main window is found by process id and gets its own
+worker process, which binds a Button_Repository to that instance and runs
+its shard of the input table through run_automation_for_inputs. Workers are
+separate processes so each has its own COM apartment and UIA client.
+
+Rows are sharded by density group (a group never spans two workers, so each
+density is applied once per sweep), largest groups first onto the least
+loaded worker. Each worker streams its rows back over a queue and the parent
+passes them to the sink in the original input order. A stop sets a shared
+event that cancels every worker's token, so workers stop inside their current
+step and close their sinks and traces; only a worker that does not stop
+within join_timeout is terminated.
+"""
+import multiprocessing
+import queue
+import time
+from result_sinks import ResultSink, MemorySink, ReorderingSink
+from cancellation import CancellationService, EventTrigger
+from perf_store import current_run, start_run
+
+
+def discover_orpheus_processes(auto_id="frmOrpheus"):
+    """Process ids of every running Orpheus main window"""
+    from pywinauto import findwindows
+    elements = findwindows.find_elements(auto_id=auto_id, backend="uia", top_level_only=True)
+    return sorted({element.process_id for element in elements})
+
+
+def orpheus_instance(pid):
+    """Backend factory: the live Orpheus instance with this process id"""
+    from ui_backend import UIABackend
+    return UIABackend(process=pid)
+
+
+def shard_rows(input_rows, workers):
+    """
+    Split input row positions into at most workers shards. Density groups
+    stay whole; within a shard they run one after the other, each in input
+    order.
+    """
+    groups = {}
+    for position, row in enumerate(input_rows):
+        groups.setdefault(row['Density_value'], []).append(position)
+
+    shards = [[] for _ in range(workers)]
+    # Largest group first onto the shard with the fewest rows
+    for density in sorted(groups, key=lambda d: len(groups[d]), reverse=True):
+        min(shards, key=len).extend(groups[density])
+    return [shard for shard in shards if shard]
+
+
+class WorkerStats:
+    """Throughput of one worker"""
+
+    def __init__(self, target, rows=0, density_changes=0, seconds=0.0, error=None):
+        self.target = target
+        self.rows = rows
+        self.density_changes = density_changes
+        self.seconds = seconds
+        self.error = error
+        self.unrun = []  # Input positions a failed worker never ran
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def describe(self):
+        line = (f"Worker {self.target}: {self.rows} rows, {self.density_changes} density changes, "
+                f"{self.seconds:.1f}s ({self.rows_per_second:.2f} rows/s)")
+        if self.error:
+            line += f" - FAILED after {self.rows} rows, {len(self.unrun)} not run: {self.error}"
+        return line
+
+
+class _QueueSink(ResultSink):
+    """Worker side: sends each row's frame to the parent tagged with its input position"""
+
+    def __init__(self, results, worker, positions):
+        super().__init__()
+        self.results = results
+        self.worker = worker
+        self.positions = positions
+        self._next = 0
+
+    def write(self, frame):
+        self.results.put(('row', self.worker, self.positions[self._next], frame.copy()))
+        self._next += 1
+        self.rows_written += 1
+
+    def skip(self):
+        self.results.put(('row', self.worker, self.positions[self._next], None))
+        self._next += 1
+
+
+def _run_worker(backend_factory, target, worker, rows, positions, results, stop, run_id):
+    """Worker process: run one shard on one Orpheus instance until done or stop is set"""
+    from Automation import run_automation_for_inputs
+
+    # Timings are logged under the parent's sweep
+    start_run(run_id)
+    start = time.perf_counter()
+    cancellation = CancellationService([EventTrigger(stop, "Parallel run stopped")])
+    try:
+        backend = backend_factory(target)
+        with cancellation as token:
+            # Shards are already in density-group order, so rows arrive at the sink as run
+            run_automation_for_inputs(rows, backend=backend, sink=_QueueSink(results, worker, positions),
+                                      plan=False, cancel_token=token)
+        error = None
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    results.put(('done', worker, time.perf_counter() - start, error))
+
+
+def run_parallel_for_inputs(input_rows, targets=None, backend_factory=orpheus_instance, sink=None, gui=None,
+                            join_timeout=30):
+    """
+    Run input_rows across several Orpheus instances.
+
+    Args:
+        input_rows: List of dicts with keys: Density_value, RIH_wob_value, POOH_wob_value, WHP_value
+        targets: Instances to use, passed one per worker to backend_factory
+            (defaults to the process ids of every running Orpheus)
+        backend_factory: Picklable callable target -> UI backend, called in
+            the worker process (e.g. simulated_backend.simulated_instance)
+        sink: Optional ResultSink (defaults to a MemorySink); gets rows in input order
+        gui: Optional GUI reference for the stop flag, progress and partial results
+        join_timeout: Seconds workers get to stop after a stop request before
+            they are terminated
+
+    Returns:
+        (results, stats) - combined DataFrame (None for sinks that don't keep
+        results in memory) and a WorkerStats per worker. A worker that fails
+        has its error and the input positions it did not run (passed to the
+        sink as skipped rows) in its stats.
+    """
+    if targets is None:
+        targets = discover_orpheus_processes()
+        if not targets:
+            raise Exception("No running Orpheus instance found")
+    if sink is None:
+        sink = MemorySink()
+
+    shards = shard_rows(input_rows, len(targets))
+    stats = []
+    for target, shard in zip(targets, shards):
+        densities = {input_rows[position]['Density_value'] for position in shard}
+        stats.append(WorkerStats(target, density_changes=len(densities)))
+    print(f"Parallel: {len(input_rows)} rows on {len(shards)} Orpheus instances "
+          f"({', '.join(str(len(shard)) for shard in shards)} rows)")
+
+    # spawn on every platform - workers must not inherit the parent's COM state
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    stop = context.Event()
+    workers = []
+    for worker, (target, shard) in enumerate(zip(targets, shards)):
+        rows = [input_rows[position] for position in shard]
+        process = context.Process(target=_run_worker, daemon=True,
+                                  args=(backend_factory, target, worker, rows, shard, results, stop, current_run()))
+        process.start()
+        workers.append(process)
+
+    output = ReorderingSink(sink, range(len(input_rows)))
+    running = set(range(len(workers)))
+    pending = [set(shard) for shard in shards]
+
+    def worker_failed(worker, error):
+        # Skip the rows it never ran, so the rows after them still reach the sink
+        stats[worker].error = error
+        stats[worker].unrun = sorted(pending[worker])
+        for position in stats[worker].unrun:
+            output.write_row(position, None)
+        pending[worker].clear()
+        running.discard(worker)
+
+    done_rows = 0
+    stop_deadline = None
+    try:
+        while running:
+            if gui and gui.stop_automation and stop_deadline is None:
+                # Workers finish cancelling their current step; keep taking their results meanwhile
+                stop.set()
+                stop_deadline = time.monotonic() + join_timeout
+            if stop_deadline is not None and time.monotonic() > stop_deadline:
+                break
+            try:
+                message = results.get(timeout=0.5)
+            except queue.Empty:
+                # A worker that died without reporting (e.g. killed) is finished too
+                for worker in list(running):
+                    if not workers[worker].is_alive() and workers[worker].exitcode != 0:
+                        worker_failed(worker, f"worker exited with code {workers[worker].exitcode}")
+                continue
+
+            if message[0] == 'row':
+                _, worker, position, frame = message
+                output.write_row(position, frame)
+                pending[worker].discard(position)
+                stats[worker].rows += 1
+                done_rows += 1
+                if gui:
+                    gui.update_progress(done_rows, len(input_rows))
+                    if frame is not None and hasattr(gui, 'show_partial_results'):
+                        gui.show_partial_results(frame)
+            else:
+                _, worker, seconds, error = message
+                stats[worker].seconds = seconds
+                if error:
+                    worker_failed(worker, error)
+                running.discard(worker)
+    finally:
+        stop.set()
+        deadline = stop_deadline if stop_deadline is not None else time.monotonic() + join_timeout
+        for worker, process in enumerate(workers):
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                # Last resort - the worker did not stop within join_timeout
+                process.terminate()
+                process.join()
+                if worker in running:
+                    worker_failed(worker, "did not stop in time - terminated")
+        output.close()
+
+    for worker_stats in stats:
+        print(worker_stats.describe())
+    unrun = sum(len(worker_stats.unrun) for worker_stats in stats)
+    if unrun:
+        print(f"Parallel: {unrun} of {len(input_rows)} rows not run (failed workers)")
+    return sink.result(), stats
+
+
+if __name__ == "__main__":
+    # Four simulated instances, 2s per calculation
+    import functools
+    from simulated_backend import simulated_instance
+
+    inputs = [{'Density_value': density, 'RIH_wob_value': -1500 * i, 'POOH_wob_value': 1350, 'WHP_value': 0}
+              for density in (8.0, 8.5, 9.0, 9.5) for i in range(3)]
+    factory = functools.partial(simulated_instance, latencies={'calculate': 2.0})
+    start = time.perf_counter()
+    result_df, _ = run_parallel_for_inputs(inputs, targets=[1, 2, 3, 4], backend_factory=factory)
+    print(result_df)
+    print(f"\n{len(inputs)} rows in {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,201 @@
+"""
+Partitioned, columnar performance log
+
+Timing records are stored per code version and per run, one file per saved
+batch, with every column as its own NumPy array:
+
+    perf_log/<table>/version=<version>/run=<run id>/part-<ms>-<pid>-<n>.npz
+
+Readers load only the columns they ask for and can skip partitions by
+version or run, and the analyzer only has to read parts it has not seen
+before. The version is the git commit of the tree (plus '-dirty' for local
+changes), falling back to version.py outside a checkout. A run is one sweep
+(GUI run, CLI invocation); parallel workers are passed their parent's run
+id and start_run with it.
+
+Tables:
+    timings   timestamp, row, function, elapsed (seconds)
+    searches  timestamp, row, step, call, condition, scope, calls, elements, elapsed
+
+A performance_log.csv left by older versions is imported once as version
+'legacy' and renamed to performance_log.csv.imported.
+"""
+import itertools
+import os
+import subprocess
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from version import VERSION
+
+
+STORE_DIR = Path(__file__).parent / "perf_log"
+LEGACY_CSV = Path(__file__).parent / "performance_log.csv"
+
+# Column names and dtypes of each table, in record order
+TABLE_COLUMNS = {
+    'timings': [('timestamp', 'float64'), ('row', 'int64'), ('function', str), ('elapsed', 'float64')],
+    'searches': [('timestamp', 'float64'), ('row', 'int64'), ('step', str), ('call', str), ('condition', str),
+                 ('scope', str), ('calls', 'int64'), ('elements', 'int64'), ('elapsed', 'float64')],
+}
+
+_version = None
+_run_id = None
+_store = None
+_store_lock = threading.Lock()
+_part_numbers = itertools.count()
+
+
+def code_version():
+    """git describe of the tree ('<tag>-<n>-g<hash>[-dirty]'), or the app version"""
+    global _version
+    if _version is None:
+        try:
+            result = subprocess.run(['git', 'describe', '--always', '--dirty'], cwd=Path(__file__).parent,
+                                    capture_output=True, text=True, timeout=5)
+            _version = result.stdout.strip() if result.returncode == 0 else ""
+        except (OSError, subprocess.SubprocessError):
+            _version = ""
+        if not _version:
+            _version = f"v{VERSION}"
+    return _version
+
+
+def start_run(run_id=None):
+    """Begin a new run (one sweep); returns its id"""
+    global _run_id
+    _run_id = run_id or f"{datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}"
+    return _run_id
+
+
+def current_run():
+    """Id of the running sweep (the parent's in a parallel worker)"""
+    if _run_id is None:
+        start_run()
+    return _run_id
+
+
+def _partition_name(value):
+    # Keep partition directory names filesystem-safe
+    return "".join(c if c.isalnum() or c in '.-_+' else '_' for c in str(value))
+
+
+class PerfStore:
+    """Columnar performance tables partitioned by version and run"""
+
+    def __init__(self, root=STORE_DIR):
+        self.root = Path(root)
+
+    def append(self, table, columns, run_id=None, version=None):
+        """Write one batch (dict of equal-length columns) as a new part; returns its path"""
+        run_id = run_id or current_run()
+        version = version or code_version()
+        directory = self.root / table / f"version={_partition_name(version)}" / f"run={_partition_name(run_id)}"
+        directory.mkdir(parents=True, exist_ok=True)
+        arrays = {}
+        for name, values in columns.items():
+            values = np.asarray(values)
+            # Strings as fixed-width unicode so the file loads without pickle
+            arrays[name] = values.astype(str) if values.dtype == object else values
+        path = directory / f"part-{time.time_ns() // 1_000_000}-{os.getpid()}-{next(_part_numbers)}.npz"
+        # Readers never see a half-written part
+        temporary = path.with_suffix('.tmp')
+        with open(temporary, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(temporary, path)
+        return path
+
+    def append_records(self, table, records, run_id=None, version=None):
+        """Write record tuples (in TABLE_COLUMNS order) as a new part"""
+        columns = list(zip(*records))
+        return self.append(table, {name: np.array(values, dtype=dtype)
+                                   for (name, dtype), values in zip(TABLE_COLUMNS[table], columns)},
+                           run_id, version)
+
+    def parts(self, table, version=None, run=None):
+        """Part files of a table, oldest first, optionally for one version / run"""
+        directory = self.root / table
+        if not directory.exists():
+            return []
+        versions = f"version={_partition_name(version)}" if version else "version=*"
+        runs = f"run={_partition_name(run)}" if run else "run=*"
+        return sorted(directory.glob(f"{versions}/{runs}/part-*.npz"),
+                      key=lambda path: (path.name.split('-')[1], str(path)))
+
+    def recent_parts(self, table, runs):
+        """Part files of the runs most recently written to (at most runs of them), oldest first"""
+        parts = self.parts(table)
+        last = {}
+        for i, path in enumerate(parts):
+            last[path.parent] = i
+        keep = set(sorted(last, key=last.get)[-runs:])
+        return [path for path in parts if path.parent in keep]
+
+    def versions(self, table='timings'):
+        directory = self.root / table
+        if not directory.exists():
+            return []
+        return sorted(path.name.split('=', 1)[1] for path in directory.glob("version=*"))
+
+    def runs(self, table='timings', version=None):
+        return sorted({path.parent.name.split('=', 1)[1] for path in self.parts(table, version)})
+
+    @staticmethod
+    def read_part(path, columns=None):
+        """One part as a DataFrame with its version and run_id"""
+        with np.load(path, allow_pickle=False) as data:
+            names = columns or list(data.files)
+            frame = pd.DataFrame({name: data[name] for name in names if name in data.files})
+        frame['version'] = path.parent.parent.name.split('=', 1)[1]
+        frame['run_id'] = path.parent.name.split('=', 1)[1]
+        return frame
+
+    def read(self, table='timings', columns=None, version=None, run=None, parts=None):
+        """Rows of a table (only the given columns), sorted by timestamp"""
+        if parts is None:
+            parts = self.parts(table, version, run)
+        read_columns = None if columns is None else list(dict.fromkeys(list(columns) + ['timestamp']))
+        frames = [self.read_part(path, read_columns) for path in parts]
+        if not frames:
+            return pd.DataFrame(columns=(columns or []) + ['version', 'run_id'])
+        frame = pd.concat(frames, ignore_index=True)
+        return frame.sort_values('timestamp', kind='stable').reset_index(drop=True)
+
+    def import_csv(self, csv_path, version="legacy"):
+        """Import a timestamp,function,elapsed CSV log (one run per day); returns rows imported"""
+        frame = pd.read_csv(csv_path)
+        if frame.empty:
+            return 0
+        stamps = pd.to_datetime(frame['timestamp'])
+        frame['timestamp'] = stamps.astype('int64') / 1e9
+        frame['elapsed'] = pd.to_numeric(frame['elapsed'], errors='coerce')
+        frame['row'] = -1
+        frame = frame.dropna(subset=['elapsed'])
+        for day, group in frame.groupby(stamps.dt.strftime('%Y%m%d')):
+            self.append('timings', {'timestamp': group['timestamp'].to_numpy('float64'),
+                                    'row': group['row'].to_numpy('int64'),
+                                    'function': group['function'].astype(str).to_numpy(),
+                                    'elapsed': group['elapsed'].to_numpy('float64')},
+                        run_id=f"legacy-{day}", version=version)
+        return len(frame)
+
+
+def default_store():
+    """The store next to the application, importing a legacy performance_log.csv once"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                store = PerfStore()
+                if LEGACY_CSV.exists():
+                    try:
+                        count = store.import_csv(LEGACY_CSV)
+                        os.replace(LEGACY_CSV, LEGACY_CSV.with_name(LEGACY_CSV.name + ".imported"))
+                        print(f"Imported {count} timings from {LEGACY_CSV.name} into {store.root}")
+                    except (OSError, ValueError, KeyError) as e:
+                        print(f"Warning: could not import {LEGACY_CSV}: {e}")
+                _store = store
+    return _store
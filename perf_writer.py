@@ -0,0 +1,116 @@
+"""
+Background writer for the performance log
+
+Timing and search records are handed to a bounded queue and written to the
+perf_log store by one daemon thread, in batches of batch_size records or
+every interval_ms milliseconds, whichever comes first. Logging a record is a
+put_nowait: the automation thread never waits on the disk, and when the
+queue is full (the disk is far behind) the record is dropped and counted
+rather than stalling the sweep - pass block=True to apply back-pressure
+instead. flush() waits until everything queued so far is on disk; the
+runners call it when a sweep ends or is cancelled, and it runs at exit.
+A crash loses at most the last interval of records.
+"""
+import atexit
+import queue
+import threading
+import time
+from perf_store import current_run, default_store
+
+
+_FLUSH = object()
+
+
+class PerfLogWriter:
+    """Bounded queue of (table, record) drained to a PerfStore in batches"""
+
+    def __init__(self, store_factory, max_pending=10000, batch_size=500, interval_ms=2000, block=False):
+        self.store_factory = store_factory  # Called on the writer thread (may import a legacy log)
+        self.batch_size = batch_size
+        self.interval = interval_ms / 1000.0
+        self.block = block
+        self.store = None
+        self.enabled = True  # False discards records (e.g. benchmarks on the simulator)
+        self.dropped = 0
+        self.written = 0
+        self._queue = queue.Queue(max_pending)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def log(self, table, record):
+        """Queue one record (a tuple in perf_store.TABLE_COLUMNS order)"""
+        if not self.enabled:
+            return
+        if self._thread is None:
+            self._start()
+        item = (table, current_run(), record)
+        if self.block:
+            self._queue.put(item)
+            return
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+    def take_dropped(self):
+        """Records dropped since the last call"""
+        with self._lock:
+            dropped, self.dropped = self.dropped, 0
+        return dropped
+
+    def flush(self, timeout=10):
+        """Write everything queued so far; False if the writer did not finish in time"""
+        if self._thread is None:
+            return True
+        done = threading.Event()
+        try:
+            self._queue.put((_FLUSH, None, done), timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="PerfLogWriter", daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+
+    def _run(self):
+        store = self.store = self.store_factory()
+        batches = {}   # (table, run id) -> records
+        pending = 0
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                table, run_id, record = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                table = None  # Interval elapsed
+            if table is not None and table is not _FLUSH:
+                batches.setdefault((table, run_id), []).append(record)
+                pending += 1
+                if deadline is None:
+                    deadline = time.monotonic() + self.interval
+                if pending < self.batch_size:
+                    continue
+            self._write(store, batches)
+            batches, pending, deadline = {}, 0, None
+            if table is _FLUSH:
+                record.set()  # A flush item carries its Event as the record
+
+    def _write(self, store, batches):
+        for (table, run_id), records in batches.items():
+            try:
+                store.append_records(table, records, run_id=run_id)
+                self.written += len(records)
+            except Exception as e:
+                # A failed write must not stop the writer; the batch is lost
+                with self._lock:
+                    self.dropped += len(records)
+                print(f"Warning: could not write {len(records)} {table} records: {e}")
+
+
+# Process-wide writer for the default store
+log_writer = PerfLogWriter(default_store)
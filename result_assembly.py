@@ -0,0 +1,151 @@
+"""
+Typed result assembly for run_automation_for_inputs
+
+Each row's Modeled Data frame is converted to float64 once and copied into
+preallocated NumPy column buffers (doubled when full), using a header -> FOE
+column mapping computed once per distinct grid header. The final DataFrame is
+built from the buffers at the end, so there is no per-row insert, rename,
+reorder or concat.
+"""
+import numpy as np
+import pandas as pd
+
+
+# Output columns in order, and the input-row key each FOE input column comes from
+OUTPUT_COLUMNS = ['FOE-Depth', 'FOE-Pipe Fluid Density', 'FOE-RIH', 'FOE-POOH', 'FOE-RIH_Streatch', 'FOE-POOH_Streatch']
+INPUT_COLUMNS = {
+    'FOE-Pipe Fluid Density': 'Density_value',
+    'FOE-RIH': 'RIH_wob_value',
+    'FOE-POOH': 'POOH_wob_value',
+}
+
+
+def foe_column(header):
+    """FOE output column for a grdData header, or None if the column is not kept"""
+    if 'Depth' in header or 'depth' in header.lower():
+        return 'FOE-Depth'
+    if 'RIH' in header and ('Stretch' in header or 'stretch' in header.lower()):
+        return 'FOE-RIH_Streatch'
+    if 'POOH' in header and ('Stretch' in header or 'stretch' in header.lower()):
+        return 'FOE-POOH_Streatch'
+    return None
+
+
+def to_float64(values):
+    """Convert a column of cell values (strings or numbers) to a float64 array"""
+    series = values if isinstance(values, pd.Series) else pd.Series(values)
+    if series.dtype == np.float64:
+        return series.to_numpy()
+    if series.dtype == object:
+        series = series.astype(str).str.replace(',', '', regex=False)
+    return pd.to_numeric(series, errors='coerce').to_numpy(dtype=np.float64)
+
+
+class ResultAssembler:
+    """Accumulates per-row Modeled Data frames into float64 column buffers"""
+
+    def __init__(self, capacity=1024):
+        self._buffers = {column: np.empty(capacity, dtype=np.float64) for column in OUTPUT_COLUMNS}
+        self._capacity = capacity
+        self._size = 0
+        self._last = 0
+        self._plans = {}
+        # Output columns seen so far - the frame only includes these, like before
+        self._present = set(INPUT_COLUMNS)
+        self.rows = 0
+
+    def __len__(self):
+        return self._size
+
+    def _plan(self, headers):
+        """(source position, FOE column) pairs for a grid header, computed once per header"""
+        plan = self._plans.get(headers)
+        if plan is None:
+            plan = []
+            for position, header in enumerate(headers):
+                column = foe_column(str(header))
+                if column is not None:
+                    plan.append((position, column))
+            self._plans[headers] = plan
+        return plan
+
+    def _reserve(self, count):
+        needed = self._size + count
+        if needed <= self._capacity:
+            return
+        capacity = self._capacity
+        while capacity < needed:
+            capacity *= 2
+        for column, buffer in self._buffers.items():
+            grown = np.empty(capacity, dtype=np.float64)
+            grown[:self._size] = buffer[:self._size]
+            self._buffers[column] = grown
+        self._capacity = capacity
+
+    def _write(self, values, count):
+        """Copy {column: float64 array or scalar} into the buffers as count new rows"""
+        self._reserve(count)
+        start, end = self._size, self._size + count
+        for column, value in values.items():
+            if column not in self._present:
+                # First time this column appears - earlier rows have no value for it
+                self._buffers[column][:start] = np.nan
+                self._present.add(column)
+            self._buffers[column][start:end] = value
+        # Columns earlier rows had but these lack
+        for column in self._present - values.keys():
+            self._buffers[column][start:end] = np.nan
+        self._last = start
+        self._size = end
+        self.rows += 1
+        return count
+
+    def append(self, row, df):
+        """Add one input row's Modeled Data frame; returns the number of depth rows added"""
+        if df is None:
+            return 0
+        values = {}
+        for position, column in self._plan(tuple(df.columns)):
+            values[column] = to_float64(df.iloc[:, position])
+        for column, key in INPUT_COLUMNS.items():
+            values[column] = float(row[key])
+        return self._write(values, len(df))
+
+    def extend(self, frame):
+        """Add a frame that already has FOE output columns (e.g. from last_frame)"""
+        values = {column: to_float64(frame[column]) for column in frame.columns if column in self._buffers}
+        return self._write(values, len(frame))
+
+    def _frame(self, start):
+        columns = {column: self._buffers[column][start:self._size] for column in OUTPUT_COLUMNS
+                   if column in self._present}
+        return pd.DataFrame(columns, copy=False)
+
+    def columns(self):
+        """Output columns present so far, in OUTPUT_COLUMNS order"""
+        return [column for column in OUTPUT_COLUMNS if column in self._present]
+
+    def column(self, name):
+        """Read-only view of one column's assembled values (valid until the next append)"""
+        view = self._buffers[name][:self._size]
+        view.flags.writeable = False
+        return view
+
+    def last_frame(self):
+        """FOE frame of the rows added by the last append/extend, or None"""
+        if self.rows == 0:
+            return None
+        return self._frame(self._last)
+
+    def to_frame(self):
+        """Final DataFrame in OUTPUT_COLUMNS order, or None if nothing was appended"""
+        if self.rows == 0:
+            return None
+        return self._frame(0)
+
+    def clear(self):
+        """Drop the assembled rows but keep the buffers for reuse"""
+        self._size = 0
+        self._last = 0
+        self.rows = 0
+        self._present = set(INPUT_COLUMNS)
@@ -0,0 +1,136 @@
+"""
+Persistent cache of stretch results
+
+Rows already computed for the same well are served from an SQLite file
+instead of driving Orpheus again. Entries are keyed by a well fingerprint
+(the frmOrpheus window title, e.g. 'Abbey A-02', plus a model revision the
+user supplies) and the (density, RIH WOB, POOH WOB, WHP) tuple. The least
+recently used entries are evicted once the entry count or total size limit
+is exceeded.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from checkpoint import INPUT_KEYS, row_key
+
+
+DEFAULT_CACHE_PATH = Path(__file__).parent / "result_cache.sqlite"
+
+
+def well_fingerprint(window_title, model_revision=""):
+    """Identity of the well model results are valid for"""
+    return f"{window_title.strip()}|{model_revision.strip()}"
+
+
+class ResultCache:
+    """LRU-bounded on-disk map of (well fingerprint, input row) -> result frame"""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=20000, max_bytes=200 * 1024 * 1024):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # SQLite connections belong to the thread that opened them
+        self._local = threading.local()
+
+    def _db(self):
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(self.path)
+            db.execute("""CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY, well TEXT, density REAL, rih_wob REAL, pooh_wob REAL, whp REAL,
+                payload BLOB, size INTEGER, last_used REAL)""")
+            db.execute("CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)")
+            self._local.db = db
+        return db
+
+    @staticmethod
+    def _key(well, row):
+        return hashlib.sha1(f"{well}|{row_key(row)}".encode()).hexdigest()
+
+    def contains(self, well, row):
+        """True if a result is cached (does not count as a hit or refresh the entry)"""
+        cursor = self._db().execute("SELECT 1 FROM results WHERE key = ?", (self._key(well, row),))
+        return cursor.fetchone() is not None
+
+    def get(self, well, row):
+        """Cached result frame for an input row of this well, or None"""
+        import pandas as pd
+
+        db = self._db()
+        key = self._key(well, row)
+        found = db.execute("SELECT payload FROM results WHERE key = ?", (key,)).fetchone()
+        if found is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        with db:
+            db.execute("UPDATE results SET last_used = ? WHERE key = ?", (time.time(), key))
+        columns = json.loads(zlib.decompress(found[0]))
+        return pd.DataFrame({column: pd.Series(values, dtype='float64') for column, values in columns.items()})
+
+    def put(self, well, row, frame):
+        """Cache an input row's result frame, evicting old entries past the limits"""
+        payload = zlib.compress(json.dumps({column: frame[column].tolist() for column in frame.columns}).encode())
+        db = self._db()
+        with db:
+            db.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                       (self._key(well, row), well, *(float(row[name]) for name in INPUT_KEYS),
+                        payload, len(payload), time.time()))
+            self._evict(db)
+
+    def _evict(self, db):
+        entries, size = db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+        if entries <= self.max_entries and size <= self.max_bytes:
+            return
+        # Walk from least recently used until both limits hold
+        doomed = []
+        for key, entry_size in db.execute("SELECT key, size FROM results ORDER BY last_used"):
+            if entries <= self.max_entries and size <= self.max_bytes:
+                break
+            doomed.append((key,))
+            entries -= 1
+            size -= entry_size
+        db.executemany("DELETE FROM results WHERE key = ?", doomed)
+        self.evictions += len(doomed)
+
+    def stats(self):
+        """Hit/miss counters and current size as a dict"""
+        entries, size = self._db().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'entries': entries,
+            'bytes': size,
+        }
+
+    def describe(self):
+        stats = self.stats()
+        return (f"Result cache: {stats['hits']} hits / {stats['hits'] + stats['misses']} lookups "
+                f"({stats['hit_rate']:.0%}), {stats['entries']} entries, {stats['bytes'] / 1024:.0f} KB")
+
+    def clear(self, well=None):
+        """Drop every entry, or only those of one well fingerprint"""
+        db = self._db()
+        with db:
+            if well is None:
+                db.execute("DELETE FROM results")
+            else:
+                db.execute("DELETE FROM results WHERE well = ?", (well,))
+
+    def close(self):
+        """Close this thread's connection"""
+        db = getattr(self._local, 'db', None)
+        if db is not None:
+            db.close()
+            self._local.db = None
@@ -0,0 +1,198 @@
+"""
+Streaming sinks for sweep results
+
+run_automation_for_inputs hands each row's FOE frame to a sink as soon as it
+is extracted, so a crash or ESC stop keeps every finished row and file sinks
+never hold the whole sweep in memory. The frames handed to write() are views
+into a reused buffer - sinks must consume or copy them before returning.
+"""
+import threading
+from pathlib import Path
+from result_assembly import ResultAssembler
+
+
+class ResultSink:
+    """Receives one FOE DataFrame per input row"""
+
+    def __init__(self):
+        self.rows_written = 0
+
+    def write(self, frame):
+        """Consume one row's results"""
+        raise NotImplementedError
+
+    def skip(self):
+        """An input row that produced no results (called in its place in the row order)"""
+
+    def flush(self):
+        """Push buffered results to their destination"""
+
+    def close(self):
+        """Flush and release resources (safe to call twice)"""
+        self.flush()
+
+    def result(self):
+        """All results as one DataFrame if the sink keeps them in memory, else None"""
+        return None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class MemorySink(ResultSink):
+    """Keeps results in float64 column buffers; result() may be read while the run continues"""
+
+    def __init__(self):
+        super().__init__()
+        self._results = ResultAssembler()
+        self._lock = threading.Lock()
+
+    def write(self, frame):
+        with self._lock:
+            self._results.extend(frame)
+            self.rows_written += 1
+
+    def result(self):
+        with self._lock:
+            return self._results.to_frame()
+
+
+class CSVSink(ResultSink):
+    """Appends each row's results to a CSV file, flushing every flush_every rows"""
+
+    def __init__(self, path, flush_every=1):
+        super().__init__()
+        self.path = Path(path)
+        self.flush_every = flush_every
+        self._file = None
+        self._pending = 0
+
+    def write(self, frame):
+        if self._file is None:
+            self._file = open(self.path, 'w', newline='')
+            frame.to_csv(self._file, index=False)
+        else:
+            frame.to_csv(self._file, index=False, header=False)
+        self.rows_written += 1
+        self._pending += 1
+        if self._pending >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        if self._file is not None:
+            self._file.flush()
+        self._pending = 0
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class ParquetSink(ResultSink):
+    """Writes results to a Parquet file, one row group every flush_every rows (needs pyarrow)"""
+
+    def __init__(self, path, flush_every=20):
+        super().__init__()
+        try:
+            import pyarrow
+        except ImportError:
+            raise Exception("Parquet output needs pyarrow - install it with: pip install pyarrow")
+        self.path = Path(path)
+        self.flush_every = flush_every
+        self._writer = None
+        self._tables = []
+
+    def write(self, frame):
+        import pyarrow as pa
+        # Copy first - pyarrow would share the reused float64 buffer, not copy it
+        self._tables.append(pa.Table.from_pandas(frame.copy(), preserve_index=False))
+        self.rows_written += 1
+        if len(self._tables) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        if not self._tables:
+            return
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.path, self._tables[0].schema)
+        schema = self._writer.schema
+        tables = [table.select(schema.names) if table.schema.names != schema.names else table
+                  for table in self._tables]
+        self._writer.write_table(pa.concat_tables(tables))
+        self._tables = []
+
+    def close(self):
+        self.flush()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+class ReorderingSink(ResultSink):
+    """
+    Passes rows run in a planned order on to sink in the original input order.
+    Rows that arrive early are copied and held until the rows before them are
+    done; rows in order go straight through.
+    """
+
+    def __init__(self, sink, order):
+        self.sink = sink
+        self._expected = sorted(order)
+        self._next = 0
+        self._held = {}
+
+    @property
+    def rows_written(self):
+        return self.sink.rows_written
+
+    def write_row(self, position, frame):
+        """Results of input row position (None if the row produced none)"""
+        if self._next < len(self._expected) and position == self._expected[self._next]:
+            self._pass_on(frame)
+            self._next += 1
+            self._release()
+        else:
+            self._held[position] = frame.copy() if frame is not None else None
+
+    def _release(self):
+        while self._next < len(self._expected) and self._expected[self._next] in self._held:
+            self._pass_on(self._held.pop(self._expected[self._next]))
+            self._next += 1
+
+    def _pass_on(self, frame):
+        if frame is not None:
+            self.sink.write(frame)
+        else:
+            self.sink.skip()
+
+    def write(self, frame):
+        raise NotImplementedError("ReorderingSink needs write_row(position, frame)")
+
+    def flush(self):
+        self.sink.flush()
+
+    def close(self):
+        # A stopped run leaves gaps - pass on what finished, still in input order
+        for position in sorted(self._held):
+            self._pass_on(self._held.pop(position))
+        self._next = len(self._expected)
+        self.sink.close()
+
+    def result(self):
+        return self.sink.result()
+
+
+def open_sink(path=None, flush_every=None):
+    """Sink for an output path by extension (.parquet or CSV), or a MemorySink when path is None"""
+    if path is None:
+        return MemorySink()
+    kwargs = {} if flush_every is None else {'flush_every': flush_every}
+    if Path(path).suffix.lower() in ('.parquet', '.pq'):
+        return ParquetSink(path, **kwargs)
+    return CSVSink(path, **kwargs)
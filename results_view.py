@@ -0,0 +1,249 @@
+"""
+Virtualized results table for AutomationGUI
+
+Results are kept in a ResultAssembler's float64 column buffers and the
+Treeview only ever holds one page of items - the rows currently visible.
+Scrolling rewrites those items from the buffers, so the cost of drawing does
+not depend on the number of results. Sorting and filtering work on an index
+array of row positions (argsort / boolean mask over one column), never on a
+copy of the data; streamed rows are appended to the buffers and folded into
+the index on the next draw.
+"""
+import tkinter as tk
+from tkinter import ttk
+import numpy as np
+from result_assembly import ResultAssembler, OUTPUT_COLUMNS
+
+
+def format_value(value):
+    return "" if np.isnan(value) else f"{value:.10g}"
+
+
+def parse_filter(text):
+    """'a..b', '>a', '<b' or a single value -> (low, high) bounds (None = open)"""
+    text = text.strip()
+    if not text:
+        return None, None
+    if '..' in text:
+        low, high = text.split('..', 1)
+        return (float(low) if low.strip() else None), (float(high) if high.strip() else None)
+    if text[0] in '<>':
+        value = float(text[1:].lstrip('='))
+        return (value, None) if text[0] == '>' else (None, value)
+    value = float(text)
+    return value, value
+
+
+class ResultsView(ttk.Frame):
+    """Treeview over ResultAssembler buffers that only renders the visible rows"""
+
+    def __init__(self, parent, row_height=20):
+        super().__init__(parent)
+        self.results = ResultAssembler()
+        self.row_height = row_height
+        self.first = 0          # Position in the index of the top visible row
+        self.page_rows = 20     # Items in the tree (rows that fit)
+        self.sort_column = None
+        self.sort_descending = False
+        self.filter_column = None
+        self.filter_bounds = (None, None)
+        self.follow = True      # Keep the newest rows in view while streaming
+        self._index = None      # Row positions shown (None = all rows in order)
+        self._indexed_rows = 0  # Assembled rows the index covers
+
+        # Filter bar
+        bar = ttk.Frame(self)
+        bar.pack(fill=tk.X)
+        ttk.Label(bar, text="Filter:").pack(side=tk.LEFT)
+        self.filter_choice = tk.StringVar(value=OUTPUT_COLUMNS[0])
+        ttk.Combobox(bar, textvariable=self.filter_choice, values=OUTPUT_COLUMNS, width=24,
+                     state="readonly").pack(side=tk.LEFT, padx=5)
+        self.filter_text = tk.StringVar(value="")
+        entry = ttk.Entry(bar, textvariable=self.filter_text, width=18)
+        entry.pack(side=tk.LEFT)
+        entry.bind('<Return>', lambda event: self.apply_filter())
+        ttk.Button(bar, text="Apply", command=self.apply_filter).pack(side=tk.LEFT, padx=5)
+        ttk.Button(bar, text="Clear", command=self.clear_filter).pack(side=tk.LEFT)
+        self.count_label = ttk.Label(bar, text="0 rows")
+        self.count_label.pack(side=tk.RIGHT, padx=5)
+        ttk.Label(bar, text="(a..b, >a, <b or a value)", foreground="gray").pack(side=tk.LEFT, padx=5)
+
+        body = ttk.Frame(self)
+        body.pack(fill=tk.BOTH, expand=True)
+        self.tree = ttk.Treeview(body, columns=OUTPUT_COLUMNS, show="headings", selectmode="extended")
+        for column in OUTPUT_COLUMNS:
+            self.tree.heading(column, text=column, command=lambda c=column: self.sort_by(c))
+            self.tree.column(column, width=140, anchor=tk.E)
+        self.scrollbar = ttk.Scrollbar(body, orient=tk.VERTICAL, command=self._on_scrollbar)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.tree.bind('<Configure>', self._on_resize)
+        self.tree.bind('<MouseWheel>', lambda event: self.scroll(-1 if event.delta > 0 else 1, 'units'))
+        self.tree.bind('<Button-4>', lambda event: self.scroll(-1, 'units'))
+        self.tree.bind('<Button-5>', lambda event: self.scroll(1, 'units'))
+        for key, amount, what in (('<Up>', -1, 'units'), ('<Down>', 1, 'units'),
+                                  ('<Prior>', -1, 'pages'), ('<Next>', 1, 'pages')):
+            self.tree.bind(key, lambda event, a=amount, w=what: (self.scroll(a, w), 'break')[1])
+
+    # Data
+    def clear(self):
+        self.results.clear()
+        self._index = None
+        self._indexed_rows = 0
+        self.first = 0
+        self.follow = True
+        self.refresh()
+
+    def append(self, frame):
+        """Add streamed FOE rows; call refresh() once per batch"""
+        self.results.extend(frame)
+
+    def load(self, frame):
+        """Replace the contents with a whole results frame"""
+        self.results.clear()
+        if frame is not None and len(frame):
+            self.results.extend(frame)
+        self._index = None
+        self._indexed_rows = 0
+        self.first = 0
+        self.follow = False
+        self.refresh()
+
+    # Index maintenance
+    def _filtered(self, positions):
+        if self.filter_column is None:
+            return positions
+        values = self.results.column(self.filter_column)[positions]
+        low, high = self.filter_bounds
+        mask = np.ones(len(positions), dtype=bool)
+        if low is not None:
+            mask &= values >= low - 1e-9
+        if high is not None:
+            mask &= values <= high + 1e-9
+        return positions[mask]
+
+    def _update_index(self):
+        """Fold rows appended since the last draw into the index"""
+        total = len(self.results)
+        if self.sort_column is None and self.filter_column is None:
+            self._index = None
+        elif self._index is None or total < self._indexed_rows:
+            self._index = self._filtered(np.arange(total))
+            self._sort_index()
+        elif total > self._indexed_rows:
+            new = self._filtered(np.arange(self._indexed_rows, total))
+            self._index = np.concatenate([self._index, new])
+            if self.sort_column is not None and len(new):
+                self._sort_index()
+        self._indexed_rows = total
+
+    def _sort_index(self):
+        if self.sort_column is None or self._index is None:
+            return
+        values = self.results.column(self.sort_column)[self._index]
+        order = np.argsort(-values if self.sort_descending else values, kind='stable')
+        self._index = self._index[order]
+
+    def visible_count(self):
+        return len(self.results) if self._index is None else len(self._index)
+
+    # Sorting and filtering
+    def sort_by(self, column):
+        """Sort by a column (clicking it again reverses, a third time restores input order)"""
+        if column not in self.results.columns():
+            return
+        if self.sort_column != column:
+            self.sort_column, self.sort_descending = column, False
+        elif not self.sort_descending:
+            self.sort_descending = True
+        else:
+            self.sort_column = None
+        for name in OUTPUT_COLUMNS:
+            arrow = ""
+            if name == self.sort_column:
+                arrow = " ▼" if self.sort_descending else " ▲"
+            self.tree.heading(name, text=name + arrow)
+        self._index = None
+        self.first = 0
+        self.follow = False
+        self.refresh()
+
+    def apply_filter(self):
+        try:
+            bounds = parse_filter(self.filter_text.get())
+        except ValueError:
+            self.count_label.configure(text="Invalid filter")
+            return
+        column = self.filter_choice.get()
+        if bounds == (None, None) or column not in self.results.columns():
+            self.clear_filter()
+            return
+        self.filter_column, self.filter_bounds = column, bounds
+        self._index = None
+        self.first = 0
+        self.refresh()
+
+    def clear_filter(self):
+        self.filter_text.set("")
+        self.filter_column, self.filter_bounds = None, (None, None)
+        self._index = None
+        self.first = 0
+        self.refresh()
+
+    # Scrolling and drawing
+    def scroll(self, amount, what='units'):
+        step = self.page_rows if what == 'pages' else 1
+        self.first += int(amount) * step
+        self.follow = False
+        self.refresh()
+
+    def _on_scrollbar(self, action, *args):
+        count = self.visible_count()
+        if action == 'moveto':
+            self.first = int(float(args[0]) * count)
+            self.follow = False
+            self.refresh()
+        elif action == 'scroll':
+            self.scroll(int(args[0]), args[1])
+
+    def _on_resize(self, event):
+        # Header row takes about one row height
+        rows = max(1, event.height // self.row_height - 1)
+        if rows != self.page_rows:
+            self.page_rows = rows
+            self.refresh()
+
+    def refresh(self):
+        """Redraw the visible page (call after appending a batch of rows)"""
+        self._update_index()
+        count = self.visible_count()
+        if self.follow:
+            self.first = count - self.page_rows
+        self.first = max(0, min(self.first, count - self.page_rows))
+        if count and self.first + self.page_rows >= count and self.filter_column is None and self.sort_column is None:
+            self.follow = True
+
+        positions = np.arange(self.first, min(self.first + self.page_rows, count))
+        if self._index is not None:
+            positions = self._index[positions]
+        present = self.results.columns()
+        data = [self.results.column(column)[positions] if column in present else None for column in OUTPUT_COLUMNS]
+
+        items = self.tree.get_children()
+        # Keep exactly one item per visible row, rewriting their values in place
+        for item in items[len(positions):]:
+            self.tree.delete(item)
+        for i in range(len(positions)):
+            values = [format_value(column[i]) if column is not None else "" for column in data]
+            if i < len(items):
+                self.tree.item(items[i], values=values)
+            else:
+                self.tree.insert("", tk.END, values=values)
+
+        if count:
+            self.scrollbar.set(self.first / count, min(1.0, (self.first + len(positions)) / count))
+        else:
+            self.scrollbar.set(0, 1)
+        shown = f"{count} of {len(self.results)} rows" if count != len(self.results) else f"{count} rows"
+        self.count_label.configure(text=shown)
@@ -0,0 +1,92 @@
+"""
+Accounting for UI Automation searches
+
+Every element search the backends make (FindFirst / FindAll through the
+shared UIA client, child listings, bulk cache snapshots) is counted here with
+its condition type, search scope, number of elements returned and wall time,
+keyed by the workflow step and input row that made it. The timer decorator
+sets the step and the runners set the row, so a slow row can be split into
+time spent searching versus time Orpheus spent computing, and a new search
+added to a step shows up as a change in its counts.
+
+State is per thread (the GUI worker, the CLI and each parallel process run
+one sweep per thread), so no locking is needed on the hot path.
+"""
+import contextlib
+import threading
+
+
+NO_STEP = "(no step)"
+NO_ROW = -1
+
+
+class SearchCounters:
+    """Search counts per (row, step, call, condition, scope) for the current thread"""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def _state(self):
+        state = self._local
+        if not hasattr(state, 'counts'):
+            state.counts = {}
+            state.step = NO_STEP
+            state.row = NO_ROW
+        return state
+
+    def enter_step(self, name):
+        """Attribute searches to step name; returns the step to restore with exit_step"""
+        state = self._state()
+        previous, state.step = state.step, name
+        return previous
+
+    def exit_step(self, previous):
+        self._state().step = previous
+
+    @contextlib.contextmanager
+    def step(self, name):
+        """Attribute the searches made inside the block to step name"""
+        previous = self.enter_step(name)
+        try:
+            yield
+        finally:
+            self.exit_step(previous)
+
+    def begin_row(self, row):
+        state = self._state()
+        state.row = row
+        state.step = NO_STEP
+
+    def record(self, call, condition, scope, elements, elapsed_ns, calls=1):
+        """Count a search (condition and scope by name, e.g. 'AutomationId', 'Descendants')"""
+        state = self._state()
+        key = (state.row, state.step, call, condition, scope)
+        counts = state.counts.get(key)
+        if counts is None:
+            state.counts[key] = [calls, elements, elapsed_ns]
+        else:
+            counts[0] += calls
+            counts[1] += elements
+            counts[2] += elapsed_ns
+
+    def take(self):
+        """Counts recorded since the last take, as {(row, step, call, condition, scope): (calls, elements, ns)}"""
+        state = self._state()
+        counts, state.counts = state.counts, {}
+        state.row = NO_ROW
+        return {key: tuple(value) for key, value in counts.items()}
+
+    def totals(self, counts, by='step'):
+        """Sum counts from take() by 'step', 'row' or 'call'"""
+        position = {'row': 0, 'step': 1, 'call': 2}[by]
+        totals = {}
+        for key, (calls, elements, ns) in counts.items():
+            total = totals.setdefault(key[position], [0, 0, 0])
+            total[0] += calls
+            total[1] += elements
+            total[2] += ns
+        return {key: tuple(value) for key, value in totals.items()}
+
+
+# Process-wide counters
+search_counters = SearchCounters()
@@ -0,0 +1,773 @@
+"""
+Simulated Orpheus UI backend
+
+Builds an in-memory control tree from control_tree_dump.csv / UIA_Dump.csv and
+emulates the windows the stretch workflow opens (fluid editor, graph window,
+Modeled Data grid, hydraulic error message box). Latencies can be injected per
+operation so the per-row workflow can be profiled without a Windows desktop.
+"""
+import csv
+import heapq
+import itertools
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from ui_backend import UIBackend, StaleElementError
+from search_counters import search_counters
+from grid_capture import MemoryClipboard, grid_to_text
+
+
+DATA_DIR = Path(__file__).parent
+
+# Seconds added to each simulated operation
+DEFAULT_LATENCIES = {
+    'find': 0.0,         # each descendant search
+    'click': 0.0,        # click / click_input
+    'set_text': 0.0,
+    'select': 0.0,
+    'expand': 0.0,
+    'read_cell': 0.0,    # each grid cell read
+    'cache_request': 0.0,  # one bulk (cached-property) read of a whole grid
+    'copy': 0.0,         # select-all + copy of a whole grid to the clipboard
+    'probe': 0.0,        # runtime id check of a cached handle
+    'open_window': 0.0,  # delay before a dialog opened by a click appears
+    'calculate': 0.0,    # Trip In and Out calculation before the graph window appears
+    'sensitivity_case': 0.0,  # per case of a Sensitivity Analysis Wizard calculation
+}
+
+# Sensitivity Analysis Wizard set-up the simulator assumes: the parameters
+# listed in the sensitivity setting (title, base value) and the stretch
+# outputs (checkbox id, checkbox text, result column). The dump shows only the
+# first page of outputs, so the stretch entries are stand-ins.
+SENSITIVITY_PARAMETERS = [
+    ('BHA Depth\n(ft)', 14946.0),
+    ('Pipe Fluid Density\n(lb/gal)', 8.0),
+    ('Force on End - RIH\n(lbf)', 0.0),
+    ('Force on End - POOH\n(lbf)', 0.0),
+    ('Wellhead Pressure\n(psi)', 0.0),
+]
+SENSITIVITY_OUTPUTS = [
+    ('chkRIH_Stretch', 'Stretch at end during RIH', 'RIH Stretch\n(in)'),
+    ('chkPOOH_Stretch', 'Stretch at end during POOH', 'POOH Stretch\n(in)'),
+]
+
+_runtime_ids = itertools.count(1)
+
+
+class SimElement:
+    """Node of the simulated control tree"""
+
+    def __init__(self, control_type, name='', automation_id='', class_name='', rect=(0, 0, 0, 0)):
+        self.control_type = control_type
+        self.name = name
+        self.automation_id = automation_id
+        self.class_name = class_name
+        self.rect = rect
+        self.children = []
+        self.parent = None
+        self.value = ''
+        self.items = []
+        self.selected_index = -1
+        self.checked = False
+        self.alive = True
+        self.runtime_id = (42, next(_runtime_ids))
+
+    def append(self, child):
+        child.parent = self
+        self.children.append(child)
+        return child
+
+    def insert(self, index, child):
+        child.parent = self
+        self.children.insert(index, child)
+        return child
+
+    def iter_descendants(self):
+        """Pre-order walk below this node (same order as UIA FindAll)"""
+        stack = list(reversed(self.children))
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(reversed(node.children))
+
+    def clone(self):
+        """Deep copy with fresh runtime ids"""
+        copy = SimElement(self.control_type, self.name, self.automation_id, self.class_name, self.rect)
+        copy.value = self.value
+        copy.items = list(self.items)
+        copy.selected_index = self.selected_index
+        copy.checked = self.checked
+        for child in self.children:
+            copy.append(child.clone())
+        return copy
+
+    def detach(self):
+        """Remove from the tree and mark this subtree as gone"""
+        if self.parent is not None:
+            self.parent.children.remove(self)
+            self.parent = None
+        self.alive = False
+        for node in self.iter_descendants():
+            node.alive = False
+
+    def window(self):
+        """Nearest enclosing Window (the node itself if it is one)"""
+        node = self
+        while node is not None and node.control_type != 'Window':
+            node = node.parent
+        return node
+
+    def find(self, automation_id):
+        """First descendant with the AutomationId (no latency, for internal use)"""
+        for node in self.iter_descendants():
+            if node.automation_id == automation_id:
+                return node
+        return None
+
+    def __repr__(self):
+        return f"<SimElement {self.control_type} {self.automation_id or self.name!r}>"
+
+
+def load_control_tree(path):
+    """Build a SimElement tree from control_tree_dump.csv (one row per node with its depth)"""
+    root = None
+    stack = []
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        for row in csv.DictReader(f):
+            depth = int(row['depth'])
+            rect = tuple(int(row[key] or 0) for key in ('left', 'top', 'right', 'bottom'))
+            node = SimElement(row['control_type'], row['name'], row['automation_id'], row['class_name'], rect)
+            del stack[depth:]
+            if stack:
+                stack[-1].append(node)
+            else:
+                root = node
+            stack.append(node)
+    return root
+
+
+def load_uia_dump(path):
+    """
+    Build SimElement trees from UIA_Dump.csv and return the top-level nodes.
+    Each DepthPath is the parent path plus the node's text (or AutomationId
+    when it has no text); names may themselves contain '/'.
+    """
+    nodes = {}
+    top_level = []
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        for row in csv.DictReader(f):
+            text = row['WindowText']
+            segment = text if text else row['AutomationId']
+            path_text = row['DepthPath']
+            if path_text.endswith('/' + segment):
+                parent_path = path_text[:len(path_text) - len(segment) - 1]
+            else:
+                parent_path = path_text.rsplit('/', 1)[0]
+
+            node = SimElement(row['ControlType'], text, row['AutomationId'], row['ClassName'])
+            parent = nodes.get(parent_path)
+            if parent is None:
+                top_level.append(node)
+            else:
+                parent.append(node)
+            nodes[path_text] = node
+    return top_level
+
+
+def stretch_at_depth(density, end_force, whp, depth, well_depth=10000.0):
+    """
+    Stretch (in) down to depth of a hanging 1.5" coil - a smooth stand-in
+    for the Orpheus tubing forces model.
+    """
+    youngs_modulus = 30e6           # psi
+    steel_area = 0.575              # in^2, 1.5" x 0.134"
+    outer_area = 1.767              # in^2
+    weight_air = 1.96               # lb/ft
+    buoyed_weight = weight_air * (1 - float(density) / 65.5)
+
+    base_tension = float(end_force) - float(whp) * outer_area + buoyed_weight * well_depth
+    integral = base_tension * depth - buoyed_weight * depth * depth / 2
+    return 12 * integral / (youngs_modulus * steel_area)
+
+
+def compute_stretch_table(density, rih_wob, pooh_wob, whp, depth_rows=50, well_depth=10000.0):
+    """Stretch (in) vs tubing depth for RIH and POOH. Returns (depths, rih, pooh) lists."""
+    depths = [well_depth * i / (depth_rows - 1) for i in range(depth_rows)]
+    rih = [stretch_at_depth(density, rih_wob, whp, d, well_depth) for d in depths]
+    pooh = [stretch_at_depth(density, pooh_wob, whp, d, well_depth) for d in depths]
+    return depths, rih, pooh
+
+
+def _window(automation_id, name, children=()):
+    window = SimElement('Window', name, automation_id, 'WindowsForms10.Window.8.app.0.141b42a_r7_ad1')
+    for child in children:
+        window.append(child)
+    return window
+
+
+def _button(automation_id, name):
+    return SimElement('Button', name, automation_id, 'WindowsForms10.BUTTON.app.0.141b42a_r7_ad1')
+
+
+class SimulatedOrpheus(UIBackend):
+    """
+    In-memory Orpheus driver.
+
+    Clicking the workflow buttons opens and closes the same windows the real
+    application does; Trip In and Out fills grdData from compute_stretch_table
+    using the values typed into the RIH/POOH panes and the saved fluid density.
+    """
+
+    def __init__(self, control_tree=None, uia_dump=None, latencies=None,
+                 depth_rows=50, well_depth=10000.0, hydraulic_error_every=0, events=True):
+        self.latencies = dict(DEFAULT_LATENCIES)
+        if latencies:
+            self.latencies.update(latencies)
+        self.depth_rows = depth_rows
+        self.well_depth = well_depth
+        self.hydraulic_error_every = hydraulic_error_every
+        self.events = events
+        self._listeners = {}
+        self._listener_ids = itertools.count(1)
+
+        self.main = load_control_tree(control_tree or DATA_DIR / 'control_tree_dump.csv')
+        self.templates = {}
+        self._prepare_templates(uia_dump or DATA_DIR / 'UIA_Dump.csv')
+
+        self.density = 8.0
+        self.trip_count = 0
+        self._pending_inputs = None
+        self.op_counts = Counter()
+        self._clipboard = MemoryClipboard()
+        self._pending = []
+        self._sequence = itertools.count()
+        self._lock = threading.RLock()
+
+        self._click_handlers = {
+            (None, 'btnFluids0'): self._open_fluids_distribution,
+            ('frmFluids', 'cmdStringFluidEditor'): self._open_fluid_editor,
+            ('frmFluids', 'cmdStringFluidEditor2'): self._open_fluid_editor,
+            ('frmFluids', 'POOH'): self._show_pooh_tab,
+            ('frmFluids', 'tsbSave'): self._save_fluid,
+            ('frmFluids', 'tsbExit'): self._close_window,
+            ('frmFluids', 'cmdOK'): self._close_window,
+            (None, 'btnTripInAndOut'): self._trip_in_and_out,
+            ('CTESMessageBox', 'btnNo'): self._hydraulic_error_no,
+            ('CTESMessageBox', 'btnOK'): self._hydraulic_error_ok,
+            ('frmOrpheusGraph', 'Modeled Data...'): self._open_modeled_data,
+            ('frmGraphData', 'btnOK'): self._close_window,
+            ('frmOrpheusGraph', 'btnOK'): self._close_window,
+            (None, 'Sensitivity Analysis...'): self._open_sensitivity,
+            ('frmOrphSensitivity', 'cmdMatrix'): self._open_matrix_wizard,
+            ('frmOrphSensitivity', 'cmdCalc'): self._calculate_sensitivity,
+            ('frmOrphSensitivity', 'cmdExit'): self._close_window,
+            ('frmSensitivityMatrix', 'cmdOK'): self._apply_matrix,
+            ('frmSensitivityMatrix', 'cmdCancel'): self._close_window,
+            ('frmParameterValueEditor', 'cmdAdd'): self._add_value,
+            ('frmParameterValueEditor', 'cmdAdds'): self._add_series,
+            ('frmParameterValueEditor', 'cmdDelete'): self._delete_value,
+            ('frmParameterValueEditor', 'cmdOK'): self._save_values,
+            ('frmParameterValueEditor', 'cmdCancel'): self._close_window,
+        }
+        # Clicking a parameter column of the matrix wizard opens its value editor
+        for title, _ in SENSITIVITY_PARAMETERS:
+            self._click_handlers[('frmSensitivityMatrix', title)] = self._open_value_editor
+
+        # Sensitivity setting: value list per parameter, and the cases of the last matrix
+        self.sensitivity_values = {title: [value] for title, value in SENSITIVITY_PARAMETERS}
+        self.sensitivity_cases = []
+
+    # ------------------------------------------------------------------
+    # Tree set-up
+    # ------------------------------------------------------------------
+    def _prepare_templates(self, uia_dump):
+        """Detach transient windows from the dump and synthesize the ones it lacks"""
+        fluids = self.main.find('frmFluids')
+        if fluids is not None:
+            select_dialog = fluids.find('frmSelectTreeDialog')
+            if select_dialog is not None:
+                select_dialog.detach()
+            fluids.detach()
+            self.templates['frmFluids'] = fluids
+
+            # The dump was taken on the RIH tab; add the POOH page
+            pooh_page = SimElement('Pane', 'POOH', 'TabPage2')
+            pooh_page.append(_button('cmdStringFluidEditor2', 'Brine Abby'))
+            self.templates['TabPage2'] = pooh_page
+
+        density = SimElement('Edit', '', 'txtDensity', 'WindowsForms10.EDIT.app.0.141b42a_r7_ad1')
+        toolbar = SimElement('ToolBar', 'ToolStrip1', 'ToolStrip1')
+        toolbar.append(_button('tsbSave', 'Save'))
+        toolbar.append(_button('tsbExit', 'Exit'))
+        self.templates['FluidEditor'] = _window('frmFluids', 'Fluid Editor', [density, toolbar])
+
+        graph_type = SimElement('ComboBox', '', 'cmbGraphType', 'WindowsForms10.COMBOBOX.app.0.141b42a_r7_ad1')
+        graph_type.items = ['Force', 'Stress', 'Stretch', 'Torque']
+        graph_type.selected_index = 0
+        menu = SimElement('MenuBar', 'menuOrpheusGraph', 'menuOrpheusGraph')
+        data_menu = menu.append(SimElement('MenuItem', 'Data'))
+        data_menu.append(SimElement('MenuItem', 'Modeled Data...'))
+        self.templates['frmOrpheusGraph'] = _window(
+            'frmOrpheusGraph', 'Orpheus Graph', [menu, graph_type, _button('btnOK', 'OK')])
+
+        grid = SimElement('Table', 'DataGridView', 'grdData')
+        self.templates['frmGraphData'] = _window('frmGraphData', 'Modeled Data', [grid, _button('btnOK', 'OK')])
+
+        message = SimElement('Text', 'Hydraulics calculation is invalid. Continue?', 'lblMessage')
+        self.templates['HydraulicErrorQuestion'] = _window(
+            'CTESMessageBox', 'Orpheus', [message, _button('btnYes', 'Yes'), _button('btnNo', 'No')])
+        notice = SimElement('Text', 'Fluid forces will not be calculated.', 'lblMessage')
+        self.templates['HydraulicErrorNotice'] = _window('CTESMessageBox', 'Orpheus', [notice, _button('btnOK', 'OK')])
+
+        if uia_dump and Path(uia_dump).exists():
+            for node in load_uia_dump(uia_dump):
+                if node.control_type == 'Window' and self.main.find(node.automation_id) is None:
+                    self.templates[node.automation_id] = node
+        if 'frmOrphSensitivity' in self.templates:
+            self._prepare_sensitivity_templates()
+
+    def _prepare_sensitivity_templates(self):
+        """Split the dumped wizard (captured with every dialog open) into its windows"""
+        wizard = self.templates['frmOrphSensitivity']
+        matrix = wizard.find('frmSensitivityMatrix')
+        editor = matrix.find('frmParameterValueEditor')
+        for window in (editor, matrix):
+            window.detach()
+            window.alive = True
+            for node in window.iter_descendants():
+                node.alive = True
+            self.templates[window.automation_id] = window
+
+        # Grids and value list are filled from the simulated state when shown
+        for container, automation_id in ((wizard, 'grdSensitivityData'), (matrix, 'grdVal'),
+                                         (matrix, 'grdMatrix'), (editor, 'lstValues')):
+            container.find(automation_id).children = []
+
+        outputs = wizard.find('pnlOutputs')
+        for automation_id, text, _ in SENSITIVITY_OUTPUTS:
+            outputs.insert(0, SimElement('CheckBox', text, automation_id, 'WindowsForms10.BUTTON.app.0.141b42a_r7_ad1'))
+
+    def _open(self, template, parent=None, index=None):
+        window = self.templates[template].clone()
+        parent = parent if parent is not None else self.main
+        if index is None:
+            parent.append(window)
+        else:
+            parent.insert(index, window)
+        self._fire('window_opened', window.automation_id)
+        return window
+
+    def _fire(self, event_type, automation_id):
+        for callback in list(self._listeners.values()):
+            callback(event_type, automation_id)
+
+    # ------------------------------------------------------------------
+    # Deferred UI changes and latency injection
+    # ------------------------------------------------------------------
+    def _schedule(self, delay, action):
+        """Run action now, or once delay seconds have passed"""
+        if delay <= 0:
+            action()
+            return
+        heapq.heappush(self._pending, (time.perf_counter() + delay, next(self._sequence), action))
+        if self._listeners:
+            # Someone is waiting on events - apply the change on time instead of on the next call
+            timer = threading.Timer(delay, self._timer_pump)
+            timer.daemon = True
+            timer.start()
+
+    def _timer_pump(self):
+        with self._lock:
+            self._pump()
+
+    def _pump(self):
+        """Apply deferred changes that are due"""
+        now = time.perf_counter()
+        while self._pending and self._pending[0][0] <= now:
+            _, _, action = heapq.heappop(self._pending)
+            action()
+
+    def _charge(self, operation, count=1):
+        self.op_counts[operation] += count
+        delay = self.latencies.get(operation, 0.0) * count
+        if delay > 0:
+            time.sleep(delay)
+
+    def _check_alive(self, element):
+        if element is None or not element.alive:
+            raise StaleElementError(f"Element is no longer available: {element!r}")
+
+    # ------------------------------------------------------------------
+    # UIBackend interface
+    # ------------------------------------------------------------------
+    def connect(self):
+        return self.top_window()
+
+    def top_window(self):
+        with self._lock:
+            self._pump()
+        return self.main
+
+    def window_title(self):
+        return self.main.name.strip()
+
+    def find_by_automation_id(self, parent, automation_id, index=0):
+        # Counted the way UIABackend searches: FindFirst, or FindAll for a later match
+        start = time.perf_counter_ns()
+        call = 'FindFirst' if index == 0 else 'FindAll'
+        found = None
+        with self._lock:
+            self._pump()
+            self._charge('find')
+            self._check_alive(parent)
+            for node in parent.iter_descendants():
+                if node.automation_id == automation_id:
+                    if index == 0:
+                        found = node
+                        break
+                    index -= 1
+        search_counters.record(call, 'AutomationId', 'Descendants', 0 if found is None else 1,
+                               time.perf_counter_ns() - start)
+        return found
+
+    def find_by_name(self, parent, name):
+        start = time.perf_counter_ns()
+        found = None
+        with self._lock:
+            self._pump()
+            self._charge('find')
+            self._check_alive(parent)
+            for node in parent.iter_descendants():
+                if node.name == name:
+                    found = node
+                    break
+        search_counters.record('FindFirst', 'Name', 'Descendants', 0 if found is None else 1,
+                               time.perf_counter_ns() - start)
+        return found
+
+    def click(self, element):
+        with self._lock:
+            self._pump()
+            self._charge('click')
+            self._check_alive(element)
+            window = element.window()
+            window_id = window.automation_id if window is not None and window is not self.main else None
+            if element.control_type == 'ListItem':
+                # Selects the item in its list
+                element.parent.selected_index = element.parent.children.index(element)
+            key = element.automation_id or element.name
+            handler = self._click_handlers.get((window_id, key)) or self._click_handlers.get((None, key))
+            if handler is not None:
+                handler(element)
+
+    def click_input(self, element, focus=True):
+        self.click(element)
+
+    def children(self, element):
+        start = time.perf_counter_ns()
+        with self._lock:
+            self._pump()
+            self._charge('find')
+            self._check_alive(element)
+            children = list(element.children)
+        search_counters.record('FindAll', 'True', 'Children', len(children), time.perf_counter_ns() - start)
+        return children
+
+    def set_checked(self, element, checked):
+        with self._lock:
+            self._pump()
+            self._check_alive(element)
+            if element.checked != bool(checked):
+                self._charge('click')
+                element.checked = bool(checked)
+
+    def set_text(self, element, text):
+        with self._lock:
+            self._pump()
+            self._charge('set_text')
+            self._check_alive(element)
+            element.value = str(text)
+
+    def select(self, element, index):
+        with self._lock:
+            self._pump()
+            self._charge('select')
+            self._check_alive(element)
+            if not 0 <= index < len(element.items):
+                raise IndexError(f"Combo box {element.automation_id} has no item {index}")
+            element.selected_index = index
+
+    def expand(self, element):
+        with self._lock:
+            self._pump()
+            self._charge('expand')
+            self._check_alive(element)
+
+    def read_grid(self, grid):
+        start = time.perf_counter_ns()
+        with self._lock:
+            self._pump()
+            self._check_alive(grid)
+            rows = []
+            for row in grid.children:
+                rows.append([cell.value for cell in row.children])
+            self._charge('read_cell', sum(len(row) for row in rows))
+        # One child listing for the grid and one per row, as UIABackend.read_grid makes
+        search_counters.record('FindAll', 'True', 'Children', len(rows) + sum(len(row) for row in rows),
+                               time.perf_counter_ns() - start, calls=len(rows) + 1)
+        return rows
+
+    def subscribe_window_events(self, callback):
+        if not self.events:
+            return None
+        with self._lock:
+            subscription = next(self._listener_ids)
+            self._listeners[subscription] = callback
+            return subscription
+
+    def unsubscribe_window_events(self, subscription):
+        with self._lock:
+            self._listeners.pop(subscription, None)
+
+    def read_grid_bulk(self, grid):
+        start = time.perf_counter_ns()
+        with self._lock:
+            self._pump()
+            self._check_alive(grid)
+            self._charge('cache_request')
+            rows = [[cell.value for cell in row.children] for row in grid.children]
+        search_counters.record('BuildUpdatedCache', 'True', 'Subtree', len(rows) + sum(len(row) for row in rows),
+                               time.perf_counter_ns() - start)
+        return rows
+
+    def clipboard(self):
+        return self._clipboard
+
+    def copy_grid(self, grid):
+        with self._lock:
+            self._pump()
+            self._check_alive(grid)
+            self._charge('copy')
+            self._clipboard.set_text(grid_to_text([cell.value for cell in row.children] for row in grid.children))
+
+    def fingerprint(self, element):
+        return element.runtime_id
+
+    def is_alive(self, element, fingerprint):
+        with self._lock:
+            self._pump()
+            self._charge('probe')
+            return element.alive and element.runtime_id == fingerprint
+
+    # ------------------------------------------------------------------
+    # Simulated application behaviour
+    # ------------------------------------------------------------------
+    def _close_window(self, element):
+        window = element.window()
+        window.detach()
+        self._fire('structure_changed', window.automation_id)
+
+    def _open_fluids_distribution(self, element):
+        self._charge('open_window')
+        self._open('frmFluids')
+
+    def _show_pooh_tab(self, element):
+        tab_control = element.parent
+        if tab_control.find('TabPage2') is None:
+            tab_control.append(self.templates['TabPage2'].clone())
+
+    def _open_fluid_editor(self, element):
+        self._charge('open_window')
+        editor = self._open('FluidEditor', parent=element.window())
+        editor.find('txtDensity').value = f"{self.density:g}"
+
+    def _save_fluid(self, element):
+        self.density = float(element.window().find('txtDensity').value)
+
+    def _pane_value(self, pane_id):
+        pane = self.main.find(pane_id)
+        value = pane.find('txtData').value if pane is not None else ''
+        return float(value) if value else 0.0
+
+    def _trip_in_and_out(self, element):
+        self.trip_count += 1
+        inputs = (
+            self.density,
+            self._pane_value('txtAxialForceOnEndRIH'),
+            self._pane_value('txtAxialForceOnEndPOOH'),
+            self._pane_value('txtWellheadPressureRIH'),
+        )
+        if self.hydraulic_error_every and self.trip_count % self.hydraulic_error_every == 0:
+            self._pending_inputs = inputs
+            self._schedule(self.latencies['calculate'], lambda: self._open('HydraulicErrorQuestion'))
+        else:
+            self._schedule(self.latencies['calculate'], lambda: self._open_graph(inputs))
+
+    def _hydraulic_error_no(self, element):
+        self._close_window(element)
+        self._charge('open_window')
+        self._open('HydraulicErrorNotice')
+
+    def _hydraulic_error_ok(self, element):
+        self._close_window(element)
+        inputs = self._pending_inputs
+        self._schedule(self.latencies['open_window'], lambda: self._open_graph(inputs))
+
+    def _open_graph(self, inputs):
+        graph = self._open('frmOrpheusGraph')
+        graph.inputs = inputs
+
+    def _open_modeled_data(self, element):
+        graph = element.window()
+        self._charge('open_window')
+        data_window = self._open('frmGraphData', parent=graph, index=0)
+        self._fill_grid(data_window.find('grdData'), graph.inputs)
+
+    def _fill_grid(self, grid, inputs):
+        depths, rih, pooh = compute_stretch_table(*inputs, depth_rows=self.depth_rows, well_depth=self.well_depth)
+        header = grid.append(SimElement('Custom', 'Top Row'))
+        for title in ('#', 'Tubing Depth\r(ft)', 'RIH Stretch\r(in)', 'POOH Stretch\r(in)'):
+            cell = header.append(SimElement('Header', title))
+            cell.value = title
+        for i, values in enumerate(zip(depths, rih, pooh)):
+            row = grid.append(SimElement('Custom', f'Row {i}'))
+            texts = [str(i + 1), f"{values[0]:.1f}", f"{values[1]:.3f}", f"{values[2]:.3f}"]
+            for title, text in zip(('#', 'Tubing Depth', 'RIH Stretch', 'POOH Stretch'), texts):
+                cell = row.append(SimElement('Edit', f'{title} Row {i}'))
+                cell.value = text
+
+    def _open_sensitivity(self, element):
+        if 'frmOrphSensitivity' in self.templates:
+            self._charge('open_window')
+            wizard = self._open('frmOrphSensitivity')
+            self._fill_table(wizard.find('grdSensitivityData'), [], [])
+
+    # Sensitivity Analysis Wizard
+    @staticmethod
+    def _format(value):
+        return f"{value:.10g}"
+
+    def _fill_table(self, grid, headers, rows):
+        """Rebuild a DataGridView as a header row plus rows of cell texts"""
+        for row in list(grid.children):
+            row.detach()
+        header = grid.append(SimElement('Custom', 'Top Row'))
+        for title in headers:
+            cell = header.append(SimElement('Header', title))
+            cell.value = title
+        for i, values in enumerate(rows):
+            row = grid.append(SimElement('Custom', f'Row {i}'))
+            for title, text in zip(headers, values):
+                cell = row.append(SimElement('Edit', f'{title} Row {i}'))
+                cell.value = text
+
+    def _matrix_cases(self):
+        titles = [title for title, _ in SENSITIVITY_PARAMETERS]
+        return titles, list(itertools.product(*(self.sensitivity_values[title] for title in titles)))
+
+    def _show_matrix(self, matrix):
+        titles, cases = self._matrix_cases()
+        lists = [self.sensitivity_values[title] for title in titles]
+        value_rows = [[self._format(values[i]) if i < len(values) else '' for values in lists]
+                      for i in range(max(len(values) for values in lists))]
+        self._fill_table(matrix.find('grdVal'), titles, value_rows)
+        self._fill_table(matrix.find('grdMatrix'), ['#'] + titles,
+                         [[str(i + 1)] + [self._format(v) for v in case] for i, case in enumerate(cases)])
+
+    def _open_matrix_wizard(self, element):
+        self._charge('open_window')
+        matrix = self._open('frmSensitivityMatrix', parent=element.window())
+        self._show_matrix(matrix)
+
+    def _open_value_editor(self, element):
+        self._charge('open_window')
+        title = element.name
+        editor = self._open('frmParameterValueEditor', parent=element.window())
+        editor.name = f" Parameter Value Editor - {title.split(chr(10))[0]}"
+        editor.parameter = title
+        values = editor.find('lstValues')
+        for value in self.sensitivity_values[title]:
+            values.append(SimElement('ListItem', self._format(value)))
+
+    def _add_value(self, element):
+        editor = element.window()
+        text = editor.find('txtVal').value
+        if text:
+            editor.find('lstValues').append(SimElement('ListItem', self._format(float(text))))
+            editor.find('txtVal').value = ''
+
+    def _add_series(self, element):
+        editor = element.window()
+        low, high, step = (float(editor.find(automation_id).value) for automation_id in ('txtMin', 'txtMax', 'txtStep'))
+        values = editor.find('lstValues')
+        count = int(round((high - low) / step)) if step else 0
+        for i in range(count + 1):
+            values.append(SimElement('ListItem', self._format(low + i * step)))
+
+    def _delete_value(self, element):
+        values = element.window().find('lstValues')
+        if 0 <= values.selected_index < len(values.children):
+            values.children[values.selected_index].detach()
+        values.selected_index = -1
+
+    def _save_values(self, element):
+        editor = element.window()
+        items = editor.find('lstValues').children
+        self.sensitivity_values[editor.parameter] = sorted({float(item.name) for item in items})
+        matrix = editor.parent.window()
+        self._close_window(element)
+        self._show_matrix(matrix)
+
+    def _apply_matrix(self, element):
+        titles, cases = self._matrix_cases()
+        self.sensitivity_cases = cases
+        wizard = element.window().parent.window()
+        self._close_window(element)
+        self._fill_table(wizard.find('grdSensitivityData'), ['#'] + titles,
+                         [[str(i + 1)] + [self._format(v) for v in case] for i, case in enumerate(cases)])
+
+    def _calculate_sensitivity(self, element):
+        wizard = element.window()
+        cases = self.sensitivity_cases
+        outputs = [(automation_id, column) for automation_id, _, column in SENSITIVITY_OUTPUTS
+                   if wizard.find(automation_id).checked]
+
+        def finish():
+            titles = [title for title, _ in SENSITIVITY_PARAMETERS]
+            rows = []
+            for i, (depth, density, rih, pooh, whp) in enumerate(cases):
+                row = [str(i + 1)] + [self._format(v) for v in (depth, density, rih, pooh, whp)]
+                for automation_id, _ in outputs:
+                    end_force = rih if automation_id == 'chkRIH_Stretch' else pooh
+                    row.append(f"{stretch_at_depth(density, end_force, whp, depth, self.well_depth):.3f}")
+                rows.append(row)
+            self._fill_table(wizard.find('grdSensitivityData'), ['#'] + titles + [column for _, column in outputs], rows)
+            self._fire('structure_changed', 'grdSensitivityData')
+
+        self._schedule(self.latencies['calculate'] + self.latencies['sensitivity_case'] * len(cases), finish)
+
+
+def simulated_instance(target=None, **kwargs):
+    """Backend factory for parallel_runner: one SimulatedOrpheus per worker (target is ignored)"""
+    return SimulatedOrpheus(**kwargs)
+
+
+if __name__ == "__main__":
+    # Headless run of the full per-row workflow against the simulated driver
+    from Automation import run_automation_for_inputs
+
+    inputs = [
+        {'Density_value': 8, 'RIH_wob_value': -1500, 'POOH_wob_value': 1350, 'WHP_value': 0},
+        {'Density_value': 8, 'RIH_wob_value': -10000, 'POOH_wob_value': 0, 'WHP_value': 0},
+        {'Density_value': 9.5, 'RIH_wob_value': -1500, 'POOH_wob_value': 1350, 'WHP_value': 500},
+    ]
+    backend = SimulatedOrpheus(latencies={'find': 0.001, 'click': 0.002, 'calculate': 0.05, 'open_window': 0.01})
+
+    start = time.perf_counter()
+    result_df = run_automation_for_inputs(inputs, backend=backend)
+    elapsed = time.perf_counter() - start
+
+    print(result_df)
+    print(f"\n{len(inputs)} rows in {elapsed:.3f}s ({elapsed / len(inputs):.3f}s/row)")
+    print(f"Simulated operations: {dict(backend.op_counts)}")
@@ -0,0 +1,347 @@
+"""
+Surrogate mode for dense sensitivity grids
+
+Stretch is smooth in WOB and WHP, so a dense grid does not need a Trip In
+and Out run per point. For each density the requested FOE-RIH / FOE-POOH /
+WHP values span a tensor grid; real runs are made on a sparse subset of
+anchor values per axis and every requested point is answered by per-depth
+multilinear interpolation between them.
+
+Refinement is adaptive: for each axis interval the interpolation error is
+estimated as h^2/8 * |f''|, with f'' taken from second differences of the
+neighbouring anchors (an interval without enough neighbours is unbounded).
+The interval with the largest estimate is split at the requested value
+nearest its midpoint and the new slice of the grid is run for real, until
+the estimates are under tolerance or the run budget is spent. The bound is
+reported for every output point (zero where the point was run for real).
+"""
+import itertools
+import numpy as np
+import pandas as pd
+from result_assembly import OUTPUT_COLUMNS, INPUT_COLUMNS
+from result_sinks import ResultSink, ReorderingSink
+
+
+AXES = ('RIH_wob_value', 'POOH_wob_value', 'WHP_value')
+STRETCH_COLUMNS = ['FOE-RIH_Streatch', 'FOE-POOH_Streatch']
+ERROR_COLUMNS = ['FOE-RIH_Streatch_Error', 'FOE-POOH_Streatch_Error']
+
+
+class RowFrames(ResultSink):
+    """Collects one frame (or None for a skipped row) per input row, in input order"""
+
+    def __init__(self):
+        super().__init__()
+        self.frames = []
+
+    def write(self, frame):
+        # Frames handed to sinks are views into a reused buffer
+        self.frames.append(frame.copy())
+        self.rows_written += 1
+
+    def skip(self):
+        self.frames.append(None)
+
+
+def check_results(rows, frames):
+    """
+    Pair runner frames with their input rows: frames holds one entry per
+    finished row (None if it produced no results), so a cancelled run gives
+    a shorter list. Raises if a frame's density / WOB columns don't match
+    its row.
+    """
+    pairs = []
+    for row, frame in zip(rows, frames):
+        if frame is not None:
+            for column, key in INPUT_COLUMNS.items():
+                if not np.allclose(frame[column].to_numpy(dtype=np.float64), float(row[key])):
+                    raise Exception(f"Results for {column}={frame[column].iat[0]} returned for {key}={row[key]}")
+        pairs.append((row, frame))
+    return pairs
+
+
+class SurrogateGrid:
+    """Anchor runs and interpolant for the requested points of one density"""
+
+    def __init__(self, density, rows):
+        self.density = density
+        # Requested values per axis
+        self.values = [np.array(sorted({float(row[axis]) for row in rows})) for axis in AXES]
+        # Anchor values per axis - start with the ends of each range
+        self.anchors = [sorted({v[0], v[-1]}) for v in self.values]
+        self.samples = {}  # (rih, pooh, whp) -> (depth, 2) stretch array
+        self.depths = None
+
+    def pending_rows(self):
+        """Input rows for anchor points of the grid that have not been run yet"""
+        rows = []
+        for point in itertools.product(*self.anchors):
+            if point not in self.samples:
+                rows.append({'Density_value': self.density, **dict(zip(AXES, point))})
+        return rows
+
+    def add_results(self, pairs):
+        """Store (row, frame) pairs from check_results as anchor samples"""
+        for row, frame in pairs:
+            if frame is None:
+                raise Exception(f"No results for anchor {row} - cannot interpolate")
+            depths = frame['FOE-Depth'].to_numpy(dtype=np.float64)
+            if self.depths is None:
+                self.depths = depths
+            elif len(depths) != len(self.depths) or not np.allclose(depths, self.depths):
+                raise Exception("Modeled Data depths differ between runs - cannot interpolate")
+            self.samples[self.key(row)] = frame[STRETCH_COLUMNS].to_numpy(dtype=np.float64)
+
+    @staticmethod
+    def key(row):
+        return tuple(float(row[axis]) for axis in AXES)
+
+    def _tensor(self):
+        """Anchor samples as an array (n_rih, n_pooh, n_whp, depth, 2)"""
+        shape = tuple(len(a) for a in self.anchors)
+        tensor = np.empty(shape + (len(self.depths), len(STRETCH_COLUMNS)))
+        for index in itertools.product(*(range(n) for n in shape)):
+            tensor[index] = self.samples[tuple(self.anchors[d][i] for d, i in enumerate(index))]
+        return tensor
+
+    def interval_errors(self, tensor):
+        """
+        Per axis, estimated interpolation error of each anchor interval as an
+        array (intervals, depth, 2); inf where there are no neighbours to
+        estimate curvature from, 0 where no requested value lies inside.
+        """
+        errors = []
+        for axis, anchors in enumerate(self.anchors):
+            x = np.array(anchors)
+            intervals = len(x) - 1
+            result = np.zeros((max(intervals, 0),) + tensor.shape[3:])
+            if intervals == 0:
+                errors.append(result)
+                continue
+            # Max |f''| over every grid line along this axis, for each anchor triple
+            f = np.moveaxis(tensor, axis, 0)
+            curvature = []
+            for i in range(1, len(x) - 1):
+                second = 2 * ((f[i + 1] - f[i]) / (x[i + 1] - x[i]) - (f[i] - f[i - 1]) / (x[i] - x[i - 1])) / (x[i + 1] - x[i - 1])
+                curvature.append(np.abs(second).reshape(-1, *tensor.shape[3:]).max(axis=0))
+            values = self.values[axis]
+            for j in range(intervals):
+                inside = np.any((values > x[j]) & (values < x[j + 1]))
+                if not inside:
+                    continue
+                # Triples touching interval j: centred on anchor j or j+1
+                near = [curvature[i - 1] for i in (j, j + 1) if 1 <= i <= len(x) - 2]
+                if not near:
+                    result[j] = np.inf
+                else:
+                    result[j] = (x[j + 1] - x[j]) ** 2 / 8 * np.max(near, axis=0)
+            errors.append(result)
+        return errors
+
+    def refine(self, tolerance):
+        """
+        Add an anchor to the interval with the largest error estimate above
+        tolerance. Returns False when nothing is left to refine.
+        """
+        errors = self.interval_errors(self._tensor())
+        worst = None
+        for axis, axis_errors in enumerate(errors):
+            for j, error in enumerate(axis_errors):
+                score = float(np.max(error)) if error.size else 0.0
+                if score > tolerance and (worst is None or score > worst[0]):
+                    worst = (score, axis, j)
+        if worst is None:
+            return False
+
+        _, axis, j = worst
+        low, high = self.anchors[axis][j], self.anchors[axis][j + 1]
+        values = self.values[axis]
+        inside = values[(values > low) & (values < high)]
+        # Requested value nearest the middle, so the new anchors are exact answers
+        self.anchors[axis].append(float(inside[np.argmin(np.abs(inside - (low + high) / 2))]))
+        self.anchors[axis].sort()
+        return True
+
+    def predict(self, rows, resolution=0.0):
+        """
+        (stretch, error) arrays of shape (rows, depth, 2) for requested rows.
+        Interpolated points also carry the grid's display resolution.
+        """
+        tensor = self._tensor()
+        errors = self.interval_errors(tensor)
+        points = np.array([[float(row[axis]) for axis in AXES] for row in rows])
+
+        # Bracketing interval and weight per point and axis
+        indices, weights = [], []
+        bound = np.zeros((len(rows),) + tensor.shape[3:])
+        exact = np.ones(len(points), dtype=bool)
+        for axis, anchors in enumerate(self.anchors):
+            x = np.array(anchors)
+            if len(x) == 1:
+                indices.append(np.zeros(len(points), dtype=int))
+                weights.append(np.zeros(len(points)))
+                continue
+            i = np.clip(np.searchsorted(x, points[:, axis], side='right') - 1, 0, len(x) - 2)
+            t = (points[:, axis] - x[i]) / (x[i + 1] - x[i])
+            indices.append(i)
+            weights.append(t)
+            # Points on an anchor of this axis carry no error from it
+            on_anchor = np.isclose(t, 0) | np.isclose(t, 1)
+            bound += np.where(on_anchor[:, None, None], 0.0, errors[axis][i])
+            exact &= on_anchor
+        bound[~exact] += resolution
+
+        stretch = np.zeros_like(bound)
+        for corner in itertools.product((0, 1), repeat=len(AXES)):
+            weight = np.ones(len(points))
+            index = []
+            for axis, c in enumerate(corner):
+                if len(self.anchors[axis]) == 1:
+                    if c:
+                        weight = weight * 0
+                    index.append(indices[axis])
+                    continue
+                weight = weight * (weights[axis] if c else 1 - weights[axis])
+                index.append(indices[axis] + c)
+            if not weight.any():
+                continue
+            stretch += weight[:, None, None] * tensor[tuple(index)]
+        return stretch, bound
+
+
+def _answer(row, depths, stretch, bound):
+    """Output block of one requested point"""
+    return pd.DataFrame({
+        'FOE-Depth': depths,
+        'FOE-Pipe Fluid Density': float(row['Density_value']),
+        'FOE-RIH': float(row['RIH_wob_value']),
+        'FOE-POOH': float(row['POOH_wob_value']),
+        'FOE-RIH_Streatch': stretch[:, 0],
+        'FOE-POOH_Streatch': stretch[:, 1],
+        'FOE-RIH_Streatch_Error': bound[:, 0],
+        'FOE-POOH_Streatch_Error': bound[:, 1],
+    }, columns=OUTPUT_COLUMNS + ERROR_COLUMNS)
+
+
+def _exact_answer(row, frame):
+    """Block of a point that was run for real: the grid's values, no error"""
+    stretch = frame[STRETCH_COLUMNS].to_numpy(dtype=np.float64)
+    return _answer(row, frame['FOE-Depth'].to_numpy(dtype=np.float64), stretch, np.zeros_like(stretch))
+
+
+def run_surrogate_sweep(input_rows, runner=None, tolerance=0.01, max_runs=None, resolution=0.001, sink=None,
+                        **run_kwargs):
+    """
+    Answer input_rows from a surrogate fitted on a sparse set of real runs.
+
+    runner(rows) must return one FOE frame per finished row, in order (None
+    for a row without results) - the default runs run_automation_for_inputs
+    with run_kwargs into a RowFrames sink. tolerance is the largest accepted
+    error estimate in inches; max_runs caps real runs, corner runs included
+    (default: no more than the number of requested points). A density whose
+    corner runs would cost as many runs as it has points is run directly.
+    resolution is the rounding of the grid's stretch values (0.001 in).
+
+    Returns (frame, real_runs) where frame has the usual FOE columns in input
+    order plus per-point error bounds. Each density's points are written as
+    soon as it is done; with a sink they are written to it (one row per
+    point) and frame is sink.result(). If the run is cancelled, the points
+    answered so far are kept - including those of the density in progress
+    that were already run for real.
+    """
+    if runner is None:
+        from Automation import run_automation_for_inputs
+
+        def runner(rows):
+            frames = RowFrames()
+            # Rows of one call share a density, so input order is already the best order
+            run_automation_for_inputs(rows, sink=frames, **{**run_kwargs, 'plan': False})
+            return frames.frames
+
+    cancel_token = run_kwargs.get('cancel_token')
+    budget = len(input_rows) if max_runs is None else max_runs
+    positions = {}
+    for position, row in enumerate(input_rows):
+        positions.setdefault(row['Density_value'], []).append(position)
+    grids = {density: SurrogateGrid(density, [input_rows[p] for p in members])
+             for density, members in positions.items()}
+
+    # Fewest runs that answer each density: its corners, or its points run directly
+    minimum = {density: min(len(grid.pending_rows()), len(positions[density])) for density, grid in grids.items()}
+    if sum(minimum.values()) > budget:
+        raise Exception(f"Surrogate needs at least {sum(minimum.values())} runs, max_runs is {budget}")
+
+    blocks = {}
+    output = ReorderingSink(sink, range(len(input_rows))) if sink is not None else None
+
+    def answer(position, block):
+        blocks[position] = block
+        if output is not None:
+            output.write_row(position, block)
+
+    real_runs = 0
+    cancelled = False
+    try:
+        for n, (density, grid) in enumerate(grids.items()):
+            members = positions[density]
+            rows = [input_rows[p] for p in members]
+            # Leave the later densities enough runs for their corners
+            allowance = budget - real_runs - sum(list(minimum.values())[n + 1:])
+            if minimum[density] == len(rows):
+                pairs = check_results(rows, runner(rows))
+                real_runs += len(pairs)
+                for position, (row, frame) in zip(members, pairs):
+                    if frame is not None:
+                        answer(position, _exact_answer(row, frame))
+                if cancel_token is not None and cancel_token.cancelled:
+                    cancelled = True
+                    break
+                continue
+
+            density_runs = 0
+            while True:
+                pending = grid.pending_rows()
+                if pending:
+                    if density_runs + len(pending) > allowance:
+                        print(f"Surrogate: run budget reached at density {density}")
+                        # Drop the anchor whose slice could not be run
+                        grid.anchors = [[a for a in anchors if any(
+                            key[axis] == a for key in grid.samples)] for axis, anchors in enumerate(grid.anchors)]
+                        break
+                    pairs = check_results(pending, runner(pending))
+                    density_runs += len(pairs)
+                    if cancel_token is not None and cancel_token.cancelled:
+                        # A cancelled run returns only the rows it finished
+                        grid.add_results([(row, frame) for row, frame in pairs if frame is not None])
+                        cancelled = True
+                        break
+                    grid.add_results(pairs)
+                if not grid.refine(tolerance):
+                    break
+            real_runs += density_runs
+
+            if cancelled:
+                # Points that were run for real are exact answers even without the interpolant
+                for position, row in zip(members, rows):
+                    sample = grid.samples.get(grid.key(row))
+                    if sample is not None:
+                        answer(position, _answer(row, grid.depths, sample, np.zeros_like(sample)))
+                break
+
+            stretch, bound = grid.predict(rows, resolution)
+            for i, (position, row) in enumerate(zip(members, rows)):
+                answer(position, _answer(row, grid.depths, stretch[i], bound[i]))
+    finally:
+        # Answered points stay in the output even if a run fails
+        if output is not None:
+            output.close()
+
+    if cancelled:
+        print(f"Surrogate: stopped after {real_runs} real runs, {len(blocks)} of {len(input_rows)} points answered")
+    else:
+        print(f"Surrogate: {real_runs} real runs for {len(input_rows)} requested points")
+    if sink is not None:
+        return sink.result(), real_runs
+    if not blocks:
+        return pd.DataFrame(columns=OUTPUT_COLUMNS + ERROR_COLUMNS), real_runs
+    return pd.concat([blocks[position] for position in sorted(blocks)], ignore_index=True), real_runs
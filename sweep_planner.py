@@ -0,0 +1,128 @@
+"""
+Execution planner for input tables
+
+Changing the fluid density (Cerbers_functions.New_Fluid_Density, ~14 UI
+actions across two fluid editors) costs far more than a stretch row, so an
+unsorted table pays it on almost every row. The planner groups rows by
+density, starts with the density Orpheus is already on, and keeps the
+user's order within each group and between the remaining groups. Costs come
+from median timings in the perf_log store; results are put back into the
+original row order by the caller (see result_sinks.ReorderingSink).
+"""
+import statistics
+from perf_store import default_store
+
+
+# Timed steps making up one density change and one stretch row
+DENSITY_STEPS = ['Window_Orpheus_Main', 'Window_Fluids_Distribution', 'Window_Fluid_Editor',
+                 'StringFluidEditor_POOH', 'Window_Fluid_Editor']
+ROW_STEPS = ['Trip_in_Out_Buttons', 'Drop_Down_Streatcher', 'Modeled_Data_Button',
+             'Modeled_Data_df', 'OK_Button', 'OK_Button']
+
+# Seconds used when the performance log has no timings yet
+DEFAULT_DENSITY_CHANGE_COST = 6.0
+DEFAULT_ROW_COST = 3.0
+# Recent runs read for the medians, so startup doesn't read the whole log
+HISTORY_RUNS = 5
+
+
+class StepCosts:
+    """Estimated seconds for one density change and for one stretch row"""
+
+    def __init__(self, density_change=DEFAULT_DENSITY_CHANGE_COST, row=DEFAULT_ROW_COST):
+        self.density_change = density_change
+        self.row = row
+
+    @classmethod
+    def from_performance_log(cls, store=None, runs=HISTORY_RUNS):
+        """Median timings of the last runs runs in the perf_log store, with defaults for anything missing"""
+        samples = {}
+        store = store if store is not None else default_store()
+        try:
+            timings = store.read('timings', columns=['function', 'elapsed'],
+                                 parts=store.recent_parts('timings', runs))
+            # Modeled_Data_df is logged per grid mode, e.g. Modeled_Data_df[bulk]
+            functions = timings['function'].astype(str).str.split('[').str[0]
+            samples = {function: group.tolist() for function, group in timings['elapsed'].groupby(functions)}
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Warning: could not read step costs from {store.root}: {e}")
+
+        def median(function):
+            values = samples.get(function)
+            return statistics.median(values) if values else None
+
+        def total(steps, default):
+            medians = [median(step) for step in steps]
+            if any(value is None for value in medians):
+                return default
+            return sum(medians)
+
+        # The whole workflow is timed directly; the sum of its timed steps is a lower bound
+        density_change = median('New_Fluid_Density')
+        if density_change is None:
+            density_change = total(DENSITY_STEPS, DEFAULT_DENSITY_CHANGE_COST)
+        return cls(density_change, total(ROW_STEPS, DEFAULT_ROW_COST))
+
+
+class SweepPlan:
+    """Order to run the input rows in, with estimated costs before and after planning"""
+
+    def __init__(self, order, density_changes, original_density_changes, costs, rows):
+        self.order = order
+        self.density_changes = density_changes
+        self.original_density_changes = original_density_changes
+        self.estimated_seconds = rows * costs.row + density_changes * costs.density_change
+        self.original_seconds = rows * costs.row + original_density_changes * costs.density_change
+
+    @property
+    def saved_seconds(self):
+        return self.original_seconds - self.estimated_seconds
+
+    def describe(self):
+        return (f"Plan: {self.density_changes} density changes instead of {self.original_density_changes} "
+                f"(~{self.estimated_seconds:.0f}s instead of ~{self.original_seconds:.0f}s)")
+
+
+def count_density_changes(densities, current_density=None):
+    """Number of New_Fluid_Density calls needed to run densities in order"""
+    changes = 0
+    previous = current_density
+    for density in densities:
+        if density != previous:
+            changes += 1
+            previous = density
+    return changes
+
+
+def plan_sweep(input_rows, costs=None, current_density=None, skip=None):
+    """
+    Plan the execution order of input_rows (indices into the list).
+
+    Rows are grouped by density; the group matching current_density (the
+    density Orpheus is already on - only pass one applied and verified in
+    this process, never one read back from a journal) runs first, the
+    others in order of first appearance. Rows for which skip(row) is true (e.g. already checkpointed)
+    need no UI work, so they don't count as density changes.
+    """
+    if costs is None:
+        costs = StepCosts.from_performance_log()
+
+    groups = {}
+    for position, row in enumerate(input_rows):
+        groups.setdefault(row['Density_value'], []).append(position)
+
+    densities = list(groups)
+    if current_density in groups:
+        densities.remove(current_density)
+        densities.insert(0, current_density)
+    order = [position for density in densities for position in groups[density]]
+
+    def run_densities(positions):
+        return [input_rows[position]['Density_value'] for position in positions
+                if skip is None or not skip(input_rows[position])]
+
+    work = run_densities(order)
+    return SweepPlan(order,
+                     count_density_changes(work, current_density),
+                     count_density_changes(run_densities(range(len(input_rows))), current_density),
+                     costs, len(work))
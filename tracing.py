@@ -0,0 +1,198 @@
+"""
+Hot-path tracing for sweeps
+
+Spans (row -> step -> UIA call) are recorded as complete events with
+monotonic nanosecond timestamps into a preallocated NumPy ring buffer: one
+slot write per span, no strings, no allocation. When tracing is disabled,
+span() returns a shared no-op context and record() returns at once, and the
+backend is not wrapped at all.
+
+Enable with tracer.enable(path) (cli.py --trace) or the STRETCH_TRACE
+environment variable (a '{pid}' in the path is replaced, for worker
+processes), then open the exported JSON in chrome://tracing or Perfetto to
+see the sweep on a flame timeline.
+"""
+import json
+import os
+import threading
+import time
+from pathlib import Path
+import numpy as np
+
+
+EVENT_DTYPE = np.dtype([('start', np.int64), ('end', np.int64), ('name', np.int32),
+                        ('category', np.int32), ('thread', np.int64), ('arg', np.int64)])
+
+
+class _NullSpan:
+    """Span used while tracing is disabled"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    def __init__(self, tracer, name, category, arg):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.arg = arg
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.tracer.record(self.name, self.start, time.perf_counter_ns(), self.category, self.arg)
+        return False
+
+
+class Tracer:
+    """Ring buffer of complete spans"""
+
+    def __init__(self, capacity=1 << 16):
+        self.enabled = False
+        self.path = None
+        self.capacity = capacity
+        self._events = None
+        self._count = 0  # Spans recorded since the last clear (may exceed capacity)
+        self._ids = {}
+        self._names = []
+        self._threads = {}
+        self._lock = threading.Lock()
+        self._epoch = time.perf_counter_ns()
+
+    def enable(self, path=None, capacity=None):
+        """Start recording; path is where flush() writes the Chrome trace"""
+        if capacity is not None:
+            self.capacity = capacity
+        if self._events is None or len(self._events) != self.capacity:
+            self._events = np.zeros(self.capacity, dtype=EVENT_DTYPE)
+            self._count = 0
+        if path is not None:
+            self.path = str(path).replace('{pid}', str(os.getpid()))
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def clear(self):
+        with self._lock:
+            self._count = 0
+            self._epoch = time.perf_counter_ns()
+
+    @property
+    def dropped(self):
+        """Spans overwritten because the ring buffer wrapped"""
+        return max(0, self._count - self.capacity)
+
+    @property
+    def names(self):
+        """Span names and categories, indexed by the 'name' and 'category' fields of events()"""
+        return list(self._names)
+
+    def _intern(self, table, names, key):
+        found = table.get(key)
+        if found is None:
+            found = table[key] = len(names)
+            names.append(key)
+        return found
+
+    def span(self, name, category='step', arg=-1):
+        """Context manager timing a block as one span"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, category, arg)
+
+    def record(self, name, start_ns, end_ns, category='step', arg=-1):
+        """Record a finished span (perf_counter_ns timestamps)"""
+        if not self.enabled:
+            return
+        thread = threading.get_ident()
+        with self._lock:
+            if thread not in self._threads:
+                self._threads[thread] = threading.current_thread().name
+            self._events[self._count % self.capacity] = (
+                start_ns, end_ns, self._intern(self._ids, self._names, name),
+                self._intern(self._ids, self._names, category), thread, arg)
+            self._count += 1
+
+    def events(self):
+        """Recorded spans, oldest first, as a structured array"""
+        if self._events is None or self._count == 0:
+            return np.zeros(0, dtype=EVENT_DTYPE)
+        with self._lock:
+            if self._count <= self.capacity:
+                events = self._events[:self._count].copy()
+            else:
+                split = self._count % self.capacity
+                events = np.concatenate([self._events[split:], self._events[:split]])
+        return events[np.argsort(events['start'], kind='stable')]
+
+    def chrome_trace(self):
+        """Trace as a Chrome trace-event dict (complete 'X' events, microseconds)"""
+        events = self.events()
+        pid = os.getpid()
+        trace = [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': thread, 'args': {'name': name}}
+                 for thread, name in self._threads.items()]
+        starts = (events['start'] - self._epoch) / 1000.0
+        durations = (events['end'] - events['start']) / 1000.0
+        for event, start, duration in zip(events, starts, durations):
+            entry = {'name': self._names[event['name']], 'cat': self._names[event['category']], 'ph': 'X',
+                     'ts': round(float(start), 3), 'dur': round(float(duration), 3),
+                     'pid': pid, 'tid': int(event['thread'])}
+            if event['arg'] >= 0:
+                entry['args'] = {'row': int(event['arg'])}
+            trace.append(entry)
+        return {'traceEvents': trace, 'displayTimeUnit': 'ms',
+                'otherData': {'dropped_spans': self.dropped}}
+
+    def export_chrome_trace(self, path=None):
+        """Write the Chrome trace JSON; returns the path written"""
+        path = Path(path or self.path or "trace.json")
+        with open(path, 'w') as f:
+            json.dump(self.chrome_trace(), f)
+        return path
+
+    def flush(self):
+        """Export to the configured path, if tracing with one"""
+        if self.enabled and self.path and self._count:
+            path = self.export_chrome_trace()
+            print(f"Trace saved to: {path}" + (f" ({self.dropped} oldest spans dropped)" if self.dropped else ""))
+
+
+class TracedBackend:
+    """UI backend proxy recording every backend call as a 'uia' span"""
+
+    def __init__(self, backend, tracer):
+        self._backend = backend
+        self._tracer = tracer
+
+    def __getattr__(self, name):
+        attribute = getattr(self._backend, name)
+        if name.startswith('_') or not callable(attribute):
+            return attribute
+        tracer = self._tracer
+
+        def traced(*args, **kwargs):
+            start = time.perf_counter_ns()
+            try:
+                return attribute(*args, **kwargs)
+            finally:
+                tracer.record(name, start, time.perf_counter_ns(), 'uia')
+
+        # Cache the wrapper so later lookups skip __getattr__
+        setattr(self, name, traced)
+        return traced
+
+
+# Process-wide tracer
+tracer = Tracer()
+if os.environ.get('STRETCH_TRACE'):
+    tracer.enable(os.environ['STRETCH_TRACE'])
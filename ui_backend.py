@@ -0,0 +1,334 @@
+"""
+UI backend interface used by Button_Repository
+
+A backend knows how to attach to Orpheus, find controls and act on them.
+Element handles are opaque to the repository: the UIA backend hands out
+pywinauto UIAWrapper objects, the simulated backend its own tree nodes.
+"""
+import time
+from uia_client import get_automation_client, UIA_AutomationIdPropertyId, UIA_NamePropertyId, TreeScope_Subtree
+from search_counters import search_counters
+
+
+UIA_Window_WindowOpenedEventId = 20016
+
+# Properties prefetched for bulk grid reads
+UIA_IsValuePatternAvailablePropertyId = 30043
+UIA_ValueValuePropertyId = 30045
+UIA_IsLegacyIAccessiblePatternAvailablePropertyId = 30090
+UIA_LegacyIAccessibleValuePropertyId = 30093
+AutomationElementMode_None = 0
+
+
+class StaleElementError(Exception):
+    """Raised when an action targets an element that no longer exists"""
+
+
+class UIBackend:
+    """Operations Button_Repository needs from a UI driver"""
+
+    def connect(self):
+        """Attach to Orpheus and return the main window handle"""
+        raise NotImplementedError
+
+    def top_window(self):
+        """Return the current top-level window handle"""
+        raise NotImplementedError
+
+    def window_title(self):
+        """Title of the Orpheus main window"""
+        raise NotImplementedError
+
+    def find_by_automation_id(self, parent, automation_id, index=0):
+        """Return the index-th descendant of parent with the AutomationId, or None"""
+        raise NotImplementedError
+
+    def find_by_name(self, parent, name):
+        """Return the first descendant of parent with the Name, or None"""
+        raise NotImplementedError
+
+    def click(self, element):
+        """Invoke the element (no mouse movement)"""
+        raise NotImplementedError
+
+    def click_input(self, element, focus=True):
+        """Click the element with the mouse, focusing it first unless focus=False"""
+        raise NotImplementedError
+
+    def children(self, element):
+        """Direct children of element (e.g. the items of a list)"""
+        raise NotImplementedError
+
+    def set_checked(self, element, checked):
+        """Tick or clear a check box"""
+        raise NotImplementedError
+
+    def set_text(self, element, text):
+        """Replace the text of an edit control"""
+        raise NotImplementedError
+
+    def select(self, element, index):
+        """Select an item of a combo box by index"""
+        raise NotImplementedError
+
+    def expand(self, element):
+        """Expand a menu item or tree node"""
+        raise NotImplementedError
+
+    def read_grid(self, grid):
+        """Return the grid contents as a list of rows (lists of cell strings)"""
+        raise NotImplementedError
+
+    def read_grid_bulk(self, grid):
+        """
+        Same result as read_grid, fetched in a single request.
+        Returns None if the backend cannot do bulk reads.
+        """
+        return None
+
+    def clipboard(self):
+        """Clipboard that copy_grid writes to, or None if the backend cannot copy grids"""
+        return None
+
+    def copy_grid(self, grid):
+        """Select every cell of the grid and copy it to the clipboard as tab-delimited text"""
+        raise NotImplementedError
+
+    def fingerprint(self, element):
+        """Cheap identity of a live element (its runtime id), or None if unavailable"""
+        raise NotImplementedError
+
+    def is_alive(self, element, fingerprint):
+        """True if element still exists and still matches fingerprint"""
+        raise NotImplementedError
+
+    def subscribe_window_events(self, callback):
+        """
+        Call callback(event_type, automation_id) when a window opens
+        ('window_opened') or the tree changes ('structure_changed').
+        Returns a subscription handle, or None if events are not supported.
+        """
+        return None
+
+    def unsubscribe_window_events(self, subscription):
+        """Cancel a subscription returned by subscribe_window_events"""
+
+
+def _wrap(element):
+    """Wrap a raw IUIAutomationElement in a pywinauto UIAWrapper"""
+    from pywinauto.controls.uiawrapper import UIAWrapper
+    from pywinauto.uia_element_info import UIAElementInfo
+    return UIAWrapper(UIAElementInfo(element))
+
+
+def _children(element):
+    """element.children() (one FindAll over the child scope), counted as a search"""
+    start = time.perf_counter_ns()
+    children = element.children()
+    search_counters.record('FindAll', 'True', 'Children', len(children), time.perf_counter_ns() - start)
+    return children
+
+
+def find_element_fast(root_element, automation_id, found_index=0):
+    """
+    Fast element search using direct UIA API
+    10x faster than pywinauto's window() search
+    """
+    client = get_automation_client()
+    element = client.find_nth(root_element, UIA_AutomationIdPropertyId, automation_id, found_index)
+    return _wrap(element) if element else None
+
+
+def find_element_by_title(root_element, title):
+    """Fast search by title/name"""
+    client = get_automation_client()
+    element = client.find_first(root_element, UIA_NamePropertyId, title)
+    return _wrap(element) if element else None
+
+
+class UIABackend(UIBackend):
+    """Drives a live Orpheus window through pywinauto and the shared UIA client"""
+
+    def __init__(self, auto_id="frmOrpheus", process=None):
+        self.auto_id = auto_id
+        self.process = process
+        self.app = None
+
+    def connect(self):
+        from pywinauto import Application
+        if self.process is not None:
+            self.app = Application(backend="uia").connect(process=self.process)
+        else:
+            self.app = Application(backend="uia").connect(auto_id=self.auto_id)
+        return self.top_window()
+
+    def top_window(self):
+        # Resolved once - a WindowSpecification would re-find the top window on every search
+        return self.app.top_window().wrapper_object()
+
+    def window_title(self):
+        return self.app.window(auto_id=self.auto_id).window_text()
+
+    def find_by_automation_id(self, parent, automation_id, index=0):
+        return find_element_fast(parent.element_info.element, automation_id, index)
+
+    def find_by_name(self, parent, name):
+        return find_element_by_title(parent.element_info.element, name)
+
+    def click(self, element):
+        element.click()
+
+    def click_input(self, element, focus=True):
+        if focus:
+            element.set_focus()
+        element.click_input()
+
+    def children(self, element):
+        return _children(element)
+
+    def set_checked(self, element, checked):
+        if element.get_toggle_state() != int(bool(checked)):
+            element.toggle()
+
+    def set_text(self, element, text):
+        element.set_text(text)
+
+    def select(self, element, index):
+        element.select(index)
+
+    def expand(self, element):
+        element.set_focus()
+        element.expand()
+
+    def read_grid(self, grid):
+        rows = []
+        for row in _children(grid):
+            row_data = []
+            for cell in _children(row):
+                # Try to get actual value instead of title
+                try:
+                    # Try Value pattern first
+                    if hasattr(cell, 'iface_value') and cell.iface_value:
+                        cell_text = cell.get_value()
+                    else:
+                        # Fall back to legacy value
+                        cell_text = cell.legacy_properties().get('Value', cell.window_text())
+                except Exception:
+                    # Last resort - use window text
+                    cell_text = cell.window_text()
+                row_data.append(cell_text)
+            rows.append(row_data)
+        return rows
+
+    def read_grid_bulk(self, grid):
+        client = get_automation_client().client
+        request = client.CreateCacheRequest()
+        for property_id in (UIA_NamePropertyId,
+                            UIA_IsValuePatternAvailablePropertyId, UIA_ValueValuePropertyId,
+                            UIA_IsLegacyIAccessiblePatternAvailablePropertyId, UIA_LegacyIAccessibleValuePropertyId):
+            request.AddProperty(property_id)
+        request.TreeScope = TreeScope_Subtree
+        request.TreeFilter = client.CreateTrueCondition()
+        # Properties only - no live element references to marshal back
+        request.AutomationElementMode = AutomationElementMode_None
+
+        # One cross-process round trip for the whole grid
+        start = time.perf_counter_ns()
+        snapshot = grid.element_info.element.BuildUpdatedCache(request)
+        elapsed = time.perf_counter_ns() - start
+
+        def cached_children(element):
+            children = element.GetCachedChildren()
+            if children is None:
+                return []
+            return [children.GetElement(i) for i in range(children.Length)]
+
+        rows = []
+        for row in cached_children(snapshot):
+            row_data = []
+            for cell in cached_children(row):
+                # Same preference order as read_grid: Value, legacy Value, Name
+                if cell.GetCachedPropertyValue(UIA_IsValuePatternAvailablePropertyId):
+                    cell_text = cell.GetCachedPropertyValue(UIA_ValueValuePropertyId)
+                elif cell.GetCachedPropertyValue(UIA_IsLegacyIAccessiblePatternAvailablePropertyId):
+                    cell_text = cell.GetCachedPropertyValue(UIA_LegacyIAccessibleValuePropertyId)
+                else:
+                    cell_text = cell.CachedName
+                row_data.append(cell_text if cell_text is not None else cell.CachedName)
+            rows.append(row_data)
+        search_counters.record('BuildUpdatedCache', 'True', 'Subtree', len(rows) + sum(len(row) for row in rows),
+                               elapsed)
+        return rows
+
+    def clipboard(self):
+        from grid_capture import Win32Clipboard
+        return Win32Clipboard()
+
+    def copy_grid(self, grid):
+        # Ctrl+A / Ctrl+C - the DataGridView copies headers and cells as TSV
+        grid.set_focus()
+        grid.type_keys("^a^c", set_foreground=False)
+
+    def fingerprint(self, element):
+        try:
+            runtime_id = element.element_info.runtime_id
+        except Exception:
+            return None
+        return tuple(runtime_id) if runtime_id else None
+
+    def is_alive(self, element, fingerprint):
+        try:
+            if fingerprint is not None:
+                return self.fingerprint(element) == fingerprint
+            # No runtime id to compare - probe the bounding rectangle instead
+            rect = element.element_info.rectangle
+            return rect.width() > 0 and rect.height() > 0
+        except Exception:
+            return False
+
+    def subscribe_window_events(self, callback):
+        try:
+            import comtypes
+            from comtypes.gen.UIAutomationClient import (
+                IUIAutomationEventHandler, IUIAutomationStructureChangedEventHandler)
+        except ImportError:
+            return None
+
+        def automation_id(sender):
+            try:
+                return sender.CurrentAutomationId
+            except Exception:
+                return ''
+
+        class WindowOpenedHandler(comtypes.COMObject):
+            _com_interfaces_ = [IUIAutomationEventHandler]
+
+            def IUIAutomationEventHandler_HandleAutomationEvent(self, sender, event_id):
+                callback('window_opened', automation_id(sender))
+
+        class StructureChangedHandler(comtypes.COMObject):
+            _com_interfaces_ = [IUIAutomationStructureChangedEventHandler]
+
+            def IUIAutomationStructureChangedEventHandler_HandleStructureChangedEvent(self, sender, change_type, runtime_id):
+                callback('structure_changed', automation_id(sender))
+
+        client = get_automation_client().client
+        root = self.top_window().element_info.element
+        opened = WindowOpenedHandler()
+        changed = StructureChangedHandler()
+        try:
+            client.AddAutomationEventHandler(UIA_Window_WindowOpenedEventId, root, TreeScope_Subtree, None, opened)
+            client.AddStructureChangedEventHandler(root, TreeScope_Subtree, None, changed)
+        except Exception as e:
+            print(f"Warning: UIA event subscription failed, falling back to polling: {e}")
+            return None
+        return (root, opened, changed)
+
+    def unsubscribe_window_events(self, subscription):
+        root, opened, changed = subscription
+        client = get_automation_client().client
+        try:
+            client.RemoveAutomationEventHandler(UIA_Window_WindowOpenedEventId, root, opened)
+            client.RemoveStructureChangedEventHandler(root, changed)
+        except Exception:
+            pass
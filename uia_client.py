@@ -0,0 +1,159 @@
+"""
+Shared UI Automation client for fast element searches
+
+Creating the IUIAutomation COM object (and loading UIAutomationCore.dll) is
+expensive, so the client is created once per process and property conditions
+are interned by (property id, value). The COM calls go through a small client
+backend so the layer can be exercised against a fake client off Windows.
+"""
+import threading
+import time
+from search_counters import search_counters
+
+
+# UIA property ids used by the repository searches
+UIA_AutomationIdPropertyId = 30011
+UIA_NamePropertyId = 30005
+
+# UIA TreeScope values (same as comtypes.gen.UIAutomationClient)
+TreeScope_Element = 1
+TreeScope_Children = 2
+TreeScope_Descendants = 4
+TreeScope_Subtree = 7
+
+# Names used when counting searches
+CONDITION_NAMES = {UIA_AutomationIdPropertyId: 'AutomationId', UIA_NamePropertyId: 'Name'}
+SCOPE_NAMES = {TreeScope_Element: 'Element', TreeScope_Children: 'Children',
+               TreeScope_Descendants: 'Descendants', TreeScope_Subtree: 'Subtree'}
+
+
+class ComtypesClientBackend:
+    """Creates the real IUIAutomation client through comtypes (Windows only)"""
+
+    CLSID_CUIAutomation = '{ff48dba4-60ef-4201-aa87-54103eef594e}'
+
+    def create_client(self):
+        """Load UIAutomationCore.dll and create the IUIAutomation COM object"""
+        import comtypes.client
+        comtypes.client.GetModule('UIAutomationCore.dll')
+        from comtypes.gen.UIAutomationClient import IUIAutomation
+        return comtypes.client.CreateObject(self.CLSID_CUIAutomation, interface=IUIAutomation)
+
+
+class AutomationClient:
+    """
+    Process-wide wrapper around one IUIAutomation client.
+
+    The client object only needs to provide CreatePropertyCondition, and the
+    root elements passed to find_first/find_all only need FindFirst/FindAll,
+    so any object with that shape can stand in for the COM client.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend if backend is not None else ComtypesClientBackend()
+        self._client = None
+        self._conditions = {}
+        self._lock = threading.Lock()
+        self.client_creations = 0
+        self.condition_hits = 0
+        self.condition_misses = 0
+
+    @property
+    def client(self):
+        """The IUIAutomation client, created on first use"""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self.backend.create_client()
+                    self.client_creations += 1
+        return self._client
+
+    def condition(self, property_id, value):
+        """Return an interned property condition for (property_id, value)"""
+        key = (property_id, value)
+        condition = self._conditions.get(key)
+        if condition is not None:
+            self.condition_hits += 1
+            return condition
+
+        client = self.client
+        with self._lock:
+            condition = self._conditions.get(key)
+            if condition is None:
+                condition = client.CreatePropertyCondition(property_id, value)
+                self._conditions[key] = condition
+                self.condition_misses += 1
+            else:
+                self.condition_hits += 1
+        return condition
+
+    def find_first(self, root_element, property_id, value, scope=TreeScope_Descendants):
+        """FindFirst below root_element, returns the raw element or None"""
+        condition = self.condition(property_id, value)
+        start = time.perf_counter_ns()
+        element = root_element.FindFirst(scope, condition)
+        search_counters.record('FindFirst', CONDITION_NAMES.get(property_id, property_id),
+                               SCOPE_NAMES.get(scope, scope), 1 if element else 0, time.perf_counter_ns() - start)
+        return element
+
+    def find_all(self, root_element, property_id, value, scope=TreeScope_Descendants):
+        """FindAll below root_element, returns the raw element array"""
+        condition = self.condition(property_id, value)
+        start = time.perf_counter_ns()
+        elements = root_element.FindAll(scope, condition)
+        search_counters.record('FindAll', CONDITION_NAMES.get(property_id, property_id),
+                               SCOPE_NAMES.get(scope, scope), elements.Length if elements else 0,
+                               time.perf_counter_ns() - start)
+        return elements
+
+    def find_nth(self, root_element, property_id, value, index, scope=TreeScope_Descendants):
+        """Return the index-th match below root_element or None"""
+        if index == 0:
+            return self.find_first(root_element, property_id, value, scope)
+        elements_array = self.find_all(root_element, property_id, value, scope)
+        if index < elements_array.Length:
+            return elements_array.GetElement(index)
+        return None
+
+    def stats(self):
+        """Cache counters as a dict"""
+        lookups = self.condition_hits + self.condition_misses
+        return {
+            'client_creations': self.client_creations,
+            'condition_hits': self.condition_hits,
+            'condition_misses': self.condition_misses,
+            'cached_conditions': len(self._conditions),
+            'hit_rate': self.condition_hits / lookups if lookups else 0.0,
+        }
+
+    def reset_stats(self):
+        """Zero the hit/miss counters (cached objects are kept)"""
+        self.condition_hits = 0
+        self.condition_misses = 0
+
+    def clear(self):
+        """Drop the cached conditions so they are rebuilt on next use"""
+        with self._lock:
+            self._conditions.clear()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_automation_client():
+    """Return the shared AutomationClient, creating it on first use"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = AutomationClient()
+    return _client
+
+
+def set_automation_client(client):
+    """Replace the shared AutomationClient (e.g. with one using a fake backend)"""
+    global _client
+    with _client_lock:
+        _client = client
+    return client
@@ -0,0 +1,100 @@
+"""
+Adaptive wait scheduling from learned transition latencies
+
+Each named UI transition (Trip In and Out -> graph window, OK -> graph closed,
+...) records how long it actually took. Waits for that transition then probe
+first near the learned median and back off exponentially, and their timeout
+comes from the learned p99 instead of a hard-coded max_wait.
+"""
+from collections import deque
+
+
+TRANSITION_PREFIX = "transition:"
+
+
+class WaitScheduler:
+    """Per-transition latency history with probe schedules and timeouts derived from it"""
+
+    def __init__(self, on_record=None, max_samples=200, min_samples=5,
+                 default_interval=0.05, min_interval=0.01, max_interval=0.5,
+                 timeout_margin=3.0, min_timeout=2.0, max_timeout=120.0):
+        # on_record(name, elapsed) is called for every new sample (performance log hook)
+        self.on_record = on_record
+        self.max_samples = max_samples
+        self.min_samples = min_samples
+        self.default_interval = default_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.timeout_margin = timeout_margin
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self._samples = {}
+
+    def _history(self, name):
+        samples = self._samples.get(name)
+        if samples is None:
+            samples = self._samples[name] = deque(maxlen=self.max_samples)
+        return samples
+
+    def add_sample(self, name, elapsed):
+        """Add a sample without reporting it (used when loading history)"""
+        self._history(name).append(float(elapsed))
+
+    def record(self, name, elapsed):
+        """Record how long a transition took"""
+        self.add_sample(name, elapsed)
+        if self.on_record is not None:
+            self.on_record(name, elapsed)
+
+    def learned(self, name):
+        """True once enough samples exist to trust the distribution"""
+        return len(self._samples.get(name, ())) >= self.min_samples
+
+    def percentile(self, name, q):
+        """Nearest-rank percentile (0-100) of the recorded samples, or None"""
+        samples = self._samples.get(name)
+        if not samples:
+            return None
+        ordered = sorted(samples)
+        rank = max(0, min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1)))))
+        return ordered[rank]
+
+    def timeout(self, name, default):
+        """Timeout for a wait: learned p99 with a safety margin, else default"""
+        if not self.learned(name):
+            return default
+        timeout = self.percentile(name, 99) * self.timeout_margin
+        return min(max(timeout, self.min_timeout), self.max_timeout)
+
+    def probe_delays(self, name):
+        """
+        Yield the sleep before each probe: the first lands near the learned
+        median, later ones back off exponentially up to max_interval.
+        Unlearned transitions poll at default_interval.
+        """
+        if not self.learned(name):
+            while True:
+                yield self.default_interval
+
+        median = self.percentile(name, 50)
+        yield median
+        interval = max(self.min_interval, median * 0.1)
+        while True:
+            yield min(interval, self.max_interval)
+            interval *= 2
+
+    def summary(self):
+        """Dict of name -> (count, p50, p99) for every transition"""
+        return {name: (len(samples), self.percentile(name, 50), self.percentile(name, 99))
+                for name, samples in self._samples.items()}
+
+    def load_history(self, store, runs=5):
+        """Seed the distributions from the transition timings of the last runs runs in a PerfStore"""
+        try:
+            timings = store.read('timings', columns=['function', 'elapsed'], parts=store.recent_parts('timings', runs))
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Warning: could not load wait history from {store.root}: {e}")
+            return
+        transitions = timings[timings['function'].astype(str).str.startswith(TRANSITION_PREFIX)]
+        for function, elapsed in zip(transitions['function'], transitions['elapsed']):
+            self.add_sample(function[len(TRANSITION_PREFIX):], elapsed)
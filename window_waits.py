@@ -0,0 +1,111 @@
+"""
+Event-driven waits for Orpheus windows
+
+Instead of refreshing the tree and sleeping 50 ms between searches, waits
+block on a condition that the backend's window-opened / structure-changed
+events notify, so a wait ends as soon as frmOrpheusGraph or CTESMessageBox
+appears. Backends without event support fall back to polling, scheduled
+from learned transition latencies when a WaitScheduler is attached. A
+cancellation token wakes waits too, so a stop raises Cancelled within
+milliseconds.
+"""
+import threading
+import time
+from cancellation import Cancelled
+
+
+class WindowWaiter:
+    """Runs a check each time the UI changes (or on a poll tick) until it succeeds"""
+
+    def __init__(self, backend, poll_interval=0.05, fallback_interval=0.5, scheduler=None, cancel_token=None):
+        self.backend = backend
+        self.scheduler = scheduler
+        self.cancel_token = cancel_token
+        # Poll interval without events, and the safety-net interval with them
+        self.poll_interval = poll_interval
+        self.fallback_interval = fallback_interval
+        self._condition = threading.Condition()
+        self._generation = 0
+        self.events_received = 0
+        self._subscription = backend.subscribe_window_events(self._on_event)
+        if cancel_token is not None:
+            cancel_token.add_callback(self._wake)
+
+    @property
+    def event_driven(self):
+        """True when the backend delivers window events"""
+        return self._subscription is not None
+
+    def _on_event(self, event_type, automation_id):
+        """Backend callback - may run on a backend/COM thread"""
+        with self._condition:
+            self._generation += 1
+            self.events_received += 1
+            self._condition.notify_all()
+
+    def _wake(self):
+        """Token callback - end the current wait so the stop is seen"""
+        with self._condition:
+            self._generation += 1
+            self._condition.notify_all()
+
+    def _check_cancelled(self):
+        if self.cancel_token is not None and self.cancel_token.cancelled:
+            raise Cancelled(self.cancel_token.reason)
+
+    def wait_until(self, check, timeout, poll_interval=None, transition=None):
+        """
+        Call check() until it returns something truthy and return that value.
+        Between calls, sleep until the next UI event or poll tick.
+        Returns None if timeout seconds pass first, and raises Cancelled
+        as soon as the cancel token is cancelled.
+
+        With a transition name and a scheduler, the timeout comes from the
+        learned latencies, polling follows the learned probe schedule and the
+        time taken is recorded.
+        """
+        scheduler = self.scheduler if transition is not None else None
+        delays = None
+        if scheduler is not None:
+            timeout = scheduler.timeout(transition, timeout)
+            if not self.event_driven and poll_interval is None:
+                delays = scheduler.probe_delays(transition)
+        if poll_interval is None:
+            poll_interval = self.fallback_interval if self.event_driven else self.poll_interval
+
+        start = time.perf_counter()
+        deadline = start + timeout
+        if delays is not None and scheduler.learned(transition):
+            # First probe near the learned median rather than immediately
+            self._wait(self._generation, min(next(delays), timeout))
+
+        while True:
+            self._check_cancelled()
+            with self._condition:
+                generation = self._generation
+            result = check()
+            if result:
+                if scheduler is not None:
+                    scheduler.record(transition, time.perf_counter() - start)
+                return result
+
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                return None
+            interval = next(delays) if delays is not None else poll_interval
+            self._wait(generation, min(interval, remaining))
+
+    def _wait(self, generation, seconds):
+        """Sleep up to seconds, returning early on a UI event"""
+        with self._condition:
+            # Skip the wait if an event arrived while check() was running
+            if self._generation == generation:
+                self._condition.wait(seconds)
+
+    def close(self):
+        """Stop receiving backend events"""
+        if self._subscription is not None:
+            self.backend.unsubscribe_window_events(self._subscription)
+            self._subscription = None
+        if self.cancel_token is not None:
+            self.cancel_token.remove_callback(self._wake)